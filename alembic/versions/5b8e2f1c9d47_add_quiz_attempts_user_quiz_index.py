@@ -0,0 +1,33 @@
+"""add_quiz_attempts_user_quiz_index
+
+Revision ID: 5b8e2f1c9d47
+Revises: 0184ea910800
+Create Date: 2026-10-18 09:12:41.208113
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy import inspect
+
+# revision identifiers, used by Alembic.
+revision: str = '5b8e2f1c9d47'
+down_revision: Union[str, Sequence[str], None] = '0184ea910800'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    bind = op.get_bind()
+    inspector = inspect(bind)
+    
+    existing_indexes = [ix['name'] for ix in inspector.get_indexes('quiz_attempts')]
+    if 'ix_quiz_attempts_user_quiz' not in existing_indexes:
+        op.create_index('ix_quiz_attempts_user_quiz', 'quiz_attempts', ['user_id', 'quiz_id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_quiz_attempts_user_quiz', table_name='quiz_attempts')
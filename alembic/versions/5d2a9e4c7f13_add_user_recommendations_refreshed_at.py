@@ -0,0 +1,34 @@
+"""add_user_recommendations_refreshed_at
+
+Revision ID: 5d2a9e4c7f13
+Revises: 8b3e5f7a1c26
+Create Date: 2026-10-18 22:14:09.731542
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy import inspect
+
+# revision identifiers, used by Alembic.
+revision: str = '5d2a9e4c7f13'
+down_revision: Union[str, Sequence[str], None] = '8b3e5f7a1c26'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    bind = op.get_bind()
+    inspector = inspect(bind)
+    existing_columns = [col['name'] for col in inspector.get_columns('users')]
+    
+    # Left NULL: users are recomputed once, on their next recommendations read
+    if 'recommendations_refreshed_at' not in existing_columns:
+        op.add_column('users', sa.Column('recommendations_refreshed_at', sa.DateTime(timezone=True), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('users', 'recommendations_refreshed_at')
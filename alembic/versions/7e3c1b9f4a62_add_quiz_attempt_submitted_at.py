@@ -0,0 +1,37 @@
+"""add_quiz_attempt_submitted_at
+
+Revision ID: 7e3c1b9f4a62
+Revises: 5d2a9e4c7f13
+Create Date: 2026-10-18 23:41:27.180364
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy import inspect
+
+# revision identifiers, used by Alembic.
+revision: str = '7e3c1b9f4a62'
+down_revision: Union[str, Sequence[str], None] = '5d2a9e4c7f13'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    bind = op.get_bind()
+    inspector = inspect(bind)
+    existing_columns = [col['name'] for col in inspector.get_columns('quiz_attempts')]
+    
+    if 'submitted_at' not in existing_columns:
+        op.add_column('quiz_attempts', sa.Column('submitted_at', sa.DateTime(timezone=True), nullable=True))
+        
+        # Graded attempts always have max_score >= 1; attempts that were started
+        # but never submitted keep max_score = 0 and stay open
+        op.execute("UPDATE quiz_attempts SET submitted_at = completed_at WHERE max_score > 0")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('quiz_attempts', 'submitted_at')
@@ -0,0 +1,53 @@
+"""add_journal_full_text_search
+
+Revision ID: 8b3e5f7a1c26
+Revises: f4c8a2d6b915
+Create Date: 2026-10-18 18:40:09.846172
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = '8b3e5f7a1c26'
+down_revision: Union[str, Sequence[str], None] = 'f4c8a2d6b915'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    bind = op.get_bind()
+    
+    # Both statements are idempotent (IF NOT EXISTS)
+    if bind.dialect.name == 'postgresql':
+        # Generated column: PostgreSQL keeps it current on every insert/update
+        op.execute("""
+            ALTER TABLE journal_entries ADD COLUMN IF NOT EXISTS search_vector tsvector
+            GENERATED ALWAYS AS (
+                setweight(to_tsvector('english', coalesce(prompt, '')), 'B') ||
+                setweight(to_tsvector('english', coalesce(content, '')), 'A')
+            ) STORED
+        """)
+        op.execute("CREATE INDEX IF NOT EXISTS ix_journal_entries_search ON journal_entries USING GIN (search_vector)")
+    elif bind.dialect.name == 'sqlite':
+        exists = bind.execute(sa.text("SELECT 1 FROM sqlite_master WHERE name = 'journal_entries_fts'")).first()
+        if not exists:
+            op.execute("""
+                CREATE VIRTUAL TABLE journal_entries_fts USING fts5(
+                    prompt, content, content='journal_entries', content_rowid='id', tokenize='porter unicode61'
+                )
+            """)
+            op.execute("INSERT INTO journal_entries_fts(journal_entries_fts) VALUES ('rebuild')")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    bind = op.get_bind()
+    if bind.dialect.name == 'postgresql':
+        op.execute("DROP INDEX IF EXISTS ix_journal_entries_search")
+        op.execute("ALTER TABLE journal_entries DROP COLUMN IF EXISTS search_vector")
+    elif bind.dialect.name == 'sqlite':
+        op.execute("DROP TABLE IF EXISTS journal_entries_fts")
@@ -0,0 +1,69 @@
+"""add_user_specialization_scores
+
+Revision ID: 9a4d6c3e7f21
+Revises: 5b8e2f1c9d47
+Create Date: 2026-10-18 10:02:17.553920
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy import inspect
+
+# revision identifiers, used by Alembic.
+revision: str = '9a4d6c3e7f21'
+down_revision: Union[str, Sequence[str], None] = '5b8e2f1c9d47'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    bind = op.get_bind()
+    inspector = inspect(bind)
+    
+    if 'user_specialization_scores' not in inspector.get_table_names():
+        op.create_table('user_specialization_scores',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('user_id', sa.Integer(), nullable=False),
+            sa.Column('specialization_id', sa.Integer(), nullable=False),
+            sa.Column('technical_score', sa.Float(), nullable=False),
+            sa.Column('attempt_count', sa.Integer(), nullable=False),
+            sa.Column('passed_count', sa.Integer(), nullable=False),
+            sa.Column('total_percentage', sa.Float(), nullable=False),
+            sa.Column('best_percentage', sa.Float(), nullable=False),
+            sa.Column('last_attempt_at', sa.DateTime(timezone=True), nullable=True),
+            sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+            sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+            sa.ForeignKeyConstraint(['specialization_id'], ['specializations.id'], ),
+            sa.PrimaryKeyConstraint('id'),
+            sa.UniqueConstraint('user_id', 'specialization_id', name='unique_user_specialization_score')
+        )
+        op.create_index(op.f('ix_user_specialization_scores_id'), 'user_specialization_scores', ['id'], unique=False)
+        op.create_index(op.f('ix_user_specialization_scores_specialization_id'), 'user_specialization_scores', ['specialization_id'], unique=False)
+        
+        # Backfill the matrix from existing attempts in one grouped statement
+        op.execute("""
+            INSERT INTO user_specialization_scores
+                (user_id, specialization_id, technical_score, attempt_count, passed_count,
+                 total_percentage, best_percentage, last_attempt_at)
+            SELECT a.user_id,
+                   q.specialization_id,
+                   LEAST(100, SUM(FLOOR(a.percentage / 20))),
+                   COUNT(a.id),
+                   SUM(CASE WHEN a.is_passed THEN 1 ELSE 0 END),
+                   SUM(a.percentage),
+                   MAX(a.percentage),
+                   MAX(a.completed_at)
+            FROM quiz_attempts a
+            JOIN quizzes q ON q.id = a.quiz_id
+            GROUP BY a.user_id, q.specialization_id
+        """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_user_specialization_scores_specialization_id'), table_name='user_specialization_scores')
+    op.drop_index(op.f('ix_user_specialization_scores_id'), table_name='user_specialization_scores')
+    op.drop_table('user_specialization_scores')
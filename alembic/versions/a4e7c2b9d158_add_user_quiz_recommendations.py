@@ -0,0 +1,51 @@
+"""add_user_quiz_recommendations
+
+Revision ID: a4e7c2b9d158
+Revises: d8c1f5b3a926
+Create Date: 2026-10-18 15:51:26.930418
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy import inspect
+
+# revision identifiers, used by Alembic.
+revision: str = 'a4e7c2b9d158'
+down_revision: Union[str, Sequence[str], None] = 'd8c1f5b3a926'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    bind = op.get_bind()
+    inspector = inspect(bind)
+    existing_tables = inspector.get_table_names()
+
+    # Rows are computed on demand and after each submission, so no backfill
+    if 'user_quiz_recommendations' not in existing_tables:
+        op.create_table('user_quiz_recommendations',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('user_id', sa.Integer(), nullable=False),
+            sa.Column('quiz_id', sa.Integer(), nullable=False),
+            sa.Column('rank', sa.Integer(), nullable=False),
+            sa.Column('reason', sa.String(length=30), nullable=False),
+            sa.Column('detail', sa.String(length=200), nullable=True),
+            sa.Column('score', sa.Float(), nullable=False, server_default='0'),
+            sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+            sa.ForeignKeyConstraint(['quiz_id'], ['quizzes.id'], ),
+            sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+            sa.PrimaryKeyConstraint('id')
+        )
+        op.create_index(op.f('ix_user_quiz_recommendations_id'), 'user_quiz_recommendations', ['id'], unique=False)
+        op.create_index('ix_user_quiz_recommendations_user_rank', 'user_quiz_recommendations',
+                        ['user_id', 'rank'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_user_quiz_recommendations_user_rank', table_name='user_quiz_recommendations')
+    op.drop_index(op.f('ix_user_quiz_recommendations_id'), table_name='user_quiz_recommendations')
+    op.drop_table('user_quiz_recommendations')
@@ -0,0 +1,71 @@
+"""add_hierarchy_benchmark_rollups
+
+Revision ID: b6d3e9a1c570
+Revises: f2a9c7d1b384
+Create Date: 2026-10-18 14:32:07.551903
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy import inspect
+
+# revision identifiers, used by Alembic.
+revision: str = 'b6d3e9a1c570'
+down_revision: Union[str, Sequence[str], None] = 'f2a9c7d1b384'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+SUMSQ_COLUMNS = [
+    'sumsq_readiness_score',
+    'sumsq_technical_score',
+    'sumsq_soft_skills_score',
+    'sumsq_leadership_score',
+]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    bind = op.get_bind()
+    inspector = inspect(bind)
+    existing_tables = inspector.get_table_names()
+    existing_columns = [col['name'] for col in inspector.get_columns('peer_benchmarks')]
+
+    added = False
+    for column in SUMSQ_COLUMNS:
+        if column not in existing_columns:
+            op.add_column('peer_benchmarks', sa.Column(column, sa.Float(), nullable=False, server_default='0'))
+            added = True
+    if added:
+        # Rows without a histogram are rebuilt from users (sums of squares included) on next use
+        op.execute("UPDATE peer_benchmarks SET readiness_histogram = NULL")
+
+    if 'hierarchy_benchmarks' not in existing_tables:
+        op.create_table('hierarchy_benchmarks',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('level', sa.String(length=20), nullable=False),
+            sa.Column('node_id', sa.Integer(), nullable=False),
+            sa.Column('total_users', sa.Integer(), nullable=False, server_default='0'),
+            sa.Column('sum_readiness_score', sa.Float(), nullable=False, server_default='0'),
+            sa.Column('sum_technical_score', sa.Float(), nullable=False, server_default='0'),
+            sa.Column('sum_soft_skills_score', sa.Float(), nullable=False, server_default='0'),
+            sa.Column('sum_leadership_score', sa.Float(), nullable=False, server_default='0'),
+            sa.Column('sumsq_readiness_score', sa.Float(), nullable=False, server_default='0'),
+            sa.Column('sumsq_technical_score', sa.Float(), nullable=False, server_default='0'),
+            sa.Column('sumsq_soft_skills_score', sa.Float(), nullable=False, server_default='0'),
+            sa.Column('sumsq_leadership_score', sa.Float(), nullable=False, server_default='0'),
+            sa.Column('readiness_histogram', sa.Text(), nullable=True),
+            sa.Column('last_updated', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+            sa.PrimaryKeyConstraint('id'),
+            sa.UniqueConstraint('level', 'node_id', name='unique_hierarchy_benchmark_node')
+        )
+        op.create_index(op.f('ix_hierarchy_benchmarks_id'), 'hierarchy_benchmarks', ['id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_hierarchy_benchmarks_id'), table_name='hierarchy_benchmarks')
+    op.drop_table('hierarchy_benchmarks')
+    for column in reversed(SUMSQ_COLUMNS):
+        op.drop_column('peer_benchmarks', column)
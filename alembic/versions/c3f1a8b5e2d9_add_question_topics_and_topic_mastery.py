@@ -0,0 +1,53 @@
+"""add_question_topics_and_topic_mastery
+
+Revision ID: c3f1a8b5e2d9
+Revises: 9a4d6c3e7f21
+Create Date: 2026-10-18 11:26:05.871342
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy import inspect
+
+# revision identifiers, used by Alembic.
+revision: str = 'c3f1a8b5e2d9'
+down_revision: Union[str, Sequence[str], None] = '9a4d6c3e7f21'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    bind = op.get_bind()
+    inspector = inspect(bind)
+    
+    question_columns = [col['name'] for col in inspector.get_columns('questions')]
+    if 'topic' not in question_columns:
+        op.add_column('questions', sa.Column('topic', sa.String(length=150), nullable=True))
+        op.create_index(op.f('ix_questions_topic'), 'questions', ['topic'], unique=False)
+    
+    if 'user_topic_mastery' not in inspector.get_table_names():
+        op.create_table('user_topic_mastery',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('user_id', sa.Integer(), nullable=False),
+            sa.Column('specialization_id', sa.Integer(), nullable=False),
+            sa.Column('topic', sa.String(length=150), nullable=False),
+            sa.Column('correct_count', sa.Integer(), nullable=False),
+            sa.Column('total_count', sa.Integer(), nullable=False),
+            sa.Column('last_seen_at', sa.DateTime(timezone=True), nullable=True),
+            sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+            sa.ForeignKeyConstraint(['specialization_id'], ['specializations.id'], ),
+            sa.PrimaryKeyConstraint('id'),
+            sa.UniqueConstraint('user_id', 'specialization_id', 'topic', name='unique_user_topic_mastery')
+        )
+        op.create_index(op.f('ix_user_topic_mastery_id'), 'user_topic_mastery', ['id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_user_topic_mastery_id'), table_name='user_topic_mastery')
+    op.drop_table('user_topic_mastery')
+    op.drop_index(op.f('ix_questions_topic'), table_name='questions')
+    op.drop_column('questions', 'topic')
@@ -0,0 +1,52 @@
+"""add_cohort_readiness_distributions
+
+Revision ID: c9b4a7e2f613
+Revises: a4e7c2b9d158
+Create Date: 2026-10-18 16:24:52.384106
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy import inspect
+
+# revision identifiers, used by Alembic.
+revision: str = 'c9b4a7e2f613'
+down_revision: Union[str, Sequence[str], None] = 'a4e7c2b9d158'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    bind = op.get_bind()
+    inspector = inspect(bind)
+    existing_tables = inspector.get_table_names()
+
+    # Filled by the scheduled refresh job
+    if 'cohort_readiness_distributions' not in existing_tables:
+        op.create_table('cohort_readiness_distributions',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('dimension', sa.String(length=30), nullable=False),
+            sa.Column('cohort_key', sa.String(length=50), nullable=False),
+            sa.Column('cohort_label', sa.String(length=200), nullable=True),
+            sa.Column('total_users', sa.Integer(), nullable=False, server_default='0'),
+            sa.Column('avg_readiness_score', sa.Float(), nullable=False, server_default='0'),
+            sa.Column('p10_readiness_score', sa.Float(), nullable=False, server_default='0'),
+            sa.Column('p25_readiness_score', sa.Float(), nullable=False, server_default='0'),
+            sa.Column('p50_readiness_score', sa.Float(), nullable=False, server_default='0'),
+            sa.Column('p75_readiness_score', sa.Float(), nullable=False, server_default='0'),
+            sa.Column('p90_readiness_score', sa.Float(), nullable=False, server_default='0'),
+            sa.Column('readiness_histogram', sa.Text(), nullable=True),
+            sa.Column('refreshed_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+            sa.PrimaryKeyConstraint('id'),
+            sa.UniqueConstraint('dimension', 'cohort_key', name='unique_cohort_distribution')
+        )
+        op.create_index(op.f('ix_cohort_readiness_distributions_id'), 'cohort_readiness_distributions', ['id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_cohort_readiness_distributions_id'), table_name='cohort_readiness_distributions')
+    op.drop_table('cohort_readiness_distributions')
@@ -0,0 +1,51 @@
+"""add_peer_benchmark_snapshots
+
+Revision ID: d8c1f5b3a926
+Revises: b6d3e9a1c570
+Create Date: 2026-10-18 15:08:44.217630
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy import inspect
+
+# revision identifiers, used by Alembic.
+revision: str = 'd8c1f5b3a926'
+down_revision: Union[str, Sequence[str], None] = 'b6d3e9a1c570'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    bind = op.get_bind()
+    inspector = inspect(bind)
+    existing_tables = inspector.get_table_names()
+
+    if 'peer_benchmark_snapshots' not in existing_tables:
+        op.create_table('peer_benchmark_snapshots',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('specialization_id', sa.Integer(), nullable=False),
+            sa.Column('captured_at', sa.DateTime(timezone=True), nullable=False),
+            sa.Column('resolution', sa.String(length=10), nullable=False, server_default='daily'),
+            sa.Column('total_users', sa.Integer(), nullable=False, server_default='0'),
+            sa.Column('avg_readiness_score', sa.Float(), nullable=False, server_default='0'),
+            sa.Column('avg_technical_score', sa.Float(), nullable=False, server_default='0'),
+            sa.Column('avg_soft_skills_score', sa.Float(), nullable=False, server_default='0'),
+            sa.Column('avg_leadership_score', sa.Float(), nullable=False, server_default='0'),
+            sa.Column('median_readiness_score', sa.Float(), nullable=False, server_default='0'),
+            sa.ForeignKeyConstraint(['specialization_id'], ['specializations.id'], ),
+            sa.PrimaryKeyConstraint('id')
+        )
+        op.create_index(op.f('ix_peer_benchmark_snapshots_id'), 'peer_benchmark_snapshots', ['id'], unique=False)
+        op.create_index('ix_peer_benchmark_snapshots_spec_time', 'peer_benchmark_snapshots',
+                        ['specialization_id', 'captured_at'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_peer_benchmark_snapshots_spec_time', table_name='peer_benchmark_snapshots')
+    op.drop_index(op.f('ix_peer_benchmark_snapshots_id'), table_name='peer_benchmark_snapshots')
+    op.drop_table('peer_benchmark_snapshots')
@@ -0,0 +1,49 @@
+"""add_outbox_events
+
+Revision ID: e1f6b8d3c472
+Revises: c9b4a7e2f613
+Create Date: 2026-10-18 16:58:13.702945
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy import inspect
+
+# revision identifiers, used by Alembic.
+revision: str = 'e1f6b8d3c472'
+down_revision: Union[str, Sequence[str], None] = 'c9b4a7e2f613'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    bind = op.get_bind()
+    inspector = inspect(bind)
+    existing_tables = inspector.get_table_names()
+
+    if 'outbox_events' not in existing_tables:
+        op.create_table('outbox_events',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('event_type', sa.String(length=50), nullable=False),
+            sa.Column('user_id', sa.Integer(), nullable=True),
+            sa.Column('payload', sa.Text(), nullable=True),
+            sa.Column('attempts', sa.Integer(), nullable=False, server_default='0'),
+            sa.Column('available_at', sa.DateTime(timezone=True), nullable=False),
+            sa.Column('processed_at', sa.DateTime(timezone=True), nullable=True),
+            sa.Column('last_error', sa.Text(), nullable=True),
+            sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+            sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+            sa.PrimaryKeyConstraint('id')
+        )
+        op.create_index(op.f('ix_outbox_events_id'), 'outbox_events', ['id'], unique=False)
+        op.create_index('ix_outbox_events_pending', 'outbox_events', ['processed_at', 'available_at'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_outbox_events_pending', table_name='outbox_events')
+    op.drop_index(op.f('ix_outbox_events_id'), table_name='outbox_events')
+    op.drop_table('outbox_events')
@@ -0,0 +1,100 @@
+"""add_daily_activity_and_streaks
+
+Revision ID: e7b2d4f6a813
+Revises: c3f1a8b5e2d9
+Create Date: 2026-10-18 12:40:33.109284
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy import inspect
+
+# revision identifiers, used by Alembic.
+revision: str = 'e7b2d4f6a813'
+down_revision: Union[str, Sequence[str], None] = 'c3f1a8b5e2d9'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    bind = op.get_bind()
+    inspector = inspect(bind)
+    existing_tables = inspector.get_table_names()
+    
+    if 'user_daily_activity' not in existing_tables:
+        op.create_table('user_daily_activity',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('user_id', sa.Integer(), nullable=False),
+            sa.Column('activity_date', sa.Date(), nullable=False),
+            sa.Column('quiz_count', sa.Integer(), nullable=False),
+            sa.Column('journal_count', sa.Integer(), nullable=False),
+            sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+            sa.PrimaryKeyConstraint('id'),
+            sa.UniqueConstraint('user_id', 'activity_date', name='unique_user_daily_activity')
+        )
+        op.create_index(op.f('ix_user_daily_activity_id'), 'user_daily_activity', ['id'], unique=False)
+        
+        # Backfill daily counters from existing attempts and journal entries
+        op.execute("""
+            INSERT INTO user_daily_activity (user_id, activity_date, quiz_count, journal_count)
+            SELECT user_id, activity_date, SUM(quizzes), SUM(journals)
+            FROM (
+                SELECT user_id, CAST(completed_at AS DATE) AS activity_date, 1 AS quizzes, 0 AS journals
+                FROM quiz_attempts
+                UNION ALL
+                SELECT user_id, CAST(entry_date AS DATE), 0, 1
+                FROM journal_entries
+                WHERE entry_date IS NOT NULL
+            ) activity
+            GROUP BY user_id, activity_date
+        """)
+    
+    if 'user_streaks' not in existing_tables:
+        op.create_table('user_streaks',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('user_id', sa.Integer(), nullable=False),
+            sa.Column('current_streak', sa.Integer(), nullable=False),
+            sa.Column('longest_streak', sa.Integer(), nullable=False),
+            sa.Column('last_active_date', sa.Date(), nullable=True),
+            sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+            sa.PrimaryKeyConstraint('id'),
+            sa.UniqueConstraint('user_id')
+        )
+        op.create_index(op.f('ix_user_streaks_id'), 'user_streaks', ['id'], unique=False)
+        
+        # Backfill streaks: consecutive days share the same (date - row_number) island
+        op.execute("""
+            WITH islands AS (
+                SELECT user_id, activity_date,
+                       activity_date - CAST(ROW_NUMBER() OVER (PARTITION BY user_id ORDER BY activity_date) AS INTEGER) AS island
+                FROM user_daily_activity
+            ),
+            runs AS (
+                SELECT user_id, COUNT(*) AS run_length, MAX(activity_date) AS run_end
+                FROM islands
+                GROUP BY user_id, island
+            ),
+            ranked AS (
+                SELECT user_id, run_length, run_end,
+                       MAX(run_end) OVER (PARTITION BY user_id) AS last_active_date
+                FROM runs
+            )
+            INSERT INTO user_streaks (user_id, current_streak, longest_streak, last_active_date)
+            SELECT user_id,
+                   MAX(CASE WHEN run_end = last_active_date THEN run_length ELSE 0 END),
+                   MAX(run_length),
+                   MAX(last_active_date)
+            FROM ranked
+            GROUP BY user_id
+        """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_user_streaks_id'), table_name='user_streaks')
+    op.drop_table('user_streaks')
+    op.drop_index(op.f('ix_user_daily_activity_id'), table_name='user_daily_activity')
+    op.drop_table('user_daily_activity')
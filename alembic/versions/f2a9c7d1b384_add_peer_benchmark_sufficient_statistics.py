@@ -0,0 +1,58 @@
+"""add_peer_benchmark_sufficient_statistics
+
+Revision ID: f2a9c7d1b384
+Revises: e7b2d4f6a813
+Create Date: 2026-10-18 13:55:48.402617
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy import inspect
+
+# revision identifiers, used by Alembic.
+revision: str = 'f2a9c7d1b384'
+down_revision: Union[str, Sequence[str], None] = 'e7b2d4f6a813'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+SUM_COLUMNS = [
+    'sum_readiness_score',
+    'sum_technical_score',
+    'sum_soft_skills_score',
+    'sum_leadership_score',
+]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    bind = op.get_bind()
+    inspector = inspect(bind)
+    existing_columns = [col['name'] for col in inspector.get_columns('peer_benchmarks')]
+    
+    for column in SUM_COLUMNS:
+        if column not in existing_columns:
+            op.add_column('peer_benchmarks', sa.Column(column, sa.Float(), nullable=False, server_default='0'))
+    # Left NULL: rows without a histogram are rebuilt from users on their next update
+    if 'readiness_histogram' not in existing_columns:
+        op.add_column('peer_benchmarks', sa.Column('readiness_histogram', sa.Text(), nullable=True))
+    
+    # Keep one benchmark row per specialization before enforcing it
+    existing_constraints = [uc['name'] for uc in inspector.get_unique_constraints('peer_benchmarks')]
+    if 'unique_peer_benchmark_specialization' not in existing_constraints:
+        op.execute("""
+            DELETE FROM peer_benchmarks
+            WHERE id NOT IN (
+                SELECT MAX(id) FROM peer_benchmarks GROUP BY specialization_id
+            )
+        """)
+        op.create_unique_constraint('unique_peer_benchmark_specialization', 'peer_benchmarks', ['specialization_id'])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_constraint('unique_peer_benchmark_specialization', 'peer_benchmarks', type_='unique')
+    op.drop_column('peer_benchmarks', 'readiness_histogram')
+    for column in reversed(SUM_COLUMNS):
+        op.drop_column('peer_benchmarks', column)
@@ -0,0 +1,42 @@
+"""add_keyset_pagination_indexes
+
+Revision ID: f4c8a2d6b915
+Revises: e1f6b8d3c472
+Create Date: 2026-10-18 18:02:37.519264
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy import inspect
+
+# revision identifiers, used by Alembic.
+revision: str = 'f4c8a2d6b915'
+down_revision: Union[str, Sequence[str], None] = 'e1f6b8d3c472'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# (index, table, columns) matching the keyset order of each paged list
+INDEXES = [
+    ('ix_quiz_attempts_user_completed', 'quiz_attempts', ['user_id', 'completed_at', 'id']),
+    ('ix_goals_user_created', 'goals', ['user_id', 'created_at', 'id']),
+    ('ix_journal_entries_user_date', 'journal_entries', ['user_id', 'entry_date', 'id']),
+]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    bind = op.get_bind()
+    inspector = inspect(bind)
+    
+    for name, table, columns in INDEXES:
+        existing_indexes = [ix['name'] for ix in inspector.get_indexes(table)]
+        if name not in existing_indexes:
+            op.create_index(name, table, columns, unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for name, table, _ in INDEXES:
+        op.drop_index(name, table_name=table)
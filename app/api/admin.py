@@ -1,14 +1,19 @@
 """
 Admin API endpoints for database management via browser
 """
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.orm import Session
 from typing import List, Optional
 from pydantic import BaseModel
+from ..auth import require_admin
 from ..database import get_db
+from .. import crud, passwords
+from ..fieldsets import parse_fields
+from ..hierarchy_cache import hierarchy_cache
 from .. import models_hierarchical as models
 
-router = APIRouter()
+# Every admin route needs an admin token (see auth.require_admin)
+router = APIRouter(dependencies=[Depends(require_admin)])
 
 # Request/Response Models
 class SectorCreate(BaseModel):
@@ -81,6 +86,7 @@ def create_sector(sector: SectorCreate, db: Session = Depends(get_db)):
     new_sector = models.Sector(name=sector.name, description=sector.description)
     db.add(new_sector)
     db.commit()
+    hierarchy_cache.invalidate()
     db.refresh(new_sector)
     return {"success": True, "id": new_sector.id, "message": "Sector created"}
 
@@ -99,6 +105,7 @@ def update_sector(sector_id: int, sector: SectorUpdate, db: Session = Depends(ge
         db_sector.is_active = sector.is_active
     
     db.commit()
+    hierarchy_cache.invalidate()
     db.refresh(db_sector)
     return {"success": True, "message": "Sector updated"}
 
@@ -111,6 +118,7 @@ def delete_sector(sector_id: int, db: Session = Depends(get_db)):
     
     sector.is_active = False
     db.commit()
+    hierarchy_cache.invalidate()
     return {"success": True, "message": "Sector deactivated"}
 
 # ============================================================
@@ -155,6 +163,7 @@ def create_branch(branch: BranchCreate, db: Session = Depends(get_db)):
     )
     db.add(new_branch)
     db.commit()
+    hierarchy_cache.invalidate()
     db.refresh(new_branch)
     return {"success": True, "id": new_branch.id, "message": "Branch created"}
 
@@ -175,6 +184,7 @@ def update_branch(branch_id: int, branch: BranchUpdate, db: Session = Depends(ge
         db_branch.is_active = branch.is_active
     
     db.commit()
+    hierarchy_cache.invalidate()
     return {"success": True, "message": "Branch updated"}
 
 @router.delete("/admin/branches/{branch_id}")
@@ -186,6 +196,7 @@ def delete_branch(branch_id: int, db: Session = Depends(get_db)):
     
     branch.is_active = False
     db.commit()
+    hierarchy_cache.invalidate()
     return {"success": True, "message": "Branch deactivated"}
 
 # ============================================================
@@ -231,6 +242,7 @@ def create_specialization(spec: SpecializationCreate, db: Session = Depends(get_
     )
     db.add(new_spec)
     db.commit()
+    hierarchy_cache.invalidate()
     db.refresh(new_spec)
     return {"success": True, "id": new_spec.id, "message": "Specialization created"}
 
@@ -251,6 +263,7 @@ def update_specialization(spec_id: int, spec: SpecializationUpdate, db: Session
         db_spec.is_active = spec.is_active
     
     db.commit()
+    hierarchy_cache.invalidate()
     return {"success": True, "message": "Specialization updated"}
 
 @router.delete("/admin/specializations/{spec_id}")
@@ -262,6 +275,7 @@ def delete_specialization(spec_id: int, db: Session = Depends(get_db)):
     
     spec.is_active = False
     db.commit()
+    hierarchy_cache.invalidate()
     return {"success": True, "message": "Specialization deactivated"}
 
 # ============================================================
@@ -269,30 +283,16 @@ def delete_specialization(spec_id: int, db: Session = Depends(get_db)):
 # ============================================================
 
 @router.get("/admin/users")
-def get_all_users(db: Session = Depends(get_db)):
+def get_all_users(
+    fields: Optional[str] = Query(None, description="Comma-separated fields to return, e.g. id,name,email"),
+    db: Session = Depends(get_db)
+):
     """Get all users"""
-    users = db.query(models.User).all()
-    result = []
-    for user in users:
-        spec = None
-        if user.preferred_specialization_id:
-            spec = db.query(models.Specialization).filter(
-                models.Specialization.id == user.preferred_specialization_id
-            ).first()
-        
-        result.append({
-            "id": user.id,
-            "name": user.name,
-            "email": user.email,
-            "is_active": user.is_active,
-            "readiness_score": user.readiness_score,
-            "technical_score": user.technical_score,
-            "soft_skills_score": user.soft_skills_score,
-            "preferred_specialization_id": user.preferred_specialization_id,
-            "specialization_name": spec.name if spec else None,
-            "created_at": user.created_at.isoformat() if user.created_at else None
-        })
-    return result
+    try:
+        selected = parse_fields(fields, crud.ADMIN_USER_FIELDS)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return crud.list_users_for_admin(db, selected)
 
 @router.put("/admin/users/{user_id}")
 def update_user(user_id: int, user: UserUpdate, db: Session = Depends(get_db)):
@@ -301,6 +301,9 @@ def update_user(user_id: int, user: UserUpdate, db: Session = Depends(get_db)):
     if not db_user:
         raise HTTPException(status_code=404, detail="User not found")
     
+    old_specialization_id = db_user.preferred_specialization_id
+    old_scores = crud.get_user_benchmark_scores(db_user)
+    
     if user.name is not None:
         db_user.name = user.name
     if user.email is not None:
@@ -314,6 +317,15 @@ def update_user(user_id: int, user: UserUpdate, db: Session = Depends(get_db)):
     if user.preferred_specialization_id is not None:
         db_user.preferred_specialization_id = user.preferred_specialization_id
     
+    crud.sync_user_benchmark(db, db_user, old_specialization_id, old_scores)
+    if db_user.preferred_specialization_id != old_specialization_id:
+        crud.reset_quiz_recommendations(db, db_user)
+    new_scores = crud.get_user_benchmark_scores(db_user)
+    if new_scores != old_scores:
+        crud.enqueue_outbox_event(db, "scores_changed", db_user.id, {
+            "old_scores": list(old_scores),
+            "new_scores": list(new_scores)
+        })
     db.commit()
     db.refresh(db_user)
     return {"success": True, "message": "User updated"}
@@ -341,3 +353,24 @@ def get_statistics(db: Session = Depends(get_db)):
         "avg_readiness_score": db.query(func.avg(models.User.readiness_score)).scalar() or 0.0
     }
 
+@router.get("/admin/metrics/password-hashing")
+def get_password_hashing_metrics():
+    """Queue depth, throughput and work factors of the password hashing pool"""
+    return passwords.pool.metrics()
+
+@router.get("/admin/cohorts")
+def get_cohort_distributions(dimension: Optional[str] = None, db: Session = Depends(get_db)):
+    """
+    Readiness histograms (10-point bands) and quantiles per cohort, precomputed
+    by the scheduled refresh. dimension: all, sector, branch, specialization or signup_month
+    """
+    if dimension and dimension not in crud.COHORT_DIMENSIONS:
+        raise HTTPException(status_code=400, detail=f"Dimension must be one of: {', '.join(crud.COHORT_DIMENSIONS)}")
+    return crud.get_cohort_distributions(db, dimension)
+
+@router.post("/admin/cohorts/refresh")
+def refresh_cohort_distributions(db: Session = Depends(get_db)):
+    """Recompute the cohort distributions now instead of waiting for the schedule"""
+    count = crud.refresh_cohort_distributions(db)
+    return {"success": True, "message": f"Refreshed {count} cohorts"}
+
@@ -1,13 +1,14 @@
 from fastapi import APIRouter, HTTPException, Depends, Query
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional
 from .. import crud, schemas
+from ..auth import authorized_user_id
 from ..database import get_db
 
 router = APIRouter()
 
 @router.post("/goals", response_model=schemas.Goal)
-def create_goal(goal: schemas.GoalCreate, user_id: int = Query(...), db: Session = Depends(get_db)):
+def create_goal(goal: schemas.GoalCreate, user_id: int = Depends(authorized_user_id), db: Session = Depends(get_db)):
     """Create a new goal for a user"""
     db_goal = crud.create_goal(
         db=db,
@@ -21,13 +22,26 @@ def create_goal(goal: schemas.GoalCreate, user_id: int = Query(...), db: Session
     return db_goal
 
 @router.get("/goals", response_model=List[schemas.Goal])
-def get_goals(user_id: int = Query(...), db: Session = Depends(get_db)):
+def get_goals(user_id: int = Depends(authorized_user_id), db: Session = Depends(get_db)):
     """Get all goals for a user"""
     goals = crud.get_user_goals(db, user_id)
     return goals
 
+@router.get("/goals/page", response_model=schemas.GoalPage)
+def get_goals_page(
+    user_id: int = Depends(authorized_user_id),
+    cursor: Optional[str] = None,
+    limit: int = Query(crud.PAGE_SIZE_DEFAULT, ge=1, le=crud.PAGE_SIZE_MAX),
+    db: Session = Depends(get_db)
+):
+    """Goals newest first, one page at a time; pass next_cursor back as ?cursor= for the next page"""
+    try:
+        return crud.get_user_goals_page(db, user_id, cursor, limit)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
 @router.put("/goals/{goal_id}", response_model=schemas.Goal)
-def update_goal(goal_id: int, goal_update: schemas.GoalCreate, user_id: int = Query(...), db: Session = Depends(get_db)):
+def update_goal(goal_id: int, goal_update: schemas.GoalCreate, user_id: int = Depends(authorized_user_id), db: Session = Depends(get_db)):
     """Update a goal"""
     updated_goal = crud.update_goal(
         db=db,
@@ -44,7 +58,7 @@ def update_goal(goal_id: int, goal_update: schemas.GoalCreate, user_id: int = Qu
     return updated_goal
 
 @router.patch("/goals/{goal_id}/progress")
-def update_goal_progress(goal_id: int, current_value: float = Query(...), user_id: int = Query(...), db: Session = Depends(get_db)):
+def update_goal_progress(goal_id: int, current_value: float = Query(...), user_id: int = Depends(authorized_user_id), db: Session = Depends(get_db)):
     """Update goal progress (current_value)"""
     goal = crud.update_goal(db=db, goal_id=goal_id, user_id=user_id, current_value=current_value)
     if not goal:
@@ -56,7 +70,7 @@ def update_goal_progress(goal_id: int, current_value: float = Query(...), user_i
     return goal
 
 @router.delete("/goals/{goal_id}")
-def delete_goal(goal_id: int, user_id: int = Query(...), db: Session = Depends(get_db)):
+def delete_goal(goal_id: int, user_id: int = Depends(authorized_user_id), db: Session = Depends(get_db)):
     """Delete a goal"""
     success = crud.delete_goal(db, goal_id, user_id)
     if not success:
@@ -65,7 +79,7 @@ def delete_goal(goal_id: int, user_id: int = Query(...), db: Session = Depends(g
 
 # Journal Entry endpoints
 @router.post("/journal", response_model=schemas.JournalEntry)
-def create_journal_entry(entry: schemas.JournalEntryCreate, user_id: int = Query(...), db: Session = Depends(get_db)):
+def create_journal_entry(entry: schemas.JournalEntryCreate, user_id: int = Depends(authorized_user_id), db: Session = Depends(get_db)):
     """Create a new journal entry"""
     db_entry = crud.create_journal_entry(
         db=db,
@@ -76,13 +90,36 @@ def create_journal_entry(entry: schemas.JournalEntryCreate, user_id: int = Query
     return db_entry
 
 @router.get("/journal", response_model=List[schemas.JournalEntry])
-def get_journal_entries(user_id: int = Query(...), limit: int = Query(20), db: Session = Depends(get_db)):
+def get_journal_entries(user_id: int = Depends(authorized_user_id), limit: int = Query(20), db: Session = Depends(get_db)):
     """Get journal entries for a user"""
     entries = crud.get_user_journal_entries(db, user_id, limit)
     return entries
 
+@router.get("/journal/page", response_model=schemas.JournalPage)
+def get_journal_page(
+    user_id: int = Depends(authorized_user_id),
+    cursor: Optional[str] = None,
+    limit: int = Query(crud.PAGE_SIZE_DEFAULT, ge=1, le=crud.PAGE_SIZE_MAX),
+    db: Session = Depends(get_db)
+):
+    """Journal entries newest first with content excerpts; pass next_cursor back as ?cursor= for the next page"""
+    try:
+        return crud.get_user_journal_page(db, user_id, cursor, limit)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@router.get("/journal/search", response_model=schemas.JournalSearchResponse)
+def search_journal(
+    q: str = Query(..., min_length=1, max_length=200),
+    user_id: int = Depends(authorized_user_id),
+    limit: int = Query(20, ge=1, le=100),
+    db: Session = Depends(get_db)
+):
+    """Full-text search over the user's journal, best matches first"""
+    return {"query": q, "results": crud.search_journal_entries(db, user_id, q, limit)}
+
 @router.put("/journal/{entry_id}", response_model=schemas.JournalEntry)
-def update_journal_entry(entry_id: int, entry_update: schemas.JournalEntryUpdate, user_id: int = Query(...), db: Session = Depends(get_db)):
+def update_journal_entry(entry_id: int, entry_update: schemas.JournalEntryUpdate, user_id: int = Depends(authorized_user_id), db: Session = Depends(get_db)):
     """Update a journal entry"""
     updated_entry = crud.update_journal_entry(db, entry_id, user_id, entry_update.content)
     if not updated_entry:
@@ -90,7 +127,7 @@ def update_journal_entry(entry_id: int, entry_update: schemas.JournalEntryUpdate
     return updated_entry
 
 @router.delete("/journal/{entry_id}")
-def delete_journal_entry(entry_id: int, user_id: int = Query(...), db: Session = Depends(get_db)):
+def delete_journal_entry(entry_id: int, user_id: int = Depends(authorized_user_id), db: Session = Depends(get_db)):
     """Delete a journal entry"""
     success = crud.delete_journal_entry(db, entry_id, user_id)
     if not success:
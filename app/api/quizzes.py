@@ -1,8 +1,13 @@
-from fastapi import APIRouter, HTTPException, Depends
+from fastapi import APIRouter, HTTPException, Depends, Query
+from fastapi.encoders import jsonable_encoder
 from sqlalchemy.orm import Session
+from typing import Optional
 from .. import crud, schemas
 from .. import models_hierarchical as models
+from ..auth import authorized_attempt_id, authorized_user_id
 from ..database import get_db
+from ..fieldsets import parse_fields
+from ..responses import NegotiatedResponse
 
 router = APIRouter()
 
@@ -10,78 +15,48 @@ router = APIRouter()
 
 # ENDPOINTS
 @router.get("/quizzes", response_model=schemas.QuizzesResponse)
-def get_all_quizzes(specialization_id: int = None, db: Session = Depends(get_db)):
+def get_all_quizzes(
+    specialization_id: int = None,
+    fields: Optional[str] = Query(None, description="Comma-separated fields to return, e.g. id,title"),
+    db: Session = Depends(get_db)
+):
     """
     Get all quizzes, optionally filtered by specialization_id
     If specialization_id is provided, only return quizzes for that specialization
     """
-    quizzes = crud.get_all_quizzes(db)
+    try:
+        selected = parse_fields(fields, crud.QUIZ_LIST_FIELDS)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     
-    # Filter by specialization if provided
-    if specialization_id:
-        quizzes = [q for q in quizzes if q.specialization_id == specialization_id]
-    
-    quiz_list = []
-    for quiz in quizzes:
-        quiz_list.append({
-            "id": quiz.id,
-            "title": quiz.title,
-            "description": quiz.description,
-            "specialization_id": quiz.specialization_id,
-            "specialization_name": quiz.specialization.name if quiz.specialization else None,
-            "duration": quiz.time_limit_minutes,
-            "question_count": len(quiz.questions) if quiz.questions else 0,
-            "difficulty": quiz.difficulty_level
-        })
+    quiz_list = crud.list_quizzes(db, specialization_id, selected)
     
+    if selected:
+        # Partial rows would not validate against QuizSummary
+        return NegotiatedResponse(content=jsonable_encoder({"quizzes": quiz_list}))
     return {"quizzes": quiz_list}
 
 @router.get("/quizzes/{quiz_id}")
-def get_quiz(quiz_id: int, db: Session = Depends(get_db)):
+def get_quiz(
+    quiz_id: int,
+    fields: Optional[str] = Query(None, description="Comma-separated fields, e.g. id,title,questions.id,questions.question,questions.options.text"),
+    db: Session = Depends(get_db)
+):
     """Get a quiz with all questions and options - returns custom format"""
-    quiz = crud.get_quiz_by_id(db, quiz_id)
-    
-    if not quiz:
-        raise HTTPException(status_code=404, detail="Quiz not found")
+    try:
+        selected = parse_fields(fields, crud.QUIZ_DETAIL_FIELDS)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     
-    questions = crud.get_quiz_questions(db, quiz_id)
+    quiz_data = crud.get_quiz_detail(db, quiz_id, selected)
     
-    # Build response matching frontend expectations
-    quiz_data = {
-        "id": quiz.id,
-        "title": quiz.title,
-        "description": quiz.description,
-        "duration": quiz.time_limit_minutes,
-        "question_count": len(questions),
-        "difficulty": quiz.difficulty_level,
-        "specialization_id": quiz.specialization_id,
-        "questions": []
-    }
-    
-    for question in questions:
-        # Get all options with their correct status
-        options = []
-        correct_index = None
-        for idx, option in enumerate(question.options):
-            options.append({
-                "text": option.option_text,
-                "is_correct": option.is_correct
-            })
-            if option.is_correct:
-                correct_index = idx
-        
-        quiz_data["questions"].append({
-            "id": question.id,
-            "question": question.question_text,
-            "options": options,
-            "correct_index": correct_index,
-            "explanation": question.explanation
-        })
+    if not quiz_data:
+        raise HTTPException(status_code=404, detail="Quiz not found")
     
     return quiz_data
 
 @router.post("/quizzes/{quiz_id}/start", response_model=schemas.QuizStartResponse)
-def start_quiz(quiz_id: int, user_id: int, db: Session = Depends(get_db)):
+def start_quiz(quiz_id: int, user_id: int = Depends(authorized_user_id), db: Session = Depends(get_db)):
     quiz = crud.get_quiz_by_id(db, quiz_id)
     if not quiz:
         raise HTTPException(status_code=404, detail="Quiz not found")
@@ -99,34 +74,17 @@ def start_quiz(quiz_id: int, user_id: int, db: Session = Depends(get_db)):
     }
 
 @router.post("/attempts/{attempt_id}/submit", response_model=schemas.QuizResultExtended)
-def submit_quiz(attempt_id: int, data: schemas.QuizSubmission, db: Session = Depends(get_db)):
-    # Use the superior submit_quiz_answers function with proper typing
-    result = crud.submit_quiz_answers(db, attempt_id, data.answers)
+def submit_quiz(data: schemas.QuizSubmission, attempt_id: int = Depends(authorized_attempt_id), db: Session = Depends(get_db)):
+    # Grading, readiness and the "quiz_completed" outbox event are committed together;
+    # goals, recommendations and badges are updated by the outbox consumers
+    try:
+        result = crud.submit_quiz_answers(db, attempt_id, data.answers)
+    except crud.AttemptAlreadySubmittedError:
+        raise HTTPException(status_code=409, detail="Attempt already submitted")
     
     if not result:
         raise HTTPException(status_code=404, detail="Attempt not found")
     
-    # Recompute readiness for the attempt's user
-    attempt = crud.get_quiz_attempt(db, attempt_id)
-    readiness = crud.recompute_user_readiness(db, attempt.user_id) if attempt else {"overall": 0.0, "technical": 0.0, "soft": 0.0}
-    
-    # Auto-update goals based on new readiness scores
-    updated_goals = []
-    if attempt:
-        updated_goals = crud.auto_update_goals_on_quiz_completion(db, attempt.user_id)
-        if updated_goals:
-            print(f"Auto-updated {len(updated_goals)} goals for user {attempt.user_id}")
-    
-    # Update peer benchmarks for the user's specialization
-    if attempt:
-        user = db.query(crud.models.User).filter(crud.models.User.id == attempt.user_id).first()
-        if user and user.preferred_specialization_id:
-            try:
-                crud.calculate_peer_benchmarks(db, user.preferred_specialization_id)
-                print(f"Peer benchmarks updated for specialization {user.preferred_specialization_id}")
-            except Exception as e:
-                print(f"Failed to update peer benchmarks: {e}")
-    
     # Return all the detailed data from submit_quiz_answers
     return {
         "success": True,
@@ -135,19 +93,18 @@ def submit_quiz(attempt_id: int, data: schemas.QuizSubmission, db: Session = Dep
         "total": result["total"],
         "passed": result["passed"],
         "message": result.get("feedback", {}).get("overall", "Quiz completed!"),
-        "readiness": readiness,
+        "readiness": result["readiness"],
         "feedback": result.get("feedback"),
         "question_results": result.get("question_results"),
         "score_impact": result.get("score_impact"),
         "quiz_title": result.get("quiz_title"),
         "passing_score": result.get("passing_score"),
         "raw_score": result.get("raw_score"),
-        "max_score": result.get("max_score"),
-        "updated_goals": updated_goals  # New field to show which goals were auto-updated
+        "max_score": result.get("max_score")
     }
 
 @router.get("/results/{attempt_id}")
-def get_attempt_result(attempt_id: int, db: Session = Depends(get_db)):
+def get_attempt_result(attempt_id: int = Depends(authorized_attempt_id), db: Session = Depends(get_db)):
     data = crud.get_attempt_with_quiz(db, attempt_id)
     if not data:
         raise HTTPException(status_code=404, detail="Attempt not found")
@@ -171,12 +128,33 @@ def get_attempt_result(attempt_id: int, db: Session = Depends(get_db)):
     }
 
 @router.get("/dashboard", response_model=schemas.DashboardResponse)
-def get_dashboard(user_id: int, db: Session = Depends(get_db)):
+def get_dashboard(user_id: int = Depends(authorized_user_id), db: Session = Depends(get_db)):
     summary = crud.get_dashboard_summary(db, user_id)
     if not summary:
         raise HTTPException(status_code=404, detail="User not found")
     return summary
 
+@router.get("/attempts", response_model=schemas.AttemptHistoryPage)
+def get_attempt_history(
+    user_id: int = Depends(authorized_user_id),
+    cursor: Optional[str] = None,
+    limit: int = Query(crud.PAGE_SIZE_DEFAULT, ge=1, le=crud.PAGE_SIZE_MAX),
+    db: Session = Depends(get_db)
+):
+    """The user's quiz attempts newest first; pass next_cursor back as ?cursor= for the next page"""
+    try:
+        return crud.get_user_quiz_history_page(db, user_id, cursor, limit)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@router.get("/dashboard/activity", response_model=schemas.ActivityCalendarResponse)
+def get_activity_calendar(user_id: int = Depends(authorized_user_id), days: int = Query(366, ge=1, le=366), db: Session = Depends(get_db)):
+    """Get the user's daily activity heatmap and learning streaks"""
+    user = crud.get_user_by_id(db, user_id)
+    if not user:
+        raise HTTPException(status_code=404, detail="User not found")
+    return crud.get_user_activity_calendar(db, user_id, days)
+
 @router.get("/specializations/{specialization_id}/quizzes", response_model=schemas.QuizzesResponse)
 def get_quizzes_by_specialization(specialization_id: int, db: Session = Depends(get_db)):
     quizzes = crud.get_quizzes_by_specialization(db, specialization_id)
@@ -198,4 +176,21 @@ def get_quizzes_by_specialization(specialization_id: int, db: Session = Depends(
                 "specialization_name": specialization_name
             } for quiz in quizzes
         ]
-    }
\ No newline at end of file
+    }
+
+@router.get("/specializations/{specialization_id}/progress", response_model=schemas.SpecializationProgressResponse)
+def get_specialization_progress(specialization_id: int, user_id: int = Depends(authorized_user_id), db: Session = Depends(get_db)):
+    """Get the user's best score, pass state and attempt count for every quiz in a specialization"""
+    specialization = db.query(models.Specialization).filter(models.Specialization.id == specialization_id).first()
+    if not specialization:
+        raise HTTPException(status_code=404, detail="Specialization not found")
+    
+    user = crud.get_user_by_id(db, user_id)
+    if not user:
+        raise HTTPException(status_code=404, detail="User not found")
+    
+    return {
+        "specialization_id": specialization.id,
+        "specialization_name": specialization.name,
+        "levels": crud.get_user_specialization_progress(db, user_id, specialization_id)
+    }
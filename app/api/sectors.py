@@ -1,11 +1,15 @@
 """
 Hierarchical API endpoints for 3-level sector structure: Sector -> Branch -> Specialization
 """
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional
 from ..database import get_db
 from ..models_hierarchical import Sector, Branch, Specialization
+from .. import crud, schemas
+from ..hierarchy_cache import hierarchy_cache
+from ..responses import negotiated_media_type
+from ..auth import optional_authorized_user_id
 
 router = APIRouter()
 
@@ -165,6 +169,29 @@ def get_specialization_by_id(specialization_id: int, db: Session = Depends(get_d
         raise HTTPException(status_code=500, detail=f"Error fetching specialization: {str(e)}")
 
 
+@router.get("/specializations/{specialization_id}/leaderboard", response_model=schemas.LeaderboardResponse)
+def get_specialization_leaderboard(
+    specialization_id: int,
+    limit: int = Query(10, ge=1, le=100),
+    user_id: Optional[int] = Depends(optional_authorized_user_id),
+    db: Session = Depends(get_db)
+):
+    """
+    Top users by readiness in a specialization; pass user_id (with that user's
+    or an admin's token) to include that user's rank
+    """
+    try:
+        specialization = db.query(Specialization).filter(Specialization.id == specialization_id).first()
+        if not specialization:
+            raise HTTPException(status_code=404, detail="Specialization not found")
+        return crud.get_specialization_leaderboard(db, specialization_id, limit, user_id)
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error fetching leaderboard: {str(e)}")
+
+
 @router.get("/sectors/{sector_id}/hierarchy", response_model=dict)
 def get_sector_full_hierarchy(sector_id: int, db: Session = Depends(get_db)):
     """Get the complete hierarchy for a sector (sector -> branches -> specializations)"""
@@ -218,49 +245,50 @@ def get_sector_full_hierarchy(sector_id: int, db: Session = Depends(get_db)):
 
 @router.get("/hierarchy", response_model=List[dict])
 def get_complete_hierarchy(db: Session = Depends(get_db)):
-    """Get the complete hierarchy for all sectors"""
+    """Get the complete hierarchy for all sectors (cached until an admin edit)"""
     try:
-        sectors = db.query(Sector).filter(Sector.is_active == True).all()
-        result = []
+        # The cache keeps the encoded body for each format
+        media_type = negotiated_media_type()
+        return Response(content=hierarchy_cache.body(db, media_type), media_type=media_type, headers={"Vary": "Accept"})
         
-        for sector in sectors:
-            # Get all branches for this sector
-            branches = db.query(Branch).filter(
-                Branch.sector_id == sector.id,
-                Branch.is_active == True
-            ).all()
-            
-            branches_data = []
-            for branch in branches:
-                # Get all specializations for this branch
-                specializations = db.query(Specialization).filter(
-                    Specialization.branch_id == branch.id,
-                    Specialization.is_active == True
-                ).all()
-                
-                specializations_data = []
-                for spec in specializations:
-                    specializations_data.append({
-                        "id": spec.id,
-                        "name": spec.name,
-                        "description": spec.description
-                    })
-                
-                branches_data.append({
-                    "id": branch.id,
-                    "name": branch.name,
-                    "description": branch.description,
-                    "specializations": specializations_data
-                })
-            
-            result.append({
-                "id": sector.id,
-                "name": sector.name,
-                "description": sector.description,
-                "branches": branches_data
-            })
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error fetching complete hierarchy: {str(e)}")
+
+
+@router.get("/benchmarks/specialization/{specialization_id}/trend", response_model=schemas.PeerBenchmarkTrendResponse)
+def get_peer_benchmark_trend(
+    specialization_id: int,
+    days: int = Query(365, ge=1, le=3650),
+    db: Session = Depends(get_db)
+):
+    """Peer benchmark history for a specialization as chart-ready series"""
+    try:
+        specialization = db.query(Specialization).filter(Specialization.id == specialization_id).first()
+        if not specialization:
+            raise HTTPException(status_code=404, detail="Specialization not found")
+        return crud.get_peer_benchmark_trend(db, specialization_id, days)
         
-        return result
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error fetching benchmark trend: {str(e)}")
+
+
+@router.get("/benchmarks/{level}/{node_id}", response_model=schemas.HierarchyBenchmarkResponse)
+def get_hierarchy_benchmark(level: str, node_id: int, db: Session = Depends(get_db)):
+    """
+    Benchmark statistics for a sector, branch or specialization together with
+    those of its children, e.g. /benchmarks/sector/1 compares the sector's branches
+    """
+    if level not in crud.HIERARCHY_LEVELS:
+        raise HTTPException(status_code=400, detail=f"Level must be one of: {', '.join(crud.HIERARCHY_LEVELS)}")
+    try:
+        data = crud.get_hierarchy_benchmark(db, level, node_id)
+        if not data:
+            raise HTTPException(status_code=404, detail=f"{level.capitalize()} not found")
+        return data
         
+    except HTTPException:
+        raise
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Error fetching complete hierarchy: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Error fetching benchmark: {str(e)}")
@@ -1,9 +1,13 @@
-from fastapi import APIRouter, HTTPException, Depends
+from fastapi import APIRouter, HTTPException, Depends, Query, Request
+from fastapi.responses import StreamingResponse
+from starlette.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
 from pydantic import BaseModel
-from .. import crud, schemas
+from typing import Any, Dict, List, Optional
+from .. import auth, crud, passwords, schemas
 from .. import models_hierarchical as models
-from ..database import get_db
+from ..database import get_db, SessionLocal
+from ..events import event_stream
 
 router = APIRouter()
 
@@ -20,59 +24,85 @@ class UserLoginRequest(BaseModel):
 class UserUpdateRequest(BaseModel):
     specialization_id: int
 
+def _session(user) -> dict:
+    """Signed session token returned on register and login"""
+    session = auth.issue_token(user.id, auth.role_for(user))
+    return {"token": session["token"], "token_type": "bearer", "expires_at": session["expires_at"]}
+
+def _user_payload(user) -> dict:
+    return {
+        "id": user.id,
+        "email": user.email,
+        "name": user.name,
+        "specialization_id": user.preferred_specialization_id,
+        "readiness_score": user.readiness_score,
+        "technical_score": user.technical_score,
+        "soft_skills_score": user.soft_skills_score,
+        "leadership_score": user.leadership_score,
+        "created_at": str(user.created_at)
+    }
+
+async def _run_hashing(coro):
+    try:
+        return await coro
+    except passwords.PoolBusy:
+        raise HTTPException(status_code=503, detail="Too many login attempts in progress, please retry",
+                            headers={"Retry-After": "1"})
+
 # ENDPOINTS
+# Register and login are async so the password hash is awaited on the hashing
+# pool; their database calls still run in the threadpool
 @router.post("/register")
-def register(data: UserRegisterRequest, db: Session = Depends(get_db)):
-    existing_user = crud.get_user_by_email(db, data.email)
+async def register(data: UserRegisterRequest, db: Session = Depends(get_db)):
+    existing_user = await run_in_threadpool(crud.get_user_by_email, db, data.email)
     if existing_user:
         raise HTTPException(status_code=400, detail="Email already registered")
     
-    new_user = crud.create_user(
+    password_hash = await _run_hashing(passwords.hash_password(data.password))
+    new_user = await run_in_threadpool(
+        crud.create_user,
         db=db,
         email=data.email,
-        password=data.password,
+        password_hash=password_hash,
         name=data.name
     )
     
     return {
         "success": True,
-        "user": {
-            "id": new_user.id,
-            "email": new_user.email,
-            "name": new_user.name,
-            "specialization_id": new_user.preferred_specialization_id,
-            "readiness_score": new_user.readiness_score,
-            "technical_score": new_user.technical_score,
-            "soft_skills_score": new_user.soft_skills_score,
-            "leadership_score": new_user.leadership_score,
-            "created_at": str(new_user.created_at)
-        }
+        "user": _user_payload(new_user),
+        **_session(new_user)
     }
 
 @router.post("/login")
-def login(data: UserLoginRequest, db: Session = Depends(get_db)):
-    user = crud.get_user_by_email(db, data.email)
+async def login(data: UserLoginRequest, db: Session = Depends(get_db)):
+    user = await run_in_threadpool(crud.get_user_by_email, db, data.email)
     
-    if not user or user.password_hash != data.password:
+    matches, new_hash = await _run_hashing(
+        passwords.verify_password(data.password, user.password_hash if user else None)
+    )
+    if not user or not matches:
         raise HTTPException(status_code=401, detail="Invalid email or password")
     
-    return {
+    response = {
         "success": True,
-        "user": {
-            "id": user.id,
-            "email": user.email,
-            "name": user.name,
-            "specialization_id": user.preferred_specialization_id,
-            "readiness_score": user.readiness_score,
-            "technical_score": user.technical_score,
-            "soft_skills_score": user.soft_skills_score,
-            "leadership_score": user.leadership_score,
-            "created_at": str(user.created_at)
-        }
+        "user": _user_payload(user),
+        **_session(user)
     }
+    if new_hash:
+        # Plaintext or outdated work factors: store the fresh hash
+        await run_in_threadpool(crud.update_user_password_hash, db, user.id, new_hash)
+    return response
+
+@router.post("/logout")
+def logout(claims: Optional[Dict[str, Any]] = Depends(auth.get_token_claims)):
+    """Revoke the bearer token used for this request"""
+    if claims is None:
+        raise HTTPException(status_code=401, detail="Not authenticated")
+    auth.revocations.revoke(claims["jti"], claims["exp"])
+    return {"success": True}
 
 @router.patch("/users/{user_id}/specialization")
-def update_specialization(user_id: int, data: UserUpdateRequest, db: Session = Depends(get_db)):
+def update_specialization(data: UserUpdateRequest, user_id: int = Depends(auth.authorized_user_id), db: Session = Depends(get_db)):
     if data.specialization_id is None:
         raise HTTPException(status_code=400, detail="Specialization ID is required")
     
@@ -92,7 +122,7 @@ def update_specialization(user_id: int, data: UserUpdateRequest, db: Session = D
     }
 
 @router.get("/users/{user_id}", response_model=schemas.User)
-def get_user(user_id: int, db: Session = Depends(get_db)):
+def get_user(user_id: int = Depends(auth.authorized_user_id), db: Session = Depends(get_db)):
     user = crud.get_user_by_id(db, user_id)
     
     if not user:
@@ -111,8 +141,65 @@ def get_user(user_id: int, db: Session = Depends(get_db)):
     }
 
 
+@router.get("/users/{user_id}/bootstrap", response_model=schemas.BootstrapResponse)
+def get_bootstrap(user_id: int = Depends(auth.authorized_user_id), db: Session = Depends(get_db)):
+    """
+    Landing page data in one round trip: profile, dashboard, first pages of
+    goals and journal, the sector hierarchy and the peer benchmark
+    """
+    data = crud.get_bootstrap(db, user_id)
+    
+    if not data:
+        raise HTTPException(status_code=404, detail="User not found")
+    
+    return data
+
+@router.get("/users/{user_id}/specialization-scores", response_model=schemas.UserSpecializationScores)
+def get_specialization_scores(user_id: int = Depends(auth.authorized_user_id), db: Session = Depends(get_db)):
+    """Get the user's scores broken down per specialization"""
+    scores = crud.get_user_specialization_scores(db, user_id)
+    
+    if not scores:
+        raise HTTPException(status_code=404, detail="User not found")
+    
+    return scores
+
+
+@router.get("/users/{user_id}/topic-mastery", response_model=schemas.TopicMasteryResponse)
+def get_topic_mastery(user_id: int = Depends(auth.authorized_user_id), specialization_id: Optional[int] = None, limit: Optional[int] = None, db: Session = Depends(get_db)):
+    """Get the user's accuracy per question topic, weakest areas first"""
+    user = crud.get_user_by_id(db, user_id)
+    
+    if not user:
+        raise HTTPException(status_code=404, detail="User not found")
+    
+    return {"topics": crud.get_user_topic_mastery(db, user_id, specialization_id, limit)}
+
+
+@router.get("/users/{user_id}/badges", response_model=schemas.UserBadgesResponse)
+def get_user_badges(user_id: int = Depends(auth.authorized_user_id), db: Session = Depends(get_db)):
+    """Get the badges the user has earned, most recent first"""
+    user = crud.get_user_by_id(db, user_id)
+    
+    if not user:
+        raise HTTPException(status_code=404, detail="User not found")
+    
+    return {"badges": crud.get_user_badges(db, user_id)}
+
+
+@router.get("/users/{user_id}/recommended-quizzes", response_model=schemas.QuizRecommendationsResponse)
+def get_recommended_quizzes(user_id: int = Depends(auth.authorized_user_id), db: Session = Depends(get_db)):
+    """Get the user's ranked next-quiz suggestions, refreshed after each submission"""
+    user = crud.get_user_by_id(db, user_id)
+    
+    if not user:
+        raise HTTPException(status_code=404, detail="User not found")
+    
+    return {"recommendations": crud.get_quiz_recommendations(db, user_id)}
+
+
 @router.get("/users/{user_id}/peer-benchmark", response_model=schemas.PeerBenchmarkResponse)
-def get_peer_benchmark_endpoint(user_id: int, db: Session = Depends(get_db)):
+def get_peer_benchmark_endpoint(user_id: int = Depends(auth.authorized_user_id), db: Session = Depends(get_db)):
     """
     Get peer benchmarking data comparing user's scores with peers in their specialization
     """
@@ -147,3 +234,63 @@ def get_peer_benchmark_endpoint(user_id: int, db: Session = Depends(get_db)):
             "last_updated": data.get("last_updated") or datetime.now().isoformat()
         }
     }
+
+
+@router.get("/users/{user_id}/similar-peers", response_model=schemas.SimilarPeersResponse)
+def get_similar_peers_endpoint(user_id: int = Depends(auth.authorized_user_id), limit: int = Query(5, ge=1, le=50), db: Session = Depends(get_db)):
+    """Learners in the user's specialization with the most similar scores and quiz results"""
+    data = crud.get_similar_peers(db, user_id, limit)
+    
+    if not data:
+        raise HTTPException(
+            status_code=404,
+            detail="User not found or no specialization set. Please complete onboarding first."
+        )
+    
+    return data
+
+
+@router.get("/users/{user_id}/specialization-comparison", response_model=schemas.SpecializationComparisonResponse)
+def get_specialization_comparison_endpoint(
+    user_id: int = Depends(auth.authorized_user_id),
+    specialization_ids: Optional[List[int]] = Query(None),
+    limit: Optional[int] = Query(None, ge=1),
+    db: Session = Depends(get_db)
+):
+    """
+    Compare the user's scores with the peers of other specializations,
+    e.g. ?specialization_ids=3&specialization_ids=7 (all specializations by default)
+    """
+    data = crud.get_specialization_comparison(db, user_id, specialization_ids, limit)
+    
+    if not data:
+        raise HTTPException(status_code=404, detail="User not found")
+    
+    return data
+
+
+def _user_exists(user_id: int) -> bool:
+    db = SessionLocal()
+    try:
+        return crud.get_user_by_id(db, user_id) is not None
+    finally:
+        db.close()
+
+
+@router.get("/users/{user_id}/events")
+async def stream_user_events(request: Request, user_id: int = Depends(auth.authorized_stream_user_id)):
+    """
+    Server-Sent Events stream of the user's live updates: `readiness`,
+    `goals` and `benchmark` events are pushed after each quiz or score change,
+    replacing polling of the dashboard, goals and peer benchmark.
+    EventSource cannot set headers, so browsers pass the token as ?access_token=
+    """
+    # Own short-lived session: a get_db session would stay checked out for the whole stream
+    if not await run_in_threadpool(_user_exists, user_id):
+        raise HTTPException(status_code=404, detail="User not found")
+    
+    return StreamingResponse(
+        event_stream(user_id, request),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
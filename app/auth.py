@@ -0,0 +1,190 @@
+"""
+Stateless session tokens
+/api/users/login issues HS256-signed JWTs carrying the user id and role;
+the dependencies below verify them with one HMAC and no database access
+(attempt routes add one primary-key lookup for the attempt's owner).
+Logout revokes a token's id in a small in-memory cache until it expires
+"""
+import base64
+import hashlib
+import hmac
+import json
+import logging
+import os
+import secrets
+import threading
+import time
+from typing import Any, Dict, Optional
+
+from fastapi import Depends, HTTPException, Query
+from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
+from sqlalchemy.orm import Session
+
+from . import crud
+from .database import get_db
+
+logger = logging.getLogger(__name__)
+
+TOKEN_TTL_SECONDS = int(os.getenv("SESSION_TOKEN_TTL_SECONDS", 12 * 3600))
+# "required": user routes need a token; "optional": a valid token is checked
+# against user_id but requests without one are still accepted (only while
+# clients migrate). Admin routes always need an admin token
+AUTH_MODES = ("required", "optional")
+AUTH_MODE = os.getenv("AUTH_MODE", "required")
+if AUTH_MODE not in AUTH_MODES:
+    # Fail closed: a typo must not silently disable authentication
+    raise ValueError(f"AUTH_MODE must be one of {', '.join(AUTH_MODES)}, got '{AUTH_MODE}'")
+ADMIN_EMAILS = {email.strip().lower() for email in os.getenv("ADMIN_EMAILS", "").split(",") if email.strip()}
+
+_SECRET = os.getenv("SESSION_TOKEN_SECRET")
+if not _SECRET:
+    logger.warning("SESSION_TOKEN_SECRET is not set; tokens are signed with a random key and "
+                   "are only valid in this process until it restarts")
+    _SECRET = secrets.token_urlsafe(32)
+_KEY = _SECRET.encode()
+
+_HEADER = base64.urlsafe_b64encode(json.dumps({"alg": "HS256", "typ": "JWT"}, separators=(",", ":")).encode()).rstrip(b"=")
+
+
+def _b64encode(data: bytes) -> bytes:
+    return base64.urlsafe_b64encode(data).rstrip(b"=")
+
+
+def _b64decode(data: bytes) -> bytes:
+    return base64.urlsafe_b64decode(data + b"=" * (-len(data) % 4))
+
+
+def role_for(user) -> str:
+    return "admin" if (user.email or "").lower() in ADMIN_EMAILS else "user"
+
+
+def issue_token(user_id: int, role: str, ttl_seconds: int = TOKEN_TTL_SECONDS) -> Dict[str, Any]:
+    """Sign a token for the user; returns the token with its expiry (epoch seconds)"""
+    now = int(time.time())
+    claims = {"sub": user_id, "role": role, "iat": now, "exp": now + ttl_seconds, "jti": secrets.token_urlsafe(12)}
+    signing_input = _HEADER + b"." + _b64encode(json.dumps(claims, separators=(",", ":")).encode())
+    signature = _b64encode(hmac.new(_KEY, signing_input, hashlib.sha256).digest())
+    return {"token": (signing_input + b"." + signature).decode(), "expires_at": claims["exp"]}
+
+
+def verify_token(token: str) -> Dict[str, Any]:
+    """Claims of a valid, unexpired, unrevoked token; raises ValueError otherwise"""
+    try:
+        header, payload, signature = token.encode().split(b".")
+    except ValueError:
+        raise ValueError("malformed token")
+    expected = _b64encode(hmac.new(_KEY, header + b"." + payload, hashlib.sha256).digest())
+    if header != _HEADER or not hmac.compare_digest(signature, expected):
+        raise ValueError("invalid signature")
+    try:
+        claims = json.loads(_b64decode(payload))
+    except ValueError:
+        raise ValueError("malformed token")
+    if claims.get("exp", 0) <= time.time():
+        raise ValueError("token expired")
+    if revocations.is_revoked(claims.get("jti")):
+        raise ValueError("token revoked")
+    return claims
+
+
+class RevocationCache:
+    """
+    Ids of logged-out tokens, kept only until the token would have expired anyway.
+    Per process: with several workers, a revoked token stays usable on the
+    others until it expires, so keep SESSION_TOKEN_TTL_SECONDS short there
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._revoked: Dict[str, float] = {}
+
+    def revoke(self, jti: str, expires_at: float):
+        now = time.time()
+        with self._lock:
+            self._revoked = {key: exp for key, exp in self._revoked.items() if exp > now}
+            self._revoked[jti] = expires_at
+
+    def is_revoked(self, jti: Optional[str]) -> bool:
+        with self._lock:
+            return jti in self._revoked
+
+
+# Shared instance for the application process
+revocations = RevocationCache()
+
+bearer_scheme = HTTPBearer(auto_error=False)
+
+
+def _claims(token: Optional[str]) -> Optional[Dict[str, Any]]:
+    """Claims of a presented token, None when there is none (and AUTH_MODE allows it)"""
+    if token is None:
+        if AUTH_MODE == "required":
+            raise HTTPException(status_code=401, detail="Not authenticated", headers={"WWW-Authenticate": "Bearer"})
+        return None
+    try:
+        return verify_token(token)
+    except ValueError as e:
+        raise HTTPException(status_code=401, detail=f"Invalid token: {e}", headers={"WWW-Authenticate": "Bearer"})
+
+
+def get_token_claims(credentials: Optional[HTTPAuthorizationCredentials] = Depends(bearer_scheme)) -> Optional[Dict[str, Any]]:
+    """Claims of the request's bearer token"""
+    return _claims(credentials.credentials if credentials else None)
+
+
+def get_stream_token_claims(
+    credentials: Optional[HTTPAuthorizationCredentials] = Depends(bearer_scheme),
+    access_token: Optional[str] = Query(None, description="Session token, for clients such as EventSource that cannot send headers")
+) -> Optional[Dict[str, Any]]:
+    """Claims of the bearer token, or of ?access_token= when there is no header"""
+    return _claims(credentials.credentials if credentials else access_token)
+
+
+def _check_access(claims: Optional[Dict[str, Any]], user_id: int):
+    if claims is not None and claims.get("sub") != user_id and claims.get("role") != "admin":
+        raise HTTPException(status_code=403, detail="Token does not grant access to this user")
+
+
+def authorized_user_id(user_id: int, claims: Optional[Dict[str, Any]] = Depends(get_token_claims)) -> int:
+    """The route's user_id, after checking the token belongs to that user (or an admin)"""
+    _check_access(claims, user_id)
+    return user_id
+
+
+def optional_authorized_user_id(
+    user_id: Optional[int] = None,
+    credentials: Optional[HTTPAuthorizationCredentials] = Depends(bearer_scheme)
+) -> Optional[int]:
+    """authorized_user_id for public routes where user_id is optional; no token is needed without one"""
+    if user_id is None:
+        return None
+    _check_access(_claims(credentials.credentials if credentials else None), user_id)
+    return user_id
+
+
+def authorized_stream_user_id(user_id: int, claims: Optional[Dict[str, Any]] = Depends(get_stream_token_claims)) -> int:
+    """authorized_user_id for streaming routes, also accepting ?access_token="""
+    _check_access(claims, user_id)
+    return user_id
+
+
+def authorized_attempt_id(
+    attempt_id: int,
+    claims: Optional[Dict[str, Any]] = Depends(get_token_claims),
+    db: Session = Depends(get_db)
+) -> int:
+    """The route's attempt_id, after checking the token belongs to the attempt's user (or an admin)"""
+    owner_id = crud.get_attempt_owner_id(db, attempt_id)
+    if owner_id is None:
+        raise HTTPException(status_code=404, detail="Attempt not found")
+    _check_access(claims, owner_id)
+    return attempt_id
+
+
+def require_admin(claims: Optional[Dict[str, Any]] = Depends(get_token_claims)) -> Dict[str, Any]:
+    """Claims of an admin token; admin routes need one whatever AUTH_MODE says"""
+    if claims is None:
+        raise HTTPException(status_code=401, detail="Not authenticated", headers={"WWW-Authenticate": "Bearer"})
+    if claims.get("role") != "admin":
+        raise HTTPException(status_code=403, detail="Admin access required")
+    return claims
@@ -0,0 +1,142 @@
+"""
+Badge award engine
+Badge criteria are compiled once and badges are indexed per category in
+required_score order, so a score change only looks at the thresholds it
+crossed (found with bisect) instead of evaluating every badge
+"""
+import json
+import logging
+import threading
+import time
+from bisect import bisect_right
+from typing import Dict, List, Optional, Sequence
+
+from sqlalchemy.orm import Session
+
+from . import models_hierarchical as models
+
+logger = logging.getLogger(__name__)
+
+# Score categories in the order of crud.get_user_benchmark_scores
+SCORE_CATEGORIES = ("readiness", "technical", "soft_skills", "leadership")
+
+# Extra conditions a badge's criteria JSON may add to its score threshold,
+# each checked against the user's context
+CONDITIONS = {
+    "min_quizzes_passed": lambda context, value: context["quizzes_passed"] >= value,
+    "min_streak": lambda context, value: context["longest_streak"] >= value,
+    "specialization_id": lambda context, value: context["specialization_id"] == value,
+}
+
+# Badges rarely change; reload at least this often so admin edits are picked up
+MAX_AGE_SECONDS = 300
+
+
+class CompiledBadge:
+    """A badge with its criteria parsed into (condition, value) checks"""
+
+    def __init__(self, badge_id: int, name: str, category: str, required_score: float, conditions: list):
+        self.id = badge_id
+        self.name = name
+        self.category = category
+        self.required_score = required_score
+        self.conditions = conditions
+
+    def matches(self, context: dict) -> bool:
+        return all(check(context, value) for check, value in self.conditions)
+
+
+def compile_criteria(criteria: Optional[str]) -> list:
+    """Parse a badge's criteria JSON; raises ValueError for unknown conditions"""
+    parsed = json.loads(criteria) if criteria else {}
+    unknown = set(parsed) - set(CONDITIONS)
+    if unknown:
+        raise ValueError(f"unknown criteria {sorted(unknown)}")
+    return [(CONDITIONS[key], value) for key, value in parsed.items()]
+
+
+class CategoryIndex:
+    """
+    Badges of one category sorted by required_score. Plain threshold badges
+    are only checked when crossed; badges with extra conditions are checked
+    whenever the score is at or above their threshold, since the condition
+    may be met later than the score.
+    """
+
+    def __init__(self, badges: List[CompiledBadge]):
+        plain = sorted((badge for badge in badges if not badge.conditions), key=lambda badge: badge.required_score)
+        conditional = sorted((badge for badge in badges if badge.conditions), key=lambda badge: badge.required_score)
+        self.plain = plain
+        self.plain_thresholds = [badge.required_score for badge in plain]
+        self.conditional = conditional
+        self.conditional_thresholds = [badge.required_score for badge in conditional]
+
+    def crossed(self, old_score: float, new_score: float) -> List[CompiledBadge]:
+        """Plain badges with old_score < required_score <= new_score"""
+        low = bisect_right(self.plain_thresholds, old_score)
+        high = bisect_right(self.plain_thresholds, new_score)
+        return self.plain[low:high]
+
+    def reachable(self, score: float) -> List[CompiledBadge]:
+        """Conditional badges with required_score <= score"""
+        return self.conditional[:bisect_right(self.conditional_thresholds, score)]
+
+
+class BadgeEngine:
+    """Compiled badge index, reloaded when invalidated or expired"""
+
+    def __init__(self, max_age_seconds: float = MAX_AGE_SECONDS):
+        self.max_age_seconds = max_age_seconds
+        self._lock = threading.Lock()
+        self._index: Optional[Dict[str, CategoryIndex]] = None
+        self._loaded_at = 0.0
+
+    def invalidate(self):
+        with self._lock:
+            self._index = None
+
+    def _load(self, db: Session) -> Dict[str, CategoryIndex]:
+        by_category: Dict[str, List[CompiledBadge]] = {category: [] for category in SCORE_CATEGORIES}
+        for badge in db.query(models.Badge).filter(models.Badge.is_active == True):
+            if badge.category not in by_category:
+                logger.warning(f"Badge '{badge.name}' has unknown category '{badge.category}' and is skipped")
+                continue
+            try:
+                conditions = compile_criteria(badge.criteria)
+            except ValueError as e:
+                logger.warning(f"Badge '{badge.name}' is skipped: {e}")
+                continue
+            by_category[badge.category].append(
+                CompiledBadge(badge.id, badge.name, badge.category, badge.required_score, conditions)
+            )
+        index = {category: CategoryIndex(badges) for category, badges in by_category.items()}
+        with self._lock:
+            self._index = index
+            self._loaded_at = time.monotonic()
+        return index
+
+    def get_index(self, db: Session) -> Dict[str, CategoryIndex]:
+        with self._lock:
+            index = self._index
+            fresh = index is not None and time.monotonic() - self._loaded_at < self.max_age_seconds
+        if fresh:
+            return index
+        return self._load(db)
+
+    def candidates(self, db: Session, old_scores: Sequence[float], new_scores: Sequence[float]):
+        """
+        (crossed, conditional) badges to consider for one score change:
+        plain badges whose threshold was just crossed, and conditional
+        badges whose threshold the new score has reached
+        """
+        index = self.get_index(db)
+        crossed, conditional = [], []
+        for category, old_score, new_score in zip(SCORE_CATEGORIES, old_scores, new_scores):
+            category_index = index[category]
+            crossed.extend(category_index.crossed(old_score or 0, new_score or 0))
+            conditional.extend(category_index.reachable(new_score or 0))
+        return crossed, conditional
+
+
+# Shared instance for the application process
+badge_engine = BadgeEngine()
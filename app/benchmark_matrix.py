@@ -0,0 +1,128 @@
+"""
+Cached matrix of every specialization's peer benchmark
+Lets one user's scores be compared against many specializations with a
+single vectorized operation instead of a query set per specialization
+"""
+import json
+import threading
+import time
+from typing import Dict, Optional, Sequence
+
+import numpy as np
+from sqlalchemy.orm import Session
+
+from . import models_hierarchical as models
+
+AVERAGE_COLUMNS = (
+    "avg_readiness_score",
+    "avg_technical_score",
+    "avg_soft_skills_score",
+    "avg_leadership_score",
+)
+
+# Benchmarks change with every score update; a minute of lag is fine for exploration
+MAX_AGE_SECONDS = 60
+
+
+class BenchmarkSnapshot:
+    """Benchmark rows as parallel arrays, one row per specialization"""
+
+    def __init__(self, specialization_ids, names, total_users, averages, cumulative, has_histogram):
+        self.specialization_ids = specialization_ids  # (n,)
+        self.names = names  # list of n names
+        self.total_users = total_users  # (n,)
+        self.averages = averages  # (n, 4) in AVERAGE_COLUMNS order
+        self.cumulative = cumulative  # (n, 102): users below each readiness bucket
+        self.has_histogram = has_histogram  # (n,) bool
+
+
+class BenchmarkMatrix:
+    """All peer benchmarks in memory, reloaded when invalidated or expired"""
+
+    def __init__(self, max_age_seconds: float = MAX_AGE_SECONDS):
+        self.max_age_seconds = max_age_seconds
+        self._lock = threading.Lock()
+        self._snapshot: Optional[BenchmarkSnapshot] = None
+        self._loaded_at = 0.0
+
+    def invalidate(self):
+        with self._lock:
+            self._snapshot = None
+
+    def _load(self, db: Session) -> BenchmarkSnapshot:
+        rows = db.query(
+            models.PeerBenchmark.specialization_id,
+            models.Specialization.name,
+            models.PeerBenchmark.total_users,
+            models.PeerBenchmark.readiness_histogram,
+            *[getattr(models.PeerBenchmark, column) for column in AVERAGE_COLUMNS]
+        ).join(
+            models.Specialization, models.Specialization.id == models.PeerBenchmark.specialization_id
+        ).filter(
+            models.Specialization.is_active == True
+        ).order_by(models.PeerBenchmark.specialization_id).all()
+
+        count = len(rows)
+        histograms = np.zeros((count, 101))
+        has_histogram = np.zeros(count, dtype=bool)
+        for index, row in enumerate(rows):
+            if row.readiness_histogram:
+                histograms[index] = json.loads(row.readiness_histogram)
+                has_histogram[index] = True
+        cumulative = np.zeros((count, 102))
+        cumulative[:, 1:] = np.cumsum(histograms, axis=1)
+
+        snapshot = BenchmarkSnapshot(
+            specialization_ids=np.array([row.specialization_id for row in rows], dtype=np.int64),
+            names=[row.name for row in rows],
+            total_users=np.array([row.total_users or 0 for row in rows], dtype=np.int64),
+            averages=np.array([row[4:] for row in rows], dtype=float).reshape(count, len(AVERAGE_COLUMNS)),
+            cumulative=cumulative,
+            has_histogram=has_histogram
+        )
+        with self._lock:
+            self._snapshot = snapshot
+            self._loaded_at = time.monotonic()
+        return snapshot
+
+    def get(self, db: Session) -> BenchmarkSnapshot:
+        with self._lock:
+            snapshot = self._snapshot
+            fresh = snapshot is not None and time.monotonic() - self._loaded_at < self.max_age_seconds
+        if fresh:
+            return snapshot
+        return self._load(db)
+
+    def compare(self, db: Session, scores: Sequence[float],
+                specialization_ids: Optional[Sequence[int]] = None) -> Dict[str, np.ndarray]:
+        """
+        Compare one user's (readiness, technical, soft_skills, leadership)
+        scores with every selected specialization at once. Returns parallel
+        arrays: specialization_ids, names, total_users, differences (n, 4)
+        and readiness_percentiles (50 where there is too little data).
+        """
+        snapshot = self.get(db)
+        mask = snapshot.total_users > 0
+        if specialization_ids is not None:
+            mask &= np.isin(snapshot.specialization_ids, list(specialization_ids))
+
+        user = np.nan_to_num(np.asarray(scores, dtype=float), nan=0.0)
+        differences = user - snapshot.averages[mask]
+
+        bucket = min(100, max(0, int(user[0])))
+        totals = snapshot.total_users[mask]
+        below = snapshot.cumulative[mask, bucket]
+        enough = snapshot.has_histogram[mask] & (totals >= 2)
+        percentiles = np.where(enough, below / np.maximum(totals, 1) * 100, 50).astype(int)
+
+        return {
+            "specialization_ids": snapshot.specialization_ids[mask],
+            "names": [name for name, keep in zip(snapshot.names, mask) if keep],
+            "total_users": totals,
+            "differences": differences,
+            "readiness_percentiles": percentiles
+        }
+
+
+# Shared instance for the application process
+benchmark_matrix = BenchmarkMatrix()
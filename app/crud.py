@@ -5,15 +5,34 @@ CRUD operations for database
 from sqlalchemy.orm import Session
 from . import models_hierarchical as models
 from . import schemas
+from . import journal_search
+from .fieldsets import project, wants
+import math
 from typing import List, Optional, Dict, Any
 from datetime import datetime, timezone
 
+# OUTBOX
+def enqueue_outbox_event(db: Session, event_type: str, user_id: Optional[int], payload: Dict[str, Any]):
+    """
+    Record a domain event for the background consumers (app/outbox.py).
+    Does not commit - the event becomes visible together with the change.
+    """
+    import json
+    event = models.OutboxEvent(
+        event_type=event_type,
+        user_id=user_id,
+        payload=json.dumps(payload),
+        available_at=datetime.now(timezone.utc)
+    )
+    db.add(event)
+    return event
+
 # USER OPERATIONS
-def create_user(db: Session, email: str, password: str, name: str):
-    """Create a new user"""
+def create_user(db: Session, email: str, password_hash: str, name: str):
+    """Create a new user; the password is hashed by the caller (app/passwords.py)"""
     db_user = models.User(
         email=email,
-        password_hash=password,  # In production, this should be hashed
+        password_hash=password_hash,
         name=name
     )
     db.add(db_user)
@@ -21,6 +40,13 @@ def create_user(db: Session, email: str, password: str, name: str):
     db.refresh(db_user)
     return db_user
 
+def update_user_password_hash(db: Session, user_id: int, password_hash: str):
+    """Replace a user's stored password hash"""
+    db.query(models.User).filter(models.User.id == user_id).update(
+        {models.User.password_hash: password_hash}, synchronize_session=False
+    )
+    db.commit()
+
 def get_user_by_email(db: Session, email: str):
     """Get user by email"""
     return db.query(models.User).filter(models.User.email == email).first()
@@ -33,11 +59,49 @@ def update_user_specialization(db: Session, user_id: int, specialization_id: int
     """Update user's specialization"""
     user = db.query(models.User).filter(models.User.id == user_id).first()
     if user:
+        old_specialization_id = user.preferred_specialization_id
         user.preferred_specialization_id = specialization_id
+        sync_user_benchmark(db, user, old_specialization_id, get_user_benchmark_scores(user))
+        if specialization_id != old_specialization_id:
+            reset_quiz_recommendations(db, user)
         db.commit()
         db.refresh(user)
     return user
 
+ADMIN_USER_FIELDS = dict.fromkeys((
+    "id", "name", "email", "is_active", "readiness_score", "technical_score", "soft_skills_score",
+    "preferred_specialization_id", "specialization_name", "created_at"
+))
+
+def list_users_for_admin(db: Session, fields: Optional[dict] = None) -> List[Dict[str, Any]]:
+    """Admin user list selecting only the requested columns; the specialization is joined only when asked for"""
+    columns = {
+        "id": models.User.id,
+        "name": models.User.name,
+        "email": models.User.email,
+        "is_active": models.User.is_active,
+        "readiness_score": models.User.readiness_score,
+        "technical_score": models.User.technical_score,
+        "soft_skills_score": models.User.soft_skills_score,
+        "preferred_specialization_id": models.User.preferred_specialization_id,
+        "specialization_name": models.Specialization.name,
+        "created_at": models.User.created_at,
+    }
+    query = db.query(
+        *[column.label(name) for name, column in columns.items() if wants(fields, name)]
+    ).select_from(models.User)
+    if wants(fields, "specialization_name"):
+        query = query.outerjoin(
+            models.Specialization, models.Specialization.id == models.User.preferred_specialization_id
+        )
+    result = []
+    for row in query.order_by(models.User.id):
+        item = row._asdict()
+        if "created_at" in item:
+            item["created_at"] = item["created_at"].isoformat() if item["created_at"] else None
+        result.append(item)
+    return result
+
 # SECTOR AND SPECIALIZATION OPERATIONS
 def get_all_sectors(db: Session):
     """Get all sectors"""
@@ -81,6 +145,132 @@ def get_quiz_by_id(db: Session, quiz_id: int):
     """Get quiz by ID with questions and answer options"""
     return db.query(models.Quiz).filter(models.Quiz.id == quiz_id).first()
 
+# Fields offered by ?fields= on the quiz list and detail (see app/fieldsets.py)
+QUIZ_LIST_FIELDS = dict.fromkeys((
+    "id", "title", "description", "specialization_id", "specialization_name",
+    "duration", "question_count", "difficulty"
+))
+QUIZ_DETAIL_FIELDS = {
+    **dict.fromkeys(("id", "title", "description", "duration", "question_count", "difficulty", "specialization_id")),
+    "questions": {
+        "id": None,
+        "question": None,
+        "options": dict.fromkeys(("text", "is_correct")),
+        "correct_index": None,
+        "explanation": None,
+    },
+}
+
+def list_quizzes(db: Session, specialization_id: Optional[int] = None, fields: Optional[dict] = None) -> List[Dict[str, Any]]:
+    """Quiz list rows selecting only the requested columns (no ORM objects, question count in SQL)"""
+    from sqlalchemy import func
+    question_count = db.query(func.count(models.Question.id)).filter(
+        models.Question.quiz_id == models.Quiz.id
+    ).correlate(models.Quiz).scalar_subquery()
+    columns = {
+        "id": models.Quiz.id,
+        "title": models.Quiz.title,
+        "description": models.Quiz.description,
+        "specialization_id": models.Quiz.specialization_id,
+        "specialization_name": models.Specialization.name,
+        "duration": models.Quiz.time_limit_minutes,
+        "question_count": question_count,
+        "difficulty": models.Quiz.difficulty_level,
+    }
+    query = db.query(
+        *[column.label(name) for name, column in columns.items() if wants(fields, name)]
+    ).select_from(models.Quiz).join(
+        models.Specialization, models.Specialization.id == models.Quiz.specialization_id
+    )
+    if specialization_id:
+        query = query.filter(models.Quiz.specialization_id == specialization_id)
+    return [row._asdict() for row in query.order_by(models.Quiz.id)]
+
+def get_quiz_detail(db: Session, quiz_id: int, fields: Optional[dict] = None) -> Optional[Dict[str, Any]]:
+    """
+    A quiz with its questions and options, loading only the columns behind
+    the requested fields (load_only), e.g. leaving out explanations and
+    is_correct flags for a quiz-taking view
+    """
+    from sqlalchemy import func
+    from sqlalchemy.orm import load_only, selectinload
+    quiz_columns = {
+        "id": models.Quiz.id,
+        "title": models.Quiz.title,
+        "description": models.Quiz.description,
+        "duration": models.Quiz.time_limit_minutes,
+        "difficulty": models.Quiz.difficulty_level,
+        "specialization_id": models.Quiz.specialization_id,
+    }
+    quiz = db.query(models.Quiz).options(
+        load_only(*[column for name, column in quiz_columns.items() if wants(fields, name)], models.Quiz.id)
+    ).filter(models.Quiz.id == quiz_id).first()
+    if not quiz:
+        return None
+
+    data = {}
+    for name in QUIZ_DETAIL_FIELDS:
+        if name in quiz_columns and wants(fields, name):
+            data[name] = getattr(quiz, quiz_columns[name].key)
+
+    questions = None
+    if wants(fields, "questions"):
+        selected = fields.get("questions") if fields else None
+        selected_options = selected.get("options", {}) if selected else None
+        need_options = wants(selected, "options") or wants(selected, "correct_index")
+        need_correct = wants(selected_options, "is_correct") or wants(selected, "correct_index")
+        question_columns = [models.Question.id]
+        if wants(selected, "question"):
+            question_columns.append(models.Question.question_text)
+        if wants(selected, "explanation"):
+            question_columns.append(models.Question.explanation)
+        query = db.query(models.Question).options(load_only(*question_columns)).filter(
+            models.Question.quiz_id == quiz_id
+        ).order_by(models.Question.order_index)
+        if need_options:
+            option_columns = [models.QuestionOption.question_id]
+            if wants(selected_options, "text"):
+                option_columns.append(models.QuestionOption.option_text)
+            if need_correct:
+                option_columns.append(models.QuestionOption.is_correct)
+            query = query.options(selectinload(models.Question.options).load_only(*option_columns))
+        questions = query.all()
+
+    if wants(fields, "question_count"):
+        if questions is not None:
+            data["question_count"] = len(questions)
+        else:
+            data["question_count"] = db.query(func.count(models.Question.id)).filter(
+                models.Question.quiz_id == quiz_id
+            ).scalar()
+
+    if questions is not None:
+        items = []
+        for question in questions:
+            item = {"id": question.id}
+            if wants(selected, "question"):
+                item["question"] = question.question_text
+            if need_options:
+                options = []
+                correct_index = None
+                for idx, option in enumerate(question.options):
+                    entry = {}
+                    if wants(selected_options, "text"):
+                        entry["text"] = option.option_text
+                    if need_correct:
+                        entry["is_correct"] = option.is_correct
+                        if option.is_correct:
+                            correct_index = idx
+                    options.append(entry)
+                item["options"] = options
+                item["correct_index"] = correct_index
+            if wants(selected, "explanation"):
+                item["explanation"] = question.explanation
+            items.append(item)
+        data["questions"] = items
+
+    return project(data, fields)
+
 def get_quizzes_by_specialization(db: Session, specialization_id: int):
     """Get all quizzes for a specialization"""
     return db.query(models.Quiz).filter(
@@ -94,6 +284,9 @@ def get_quiz_questions(db: Session, quiz_id: int):
     ).order_by(models.Question.order_index).all()
 
 # QUIZ ATTEMPT OPERATIONS
+class AttemptAlreadySubmittedError(Exception):
+    """Raised when an attempt that has already been graded is submitted again"""
+
 def create_quiz_attempt(db: Session, user_id: int, quiz_id: int):
     """Create a new quiz attempt"""
     db_attempt = models.QuizAttempt(
@@ -124,65 +317,334 @@ def get_user_quiz_history(db: Session, user_id: int):
     ).order_by(models.QuizAttempt.completed_at.desc()).all()
 
 def get_user_specialization_scores(db: Session, user_id: int):
-    """Get user's average scores by specialization"""
-    # This would require a more complex query to join attempts with quizzes and specializations
-    # For now, return basic user scores
+    """Get user's overall scores plus per-specialization scores from the skill matrix"""
     user = get_user_by_id(db, user_id)
     if user:
+        rows = db.query(
+            models.UserSpecializationScore, models.Specialization.name
+        ).join(
+            models.Specialization,
+            models.Specialization.id == models.UserSpecializationScore.specialization_id
+        ).filter(
+            models.UserSpecializationScore.user_id == user_id
+        ).all()
+        
+        specializations = []
+        for score, specialization_name in rows:
+            specializations.append({
+                "specialization_id": score.specialization_id,
+                "specialization_name": specialization_name,
+                "technical_score": score.technical_score,
+                "average_percentage": round(score.total_percentage / score.attempt_count, 2) if score.attempt_count else 0.0,
+                "best_percentage": round(score.best_percentage, 2),
+                "attempt_count": score.attempt_count,
+                "passed_count": score.passed_count,
+                "last_attempt_at": score.last_attempt_at.isoformat() if score.last_attempt_at else None
+            })
+        
         return {
             "readiness_score": user.readiness_score,
             "technical_score": user.technical_score,
             "soft_skills_score": user.soft_skills_score,
-            "leadership_score": user.leadership_score
+            "leadership_score": user.leadership_score,
+            "specializations": specializations
         }
     return None
 
+def apply_topic_mastery(db: Session, user_id: int, specialization_id: int, question_results: list,
+                        completed_at: datetime):
+    """
+    Add one attempt's per-topic correct/total counts to the user's mastery rows.
+    All topics are written in one multi-row INSERT ... ON CONFLICT DO UPDATE that
+    adds to the stored counts, so concurrent submissions neither collide nor lose
+    counts; untagged questions are skipped.
+    Does not commit - the caller commits together with the attempt.
+    """
+    counts = {}
+    for result in question_results:
+        topic = result.get("topic")
+        if not topic:
+            continue
+        correct, total = counts.get(topic, (0, 0))
+        counts[topic] = (correct + (1 if result["is_correct"] else 0), total + 1)
+    
+    if not counts:
+        return
+    
+    statement = _upsert_statement(db, models.UserTopicMastery).values([{
+        "user_id": user_id,
+        "specialization_id": specialization_id,
+        "topic": topic,
+        "correct_count": correct,
+        "total_count": total,
+        "last_seen_at": completed_at
+    } for topic, (correct, total) in counts.items()])
+    db.execute(statement.on_conflict_do_update(
+        index_elements=["user_id", "specialization_id", "topic"],
+        set_={
+            "correct_count": models.UserTopicMastery.correct_count + statement.excluded.correct_count,
+            "total_count": models.UserTopicMastery.total_count + statement.excluded.total_count,
+            "last_seen_at": statement.excluded.last_seen_at
+        }
+    ))
+
+def get_user_topic_mastery(db: Session, user_id: int, specialization_id: Optional[int] = None, limit: Optional[int] = None):
+    """Get the user's per-topic accuracy, weakest topics first"""
+    accuracy = models.UserTopicMastery.correct_count * 1.0 / models.UserTopicMastery.total_count
+    query = db.query(models.UserTopicMastery).filter(
+        models.UserTopicMastery.user_id == user_id,
+        models.UserTopicMastery.total_count > 0
+    )
+    if specialization_id:
+        query = query.filter(models.UserTopicMastery.specialization_id == specialization_id)
+    query = query.order_by(accuracy, models.UserTopicMastery.total_count.desc())
+    if limit:
+        query = query.limit(limit)
+    
+    return [{
+        "specialization_id": row.specialization_id,
+        "topic": row.topic,
+        "correct": row.correct_count,
+        "total": row.total_count,
+        "accuracy": round(row.correct_count / row.total_count * 100, 1),
+        "last_seen_at": row.last_seen_at.isoformat() if row.last_seen_at else None
+    } for row in query.all()]
+
+def get_specialization_skill_scores(db: Session, specialization_id: int):
+    """Get every user's row in the skill matrix for one specialization"""
+    return db.query(models.UserSpecializationScore).filter(
+        models.UserSpecializationScore.specialization_id == specialization_id
+    ).all()
+
+def apply_specialization_score(db: Session, user_id: int, specialization_id: int, percentage: float,
+                               is_passed: bool, completed_at: datetime):
+    """
+    Fold one graded attempt into the user's row of the skill matrix.
+    The row is created or updated by a single INSERT ... ON CONFLICT DO UPDATE
+    that adds to the stored counters, so concurrent submissions stay exact.
+    Does not commit - the caller commits together with the attempt.
+    """
+    from sqlalchemy import case, func
+
+    score = models.UserSpecializationScore
+    statement = _upsert_statement(db, score).values(
+        user_id=user_id,
+        specialization_id=specialization_id,
+        # Same impact rule as the global technical score, scoped to this specialization
+        technical_score=min(100, int(percentage / 20)),
+        attempt_count=1,
+        passed_count=1 if is_passed else 0,
+        total_percentage=percentage,
+        best_percentage=percentage,
+        last_attempt_at=completed_at
+    )
+    excluded = statement.excluded
+    technical = score.technical_score + excluded.technical_score
+    db.execute(statement.on_conflict_do_update(
+        index_elements=["user_id", "specialization_id"],
+        set_={
+            "technical_score": case((technical > 100, 100), else_=technical),
+            "attempt_count": score.attempt_count + excluded.attempt_count,
+            "passed_count": score.passed_count + excluded.passed_count,
+            "total_percentage": score.total_percentage + excluded.total_percentage,
+            "best_percentage": case(
+                (excluded.best_percentage > score.best_percentage, excluded.best_percentage),
+                else_=score.best_percentage
+            ),
+            "last_attempt_at": excluded.last_attempt_at,
+            "updated_at": func.now()
+        }
+    ))
+
+def get_user_specialization_progress(db: Session, user_id: int, specialization_id: int) -> List[Dict[str, Any]]:
+    """
+    Get the user's progression across a specialization's quizzes.
+    Best percentage, pass state and attempt count come from one grouped
+    query over quiz_attempts, so the cost does not grow with history length.
+    A level is unlocked once any quiz of the previous level has been passed.
+    """
+    from sqlalchemy import func, case
+
+    attempt_stats = db.query(
+        models.QuizAttempt.quiz_id.label("quiz_id"),
+        func.max(models.QuizAttempt.percentage).label("best_percentage"),
+        func.max(case((models.QuizAttempt.is_passed == True, 1), else_=0)).label("passed"),
+        func.count(models.QuizAttempt.id).label("attempt_count"),
+        func.max(models.QuizAttempt.completed_at).label("last_attempt_at")
+    ).filter(
+        models.QuizAttempt.user_id == user_id
+    ).group_by(models.QuizAttempt.quiz_id).subquery()
+
+    rows = db.query(
+        models.Quiz.id,
+        models.Quiz.title,
+        models.Quiz.difficulty_level,
+        models.Quiz.passing_score,
+        attempt_stats.c.best_percentage,
+        attempt_stats.c.passed,
+        attempt_stats.c.attempt_count,
+        attempt_stats.c.last_attempt_at
+    ).outerjoin(
+        attempt_stats, attempt_stats.c.quiz_id == models.Quiz.id
+    ).filter(
+        models.Quiz.specialization_id == specialization_id,
+        models.Quiz.is_active == True
+    ).order_by(models.Quiz.difficulty_level, models.Quiz.id).all()
+
+    passed_levels = {row.difficulty_level for row in rows if row.passed}
+    levels = sorted({row.difficulty_level for row in rows})
+
+    progress = []
+    for row in rows:
+        level_index = levels.index(row.difficulty_level)
+        unlocked = level_index == 0 or levels[level_index - 1] in passed_levels
+        attempt_count = row.attempt_count or 0
+
+        if row.passed:
+            status = "passed"
+        elif attempt_count > 0:
+            status = "attempted"
+        elif unlocked:
+            status = "unlocked"
+        else:
+            status = "locked"
+
+        progress.append({
+            "quiz_id": row.id,
+            "title": row.title,
+            "difficulty": row.difficulty_level,
+            "passing_score": row.passing_score,
+            "best_percentage": round(row.best_percentage, 2) if row.best_percentage is not None else None,
+            "passed": bool(row.passed),
+            "attempt_count": attempt_count,
+            "last_attempt_at": row.last_attempt_at.isoformat() if row.last_attempt_at else None,
+            "status": status
+        })
+    return progress
+
 # READINESS AND DASHBOARD OPERATIONS
-def recompute_user_readiness(db: Session, user_id: int) -> Optional[Dict[str, Any]]:
-    """Recompute and persist user's readiness aggregates from attempts.
-    Strategy: simple average of attempt percentages; map to categories.
+# Category scores are derived from overall readiness with these factors
+TECHNICAL_READINESS_FACTOR = 0.9
+SOFT_SKILLS_READINESS_FACTOR = 0.85
+
+READINESS_TOLERANCE = 0.005  # Stored scores closer than this to the recomputed ones are unchanged
+
+def _readiness_from_average(avg_percentage: float) -> Dict[str, float]:
     """
-    user = get_user_by_id(db, user_id)
-    if not user:
-        return None
+    Overall, technical and soft readiness for an average attempt percentage.
+    Rounded half up to 2 places in decimal arithmetic (like SQL NUMERIC), so
+    16.65 * 0.9 gives 14.99 rather than binary round()'s 14.98; every path
+    that writes readiness goes through here.
+    """
+    from decimal import Decimal, ROUND_HALF_UP
+
+    cent = Decimal("0.01")
+    overall = Decimal(repr(avg_percentage)).quantize(cent, rounding=ROUND_HALF_UP)
+    technical = (overall * Decimal(repr(TECHNICAL_READINESS_FACTOR))).quantize(cent, rounding=ROUND_HALF_UP)
+    soft = (overall * Decimal(repr(SOFT_SKILLS_READINESS_FACTOR))).quantize(cent, rounding=ROUND_HALF_UP)
+    return {
+        "overall": float(overall),
+        "technical": float(technical),
+        "soft": float(soft),
+    }
 
-    attempts = get_user_quiz_history(db, user_id)
+def _apply_user_readiness(db: Session, user) -> Dict[str, Any]:
+    """Set the user's readiness aggregates from their attempts. Does not commit."""
+    attempts = get_user_quiz_history(db, user.id)
     if not attempts:
         user.readiness_score = 0.0
         user.technical_score = 0.0
         user.soft_skills_score = 0.0
-        db.commit()
         return {
             "overall": 0.0,
             "technical": 0.0,
             "soft": 0.0,
         }
 
-    avg_percentage = sum(a.percentage for a in attempts) / len(attempts)
-    overall = round(avg_percentage, 2)
-    technical = round(overall * 0.9, 2)
-    soft = round(overall * 0.85, 2)
+    readiness = _readiness_from_average(sum(a.percentage for a in attempts) / len(attempts))
+    user.readiness_score = readiness["overall"]
+    user.technical_score = readiness["technical"]
+    user.soft_skills_score = readiness["soft"]
+    return readiness
 
-    user.readiness_score = overall
-    user.technical_score = technical
-    user.soft_skills_score = soft
+def recompute_user_readiness(db: Session, user_id: int) -> Optional[Dict[str, Any]]:
+    """Recompute and persist user's readiness aggregates from attempts.
+    Strategy: simple average of attempt percentages; map to categories.
+    """
+    user = get_user_by_id(db, user_id)
+    if not user:
+        return None
+
+    old_scores = get_user_benchmark_scores(user)
+    readiness = _apply_user_readiness(db, user)
+    sync_user_benchmark(db, user, user.preferred_specialization_id, old_scores)
     db.commit()
+    return readiness
 
-    return {
-        "overall": overall,
-        "technical": technical,
-        "soft": soft,
-    }
+def rebuild_all_user_readiness(db: Session, dry_run: bool = False) -> List[Dict[str, Any]]:
+    """
+    Recompute readiness, technical and soft-skill scores for every user at once.
+    Averages come from one grouped aggregate over quiz_attempts; the scores are
+    then derived with _readiness_from_average, the same formula and rounding as
+    recompute_user_readiness. Users whose stored scores differ by more than
+    READINESS_TOLERANCE are written with one bulk UPDATE by primary key.
+    Returns the per-user changes; with dry_run nothing is written.
+    """
+    from sqlalchemy import func, update
+
+    averages = db.query(
+        models.QuizAttempt.user_id.label("user_id"),
+        func.avg(models.QuizAttempt.percentage).label("avg_percentage")
+    ).group_by(models.QuizAttempt.user_id).subquery()
+
+    rows = db.query(
+        models.User.id,
+        models.User.readiness_score,
+        models.User.technical_score,
+        models.User.soft_skills_score,
+        averages.c.avg_percentage
+    ).outerjoin(
+        averages, averages.c.user_id == models.User.id
+    ).order_by(models.User.id).all()
+
+    changes = []
+    for row in rows:
+        old = {
+            "overall": row.readiness_score,
+            "technical": row.technical_score,
+            "soft": row.soft_skills_score,
+        }
+        new = _readiness_from_average(float(row.avg_percentage or 0.0))
+        if any(old[key] is None or abs(old[key] - new[key]) > READINESS_TOLERANCE for key in new):
+            changes.append({"user_id": row.id, "old": old, "new": new})
+
+    if not dry_run and changes:
+        db.execute(update(models.User), [{
+            "id": change["user_id"],
+            "readiness_score": change["new"]["overall"],
+            "technical_score": change["new"]["technical"],
+            "soft_skills_score": change["new"]["soft"]
+        } for change in changes])
+        db.commit()
+        # Bulk updates bypass the incremental statistics, so rebuild them
+        leaderboard_index.invalidate()
+        rebuild_all_peer_benchmarks(db)
+
+    return changes
 
 def get_dashboard_summary(db: Session, user_id: int) -> Optional[Dict[str, Any]]:
     user = get_user_by_id(db, user_id)
     if not user:
         return None
-    # Ensure readiness is up to date
-    readiness = recompute_user_readiness(db, user_id)
-    attempts = get_user_quiz_history(db, user_id)
+    return _dashboard_summary(db, user)
+
+def _dashboard_summary(db: Session, user) -> Dict[str, Any]:
+    # Readiness is persisted with every submission, so the dashboard only reads it
+    attempts = db.query(models.QuizAttempt).filter(
+        models.QuizAttempt.user_id == user.id
+    ).order_by(models.QuizAttempt.completed_at.desc()).limit(5).all()
     recent = []
-    for a in attempts[:5]:
+    for a in attempts:
         recent.append({
             "id": a.id,
             "quiz_id": a.quiz_id,
@@ -191,7 +653,7 @@ def get_dashboard_summary(db: Session, user_id: int) -> Optional[Dict[str, Any]]
             "completed_at": a.completed_at.isoformat() if a.completed_at else None,
         })
     return {
-        "readiness": readiness or {
+        "readiness": {
             "overall": user.readiness_score or 0.0,
             "technical": user.technical_score or 0.0,
             "soft": user.soft_skills_score or 0.0,
@@ -209,6 +671,10 @@ def get_attempt_with_quiz(db: Session, attempt_id: int) -> Optional[Dict[str, An
         "quiz": quiz,
     }
 
+def get_attempt_owner_id(db: Session, attempt_id: int) -> Optional[int]:
+    """The user an attempt belongs to, None if there is no such attempt"""
+    return db.query(models.QuizAttempt.user_id).filter(models.QuizAttempt.id == attempt_id).scalar()
+
 # GOAL OPERATIONS
 def create_goal(db: Session, user_id: int, title: str, description: str, category: str, target_value: float, target_date: Optional[datetime] = None):
     """Create a new goal for a user"""
@@ -260,69 +726,164 @@ def delete_goal(db: Session, goal_id: int, user_id: int):
     db.commit()
     return True
 
+def sync_user_goals(db: Session, user_id: int) -> List[Dict[str, Any]]:
+    """
+    Update the user's active goals from their current readiness scores and commit.
+    Errors propagate, so the outbox consumer can roll back and retry the event.
+    Returns the goals whose progress changed.
+    """
+    # Get current readiness scores
+    user = db.query(models.User).filter(models.User.id == user_id).first()
+    if not user:
+        return []
+    
+    # Get all active (not completed) goals for this user
+    active_goals = db.query(models.Goal).filter(
+        models.Goal.user_id == user_id,
+        models.Goal.is_completed == False
+    ).all()
+    
+    updated_goals = []
+    
+    for goal in active_goals:
+        # Map goal category to user score field
+        score_mapping = {
+            'readiness': user.readiness_score,
+            'technical': user.technical_score,
+            'soft_skills': user.soft_skills_score,
+            'leadership': user.leadership_score
+        }
+        
+        # Get the corresponding score for this goal category
+        current_score = score_mapping.get(goal.category)
+        
+        if current_score is not None:
+            # Update the goal's current value to match the user's actual score
+            old_value = goal.current_value
+            goal.current_value = current_score
+            
+            # Check if goal is now completed
+            if goal.current_value >= goal.target_value and not goal.is_completed:
+                goal.is_completed = True
+                updated_goals.append({
+                    'id': goal.id,
+                    'title': goal.title,
+                    'category': goal.category,
+                    'completed': True,
+                    'progress': goal.current_value
+                })
+            elif old_value != current_score:
+                updated_goals.append({
+                    'id': goal.id,
+                    'title': goal.title,
+                    'category': goal.category,
+                    'completed': False,
+                    'progress': goal.current_value
+                })
+    
+    db.commit()
+    return updated_goals
+
 def auto_update_goals_on_quiz_completion(db: Session, user_id: int):
     """
     Automatically update user goals based on their current readiness scores
     Called after quiz completion to sync goals with actual progress
     """
     try:
-        # Get current readiness scores
-        user = db.query(models.User).filter(models.User.id == user_id).first()
-        if not user:
-            return
-        
-        # Get all active (not completed) goals for this user
-        active_goals = db.query(models.Goal).filter(
-            models.Goal.user_id == user_id,
-            models.Goal.is_completed == False
-        ).all()
-        
-        updated_goals = []
-        
-        for goal in active_goals:
-            # Map goal category to user score field
-            score_mapping = {
-                'readiness': user.readiness_score,
-                'technical': user.technical_score,
-                'soft_skills': user.soft_skills_score,
-                'leadership': user.leadership_score
-            }
-            
-            # Get the corresponding score for this goal category
-            current_score = score_mapping.get(goal.category)
-            
-            if current_score is not None:
-                # Update the goal's current value to match the user's actual score
-                old_value = goal.current_value
-                goal.current_value = current_score
-                
-                # Check if goal is now completed
-                if goal.current_value >= goal.target_value and not goal.is_completed:
-                    goal.is_completed = True
-                    updated_goals.append({
-                        'id': goal.id,
-                        'title': goal.title,
-                        'category': goal.category,
-                        'completed': True,
-                        'progress': goal.current_value
-                    })
-                elif old_value != current_score:
-                    updated_goals.append({
-                        'id': goal.id,
-                        'title': goal.title,
-                        'category': goal.category,
-                        'completed': False,
-                        'progress': goal.current_value
-                    })
-        
-        db.commit()
-        return updated_goals
+        return sync_user_goals(db, user_id)
         
     except Exception as e:
         print(f"Error auto-updating goals: {e}")
         db.rollback()
         return []
 
+# ACTIVITY AND STREAK OPERATIONS
+def _upsert_statement(db: Session, model):
+    """INSERT for the session's dialect that supports ON CONFLICT (PostgreSQL or SQLite)"""
+    if db.get_bind().dialect.name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert
+    return insert(model)
+
+def record_user_activity(db: Session, user_id: int, when: datetime, quizzes: int = 0, journals: int = 0):
+    """
+    Upsert the user's activity counters for the day of `when` and advance the streak.
+    The counters are added in one INSERT ... ON CONFLICT DO UPDATE, so concurrent
+    writers for the same user and day neither collide nor lose increments; the
+    streak row is created the same way and locked before it is advanced.
+    Does not commit - the caller commits together with the activity itself.
+    """
+    activity_date = when.date()
+    
+    statement = _upsert_statement(db, models.UserDailyActivity).values(
+        user_id=user_id,
+        activity_date=activity_date,
+        quiz_count=quizzes,
+        journal_count=journals
+    )
+    db.execute(statement.on_conflict_do_update(
+        index_elements=["user_id", "activity_date"],
+        set_={
+            "quiz_count": models.UserDailyActivity.quiz_count + statement.excluded.quiz_count,
+            "journal_count": models.UserDailyActivity.journal_count + statement.excluded.journal_count
+        }
+    ))
+    
+    db.execute(_upsert_statement(db, models.UserStreak).values(
+        user_id=user_id, current_streak=0, longest_streak=0
+    ).on_conflict_do_nothing(index_elements=["user_id"]))
+    streak = db.query(models.UserStreak).filter(
+        models.UserStreak.user_id == user_id
+    ).with_for_update().populate_existing().one()
+    
+    last_active = streak.last_active_date
+    if last_active is None or activity_date > last_active:
+        if last_active is not None and (activity_date - last_active).days == 1:
+            streak.current_streak += 1
+        else:
+            streak.current_streak = 1
+        streak.longest_streak = max(streak.longest_streak, streak.current_streak)
+        streak.last_active_date = activity_date
+    return streak
+
+def get_user_activity_calendar(db: Session, user_id: int, days: int = 366) -> Dict[str, Any]:
+    """Get the user's daily activity for the last `days` days plus streak counters"""
+    from datetime import timedelta
+    
+    today = datetime.now(timezone.utc).date()
+    start_date = today - timedelta(days=days - 1)
+    
+    rows = db.query(models.UserDailyActivity).filter(
+        models.UserDailyActivity.user_id == user_id,
+        models.UserDailyActivity.activity_date >= start_date
+    ).order_by(models.UserDailyActivity.activity_date).all()
+    
+    streak = db.query(models.UserStreak).filter(models.UserStreak.user_id == user_id).first()
+    current_streak = 0
+    longest_streak = 0
+    last_active_date = None
+    if streak:
+        longest_streak = streak.longest_streak
+        last_active_date = streak.last_active_date
+        # A streak is still alive if the user was active today or yesterday
+        if last_active_date and (today - last_active_date).days <= 1:
+            current_streak = streak.current_streak
+    
+    return {
+        "start_date": start_date.isoformat(),
+        "end_date": today.isoformat(),
+        "days": [{
+            "date": row.activity_date.isoformat(),
+            "quizzes": row.quiz_count,
+            "journal_entries": row.journal_count,
+            "total": row.quiz_count + row.journal_count
+        } for row in rows],
+        "current_streak": current_streak,
+        "longest_streak": longest_streak,
+        "last_active_date": last_active_date.isoformat() if last_active_date else None
+    }
+
 # JOURNAL ENTRY OPERATIONS
 def create_journal_entry(db: Session, user_id: int, content: str, prompt: Optional[str] = None):
     """Create a new journal entry"""
@@ -332,6 +893,9 @@ def create_journal_entry(db: Session, user_id: int, content: str, prompt: Option
         prompt=prompt
     )
     db.add(entry)
+    db.flush()
+    journal_search.index_entry(db, entry)
+    record_user_activity(db, user_id, datetime.now(timezone.utc), journals=1)
     db.commit()
     db.refresh(entry)
     return entry
@@ -350,7 +914,9 @@ def update_journal_entry(db: Session, entry_id: int, user_id: int, content: str)
     ).first()
     if not entry:
         return None
+    journal_search.unindex_entry(db, entry.id, entry.prompt, entry.content)
     entry.content = content
+    journal_search.index_entry(db, entry)
     db.commit()
     db.refresh(entry)
     return entry
@@ -363,20 +929,115 @@ def delete_journal_entry(db: Session, entry_id: int, user_id: int):
     ).first()
     if not entry:
         return False
+    journal_search.unindex_entry(db, entry.id, entry.prompt, entry.content)
     db.delete(entry)
     db.commit()
     return True
 
+def search_journal_entries(db: Session, user_id: int, query: str, limit: int = 20) -> List[Dict[str, Any]]:
+    """Ranked full-text matches in the user's journal, with highlighted snippets"""
+    return journal_search.search(db, user_id, query, limit)
+
+# KEYSET PAGINATION
+# Paged lists are ordered newest first on (timestamp, id) and resume after an
+# opaque cursor holding the last row's key, so every page is an index range
+# scan on the matching (user_id, timestamp, id) index instead of an OFFSET
+PAGE_SIZE_DEFAULT = 20
+PAGE_SIZE_MAX = 100
+JOURNAL_EXCERPT_LENGTH = 200
+
+def encode_cursor(timestamp: datetime, row_id: int) -> str:
+    import base64
+    import json
+    raw = json.dumps([timestamp.isoformat(), row_id]).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+def decode_cursor(cursor: str) -> tuple:
+    """(timestamp, id) from encode_cursor; raises ValueError for a malformed cursor"""
+    import base64
+    import json
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        timestamp, row_id = json.loads(raw)
+        return datetime.fromisoformat(timestamp), int(row_id)
+    except (ValueError, TypeError) as e:
+        raise ValueError(f"Invalid cursor: {e}")
+
+def _keyset_page(query, timestamp_column, id_column, cursor: Optional[str], limit: int) -> Dict[str, Any]:
+    """Apply the keyset filter and order to a column query; rows must expose .id and the timestamp by name"""
+    from sqlalchemy import literal, tuple_
+    if cursor:
+        timestamp, row_id = decode_cursor(cursor)
+        if query.session.get_bind().dialect.name == "sqlite" and not timestamp.microsecond:
+            # SQLite stores server_default timestamps without fractional seconds;
+            # compare in that text form so rows sharing the cursor's second are not repeated
+            timestamp = literal(timestamp.strftime("%Y-%m-%d %H:%M:%S"))
+        query = query.filter(tuple_(timestamp_column, id_column) < tuple_(timestamp, row_id))
+    rows = query.order_by(timestamp_column.desc(), id_column.desc()).limit(limit + 1).all()
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        next_cursor = encode_cursor(getattr(last, timestamp_column.key), last.id)
+    return {"items": [row._asdict() for row in rows], "next_cursor": next_cursor}
+
+def get_user_quiz_history_page(db: Session, user_id: int, cursor: Optional[str] = None, limit: int = PAGE_SIZE_DEFAULT) -> Dict[str, Any]:
+    """One page of a user's attempts, newest first, without per-attempt ORM objects"""
+    query = db.query(
+        models.QuizAttempt.id,
+        models.QuizAttempt.quiz_id,
+        models.Quiz.title.label("quiz_title"),
+        models.QuizAttempt.percentage,
+        models.QuizAttempt.is_passed,
+        models.QuizAttempt.completed_at
+    ).join(
+        models.Quiz, models.Quiz.id == models.QuizAttempt.quiz_id
+    ).filter(models.QuizAttempt.user_id == user_id)
+    return _keyset_page(query, models.QuizAttempt.completed_at, models.QuizAttempt.id, cursor, limit)
+
+def get_user_goals_page(db: Session, user_id: int, cursor: Optional[str] = None, limit: int = PAGE_SIZE_DEFAULT) -> Dict[str, Any]:
+    """One page of a user's goals, newest first, leaving out descriptions"""
+    query = db.query(
+        models.Goal.id,
+        models.Goal.title,
+        models.Goal.category,
+        models.Goal.target_value,
+        models.Goal.current_value,
+        models.Goal.is_completed,
+        models.Goal.target_date,
+        models.Goal.created_at
+    ).filter(models.Goal.user_id == user_id)
+    return _keyset_page(query, models.Goal.created_at, models.Goal.id, cursor, limit)
+
+def get_user_journal_page(db: Session, user_id: int, cursor: Optional[str] = None, limit: int = PAGE_SIZE_DEFAULT) -> Dict[str, Any]:
+    """One page of a user's journal entries, newest first, with an excerpt instead of the full content"""
+    from sqlalchemy import func
+    query = db.query(
+        models.JournalEntry.id,
+        models.JournalEntry.prompt,
+        func.substr(models.JournalEntry.content, 1, JOURNAL_EXCERPT_LENGTH).label("excerpt"),
+        (func.length(models.JournalEntry.content) > JOURNAL_EXCERPT_LENGTH).label("truncated"),
+        models.JournalEntry.entry_date
+    ).filter(models.JournalEntry.user_id == user_id)
+    return _keyset_page(query, models.JournalEntry.entry_date, models.JournalEntry.id, cursor, limit)
+
 from datetime import datetime
 
 def submit_quiz_answers(db: Session, attempt_id: int, answers: List[schemas.QuizAnswer]) -> dict:
     """
     Submit quiz answers and calculate detailed score with personalized feedback.
     This is the superior merged function combining detailed feedback with sophisticated scoring.
+    The attempt row is locked and graded once: the score counters below are
+    incremental, so a retried submission raises AttemptAlreadySubmittedError.
     """
-    attempt = db.query(models.QuizAttempt).filter(models.QuizAttempt.id == attempt_id).first()
+    attempt = db.query(models.QuizAttempt).filter(
+        models.QuizAttempt.id == attempt_id
+    ).with_for_update().first()
     if not attempt:
         return None
+    if attempt.submitted_at is not None:
+        db.rollback()
+        raise AttemptAlreadySubmittedError(f"Attempt {attempt_id} has already been submitted")
     
     quiz = get_quiz_by_id(db, attempt.quiz_id)
     if not quiz:
@@ -435,6 +1096,7 @@ def submit_quiz_answers(db: Session, attempt_id: int, answers: List[schemas.Quiz
                 "points": question.points,
                 "earned_points": question.points if is_correct else 0,
                 "explanation": question.explanation if hasattr(question, 'explanation') else None,
+                "topic": question.topic,
                 "options": options_dict
             })
     
@@ -452,12 +1114,14 @@ def submit_quiz_answers(db: Session, attempt_id: int, answers: List[schemas.Quiz
     attempt.max_score = max_score
     attempt.percentage = percentage
     attempt.is_passed = is_passed
-    attempt.is_completed = True
     attempt.completed_at = datetime.now(timezone.utc)
+    attempt.submitted_at = attempt.completed_at
     
     # Update user's readiness scores based on quiz category
     user = get_user_by_id(db, attempt.user_id)
     score_impact = None
+    readiness = {"overall": 0.0, "technical": 0.0, "soft": 0.0}
+    old_scores = get_user_benchmark_scores(user) if user else None
     
     if user and quiz.specialization:
         # Calculate score impact based on performance
@@ -480,7 +1144,35 @@ def submit_quiz_answers(db: Session, attempt_id: int, answers: List[schemas.Quiz
             "new_score": user.technical_score,
             "increase": user.technical_score - old_technical
         }
+        
+        apply_specialization_score(
+            db, user.id, quiz.specialization_id, percentage, is_passed, attempt.completed_at
+        )
+        apply_topic_mastery(
+            db, user.id, quiz.specialization_id, question_results, attempt.completed_at
+        )
+        record_user_activity(db, user.id, attempt.completed_at, quizzes=1)
     
+    if user:
+        # Readiness is recomputed in the same transaction (the identity map
+        # already holds this attempt's new percentage)
+        readiness = _apply_user_readiness(db, user)
+        sync_user_benchmark(db, user, user.preferred_specialization_id, old_scores)
+        # Goals, recommendations and badges are handled by the outbox consumers
+        enqueue_outbox_event(db, "quiz_completed", user.id, {
+            "attempt_id": attempt.id,
+            "quiz_id": quiz.id,
+            "specialization_id": quiz.specialization_id,
+            "percentage": percentage,
+            "passed": is_passed,
+            "old_scores": list(old_scores),
+            "new_scores": list(get_user_benchmark_scores(user))
+        })
+    
+    # The attempt can raise this user's best result for the quiz in the peer vectors
+    after_commit(db, lambda: peer_vector_index.record_result(
+        quiz.specialization_id, attempt.user_id, quiz.id, percentage
+    ))
     db.commit()
     
     # Generate personalized feedback
@@ -496,6 +1188,7 @@ def submit_quiz_answers(db: Session, attempt_id: int, answers: List[schemas.Quiz
         "passing_score": passing_score,
         "question_results": question_results,
         "score_impact": score_impact,
+        "readiness": readiness,
         "feedback": feedback,
         "quiz_title": quiz.title
     }
@@ -520,7 +1213,13 @@ def generate_feedback(score: float, correct: int, total: int, question_results:
     incorrect_questions = [q for q in question_results if not q["is_correct"]]
     
     if len(incorrect_questions) > 0:
-        weakness_topics = f"Focus on reviewing: {', '.join([q['question_text'][:50] + '...' for q in incorrect_questions[:3]])}"
+        # Prefer topic tags; fall back to a question snippet for untagged questions
+        review_items = []
+        for q in incorrect_questions:
+            item = q.get("topic") or q['question_text'][:50] + '...'
+            if item not in review_items:
+                review_items.append(item)
+        weakness_topics = f"Focus on reviewing: {', '.join(review_items[:3])}"
     else:
         weakness_topics = "You answered all questions correctly! Excellent mastery."
     
@@ -555,35 +1254,48 @@ def generate_feedback(score: float, correct: int, total: int, question_results:
 # PEER BENCHMARKING OPERATIONS
 import json
 from typing import List
+from .percentiles import percentile_index
+from .leaderboards import leaderboard_index
+from .peer_vectors import peer_vector_index, QUIZ_RESULTS_WEIGHT
+from .benchmark_matrix import benchmark_matrix
+from .badges import badge_engine
+from .hierarchy_cache import hierarchy_cache
+from .database import after_commit
 
-def calculate_peer_benchmarks(db: Session, specialization_id: int):
+BENCHMARK_CATEGORIES = ("readiness", "technical", "soft_skills", "leadership")
+
+def get_user_benchmark_scores(user) -> tuple:
+    """The (readiness, technical, soft_skills, leadership) scores that feed peer benchmarks"""
+    return (
+        user.readiness_score or 0,
+        user.technical_score or 0,
+        user.soft_skills_score or 0,
+        user.leadership_score or 0
+    )
+
+def _readiness_bucket(score: float) -> int:
+    """Histogram bucket (whole readiness point, 0-100) for a readiness score"""
+    return min(100, max(0, int(score)))
+
+def _histogram_median(histogram: list, total: int) -> float:
     """
-    Calculate and store peer benchmark statistics for a specialization
-    This should be run periodically (e.g., daily via cron job)
+    Median readiness from the histogram, to whole-point resolution.
+    The one definition of median_readiness_score: the incremental and the
+    full rebuild paths both use it, so the stored value does not depend on
+    which ran last.
     """
-    from sqlalchemy import func
-    
-    # Get all users in this specialization
-    users = db.query(models.User).filter(
-        models.User.preferred_specialization_id == specialization_id
-    ).all()
-    
-    if not users or len(users) < 2:
-        # Need at least 2 users for meaningful comparison
-        return None
-    
-    # Calculate averages
-    total_users = len(users)
-    avg_readiness = sum(u.readiness_score or 0 for u in users) / total_users
-    avg_technical = sum(u.technical_score or 0 for u in users) / total_users
-    avg_soft_skills = sum(u.soft_skills_score or 0 for u in users) / total_users
-    avg_leadership = sum(u.leadership_score or 0 for u in users) / total_users
-    
-    # Calculate median
-    readiness_scores = sorted([u.readiness_score or 0 for u in users])
-    median_readiness = readiness_scores[len(readiness_scores) // 2]
-    
-    # Identify common strengths (areas where average is high)
+    if total <= 0:
+        return 0.0
+    target = total // 2
+    cumulative = 0
+    for bucket, count in enumerate(histogram):
+        cumulative += count
+        if cumulative > target:
+            return float(bucket)
+    return 100.0
+
+def _benchmark_insights(avg_technical: float, avg_soft_skills: float, avg_leadership: float):
+    """Identify common strengths (high averages) and gaps (low averages)"""
     strengths = []
     if avg_technical >= 70:
         strengths.append({
@@ -604,7 +1316,6 @@ def calculate_peer_benchmarks(db: Session, specialization_id: int):
             "description": "Effective leadership and decision-making"
         })
     
-    # Identify common gaps (areas where average is low)
     gaps = []
     if avg_technical < 60:
         gaps.append({
@@ -624,48 +1335,1150 @@ def calculate_peer_benchmarks(db: Session, specialization_id: int):
             "percentage": round(avg_leadership, 1),
             "description": "Leadership capabilities require attention"
         })
+    return strengths, gaps
+
+def _refresh_benchmark_derived(benchmark, histogram: list):
+    """Recompute averages, median, strengths and gaps from the sufficient statistics"""
+    total = benchmark.total_users
+    if total > 0:
+        benchmark.avg_readiness_score = benchmark.sum_readiness_score / total
+        benchmark.avg_technical_score = benchmark.sum_technical_score / total
+        benchmark.avg_soft_skills_score = benchmark.sum_soft_skills_score / total
+        benchmark.avg_leadership_score = benchmark.sum_leadership_score / total
+    else:
+        # Reset rather than carry floating point residue from repeated deltas
+        benchmark.sum_readiness_score = 0.0
+        benchmark.sum_technical_score = 0.0
+        benchmark.sum_soft_skills_score = 0.0
+        benchmark.sum_leadership_score = 0.0
+        benchmark.sumsq_readiness_score = 0.0
+        benchmark.sumsq_technical_score = 0.0
+        benchmark.sumsq_soft_skills_score = 0.0
+        benchmark.sumsq_leadership_score = 0.0
+        benchmark.avg_readiness_score = 0.0
+        benchmark.avg_technical_score = 0.0
+        benchmark.avg_soft_skills_score = 0.0
+        benchmark.avg_leadership_score = 0.0
+    benchmark.median_readiness_score = _histogram_median(histogram, total)
+    benchmark.readiness_histogram = json.dumps(histogram)
     
-    # Check if benchmark already exists
-    existing = db.query(models.PeerBenchmark).filter(
-        models.PeerBenchmark.specialization_id == specialization_id
-    ).first()
+    strengths, gaps = _benchmark_insights(
+        benchmark.avg_technical_score, benchmark.avg_soft_skills_score, benchmark.avg_leadership_score
+    )
+    benchmark.common_strengths = json.dumps(strengths)
+    benchmark.common_gaps = json.dumps(gaps)
+    benchmark.last_updated = datetime.now(timezone.utc)
+
+def _rebuild_benchmark_stats(db: Session, benchmark) -> list:
+    """Recompute a benchmark's sufficient statistics from the users table; returns the histogram"""
+    users = db.query(
+        models.User.readiness_score,
+        models.User.technical_score,
+        models.User.soft_skills_score,
+        models.User.leadership_score
+    ).filter(
+        models.User.preferred_specialization_id == benchmark.specialization_id
+    ).all()
     
-    if existing:
-        # Update existing
-        existing.avg_readiness = avg_readiness
-        existing.avg_technical = avg_technical
-        existing.avg_soft_skills = avg_soft_skills
-        existing.avg_leadership = avg_leadership
-        existing.total_users = total_users
-        existing.median_readiness = median_readiness
-        existing.common_strengths = json.dumps(strengths)
-        existing.common_gaps = json.dumps(gaps)
-        existing.last_updated = datetime.now(timezone.utc)
-    else:
-        # Create new
-        benchmark = models.PeerBenchmark(
-            specialization_id=specialization_id,
-            avg_readiness=avg_readiness,
-            avg_technical=avg_technical,
-            avg_soft_skills=avg_soft_skills,
-            avg_leadership=avg_leadership,
-            total_users=total_users,
-            median_readiness=median_readiness,
-            common_strengths=json.dumps(strengths),
-            common_gaps=json.dumps(gaps)
+    histogram = [0] * 101
+    benchmark.total_users = len(users)
+    benchmark.sum_readiness_score = 0.0
+    benchmark.sum_technical_score = 0.0
+    benchmark.sum_soft_skills_score = 0.0
+    benchmark.sum_leadership_score = 0.0
+    benchmark.sumsq_readiness_score = 0.0
+    benchmark.sumsq_technical_score = 0.0
+    benchmark.sumsq_soft_skills_score = 0.0
+    benchmark.sumsq_leadership_score = 0.0
+    for readiness, technical, soft_skills, leadership in users:
+        readiness, technical, soft_skills, leadership = readiness or 0, technical or 0, soft_skills or 0, leadership or 0
+        benchmark.sum_readiness_score += readiness
+        benchmark.sum_technical_score += technical
+        benchmark.sum_soft_skills_score += soft_skills
+        benchmark.sum_leadership_score += leadership
+        benchmark.sumsq_readiness_score += readiness * readiness
+        benchmark.sumsq_technical_score += technical * technical
+        benchmark.sumsq_soft_skills_score += soft_skills * soft_skills
+        benchmark.sumsq_leadership_score += leadership * leadership
+        histogram[_readiness_bucket(readiness)] += 1
+    return histogram
+
+def _load_benchmark_for_delta(db: Session, specialization_id: int):
+    """
+    Get a specialization's benchmark row and histogram, ready for a delta.
+    The row is locked (SELECT ... FOR UPDATE on PostgreSQL) until the caller
+    commits, so concurrent submissions in one specialization apply their
+    deltas one after another instead of overwriting each other.
+    Rows that are missing or predate the sufficient statistics are first
+    rebuilt from the committed users table (sessions do not autoflush, so
+    this reflects the state before the pending change).
+    """
+    query = db.query(models.PeerBenchmark).filter(
+        models.PeerBenchmark.specialization_id == specialization_id
+    ).with_for_update().populate_existing()
+    benchmark = query.first()
+    if not benchmark and db.get_bind().dialect.name == "postgresql":
+        # Create the row without racing another transaction doing the same, then lock it
+        from sqlalchemy.dialects.postgresql import insert as pg_insert
+        db.execute(
+            pg_insert(models.PeerBenchmark)
+            .values(specialization_id=specialization_id)
+            .on_conflict_do_nothing(constraint="unique_peer_benchmark_specialization")
         )
+        benchmark = query.first()
+    if not benchmark:
+        benchmark = models.PeerBenchmark(specialization_id=specialization_id)
+        db.add(benchmark)
+    elif benchmark.readiness_histogram:
+        return benchmark, json.loads(benchmark.readiness_histogram)
+    return benchmark, _rebuild_benchmark_stats(db, benchmark)
+
+def _apply_benchmark_delta(benchmark, histogram: list, scores: tuple, sign: int):
+    """Add (sign=1) or remove (sign=-1) one user's scores from a benchmark's statistics"""
+    readiness, technical, soft_skills, leadership = scores
+    benchmark.total_users = max(0, (benchmark.total_users or 0) + sign)
+    benchmark.sum_readiness_score = (benchmark.sum_readiness_score or 0) + sign * readiness
+    benchmark.sum_technical_score = (benchmark.sum_technical_score or 0) + sign * technical
+    benchmark.sum_soft_skills_score = (benchmark.sum_soft_skills_score or 0) + sign * soft_skills
+    benchmark.sum_leadership_score = (benchmark.sum_leadership_score or 0) + sign * leadership
+    benchmark.sumsq_readiness_score = (benchmark.sumsq_readiness_score or 0) + sign * readiness * readiness
+    benchmark.sumsq_technical_score = (benchmark.sumsq_technical_score or 0) + sign * technical * technical
+    benchmark.sumsq_soft_skills_score = (benchmark.sumsq_soft_skills_score or 0) + sign * soft_skills * soft_skills
+    benchmark.sumsq_leadership_score = (benchmark.sumsq_leadership_score or 0) + sign * leadership * leadership
+    bucket = _readiness_bucket(readiness)
+    histogram[bucket] = max(0, histogram[bucket] + sign)
+
+def _best_quiz_results(db: Session, user_id: int, specialization_id: int) -> Dict[int, float]:
+    """A user's best percentage per quiz of a specialization"""
+    from sqlalchemy import func
+    return dict(db.query(
+        models.QuizAttempt.quiz_id, func.max(models.QuizAttempt.percentage)
+    ).join(
+        models.Quiz, models.Quiz.id == models.QuizAttempt.quiz_id
+    ).filter(
+        models.QuizAttempt.user_id == user_id,
+        models.Quiz.specialization_id == specialization_id
+    ).group_by(models.QuizAttempt.quiz_id).all())
+
+def sync_user_benchmark(db: Session, user, old_specialization_id: Optional[int], old_scores: tuple):
+    """
+    Move a user's contribution in the peer statistics from their previous
+    (specialization, scores) to their current ones. Constant time per call.
+    Does not commit - the caller commits together with the score change.
+    """
+    new_specialization_id = user.preferred_specialization_id
+    new_scores = get_user_benchmark_scores(user)
+    if old_specialization_id == new_specialization_id and old_scores == new_scores:
+        return
+    
+    # In-memory indexes only ever see committed scores
+    after_commit(db, lambda: leaderboard_index.update(user.id, new_specialization_id, new_scores[0]))
+    after_commit(db, lambda: percentile_index.update_user(
+        old_specialization_id, old_scores, new_specialization_id, new_scores
+    ))
+    # A user joining a specialization brings their earlier results for its quizzes
+    quiz_results = None
+    if new_specialization_id and new_specialization_id != old_specialization_id:
+        quiz_results = _best_quiz_results(db, user.id, new_specialization_id)
+    after_commit(db, lambda: peer_vector_index.update_user(
+        user.id, old_specialization_id, new_specialization_id, new_scores, quiz_results
+    ))
+    
+    # Lock the affected rows in id order so two users swapping specializations cannot deadlock
+    loaded = {
+        specialization_id: _load_benchmark_for_delta(db, specialization_id)
+        for specialization_id in sorted({old_specialization_id, new_specialization_id} - {None})
+    }
+    if old_specialization_id:
+        benchmark, histogram = loaded[old_specialization_id]
+        _apply_benchmark_delta(benchmark, histogram, old_scores, -1)
+    if new_specialization_id:
+        benchmark, histogram = loaded[new_specialization_id]
+        _apply_benchmark_delta(benchmark, histogram, new_scores, 1)
+    for benchmark, histogram in loaded.values():
+        _refresh_benchmark_derived(benchmark, histogram)
+
+def calculate_peer_benchmarks(db: Session, specialization_id: int):
+    """
+    Rebuild the peer benchmark statistics for a specialization from scratch.
+    Regular updates are applied incrementally by sync_user_benchmark; this
+    full pass initialises the row and reconciles any drift.
+    """
+    benchmark = db.query(models.PeerBenchmark).filter(
+        models.PeerBenchmark.specialization_id == specialization_id
+    ).first()
+    if not benchmark:
+        benchmark = models.PeerBenchmark(specialization_id=specialization_id)
         db.add(benchmark)
     
+    histogram = _rebuild_benchmark_stats(db, benchmark)
+    _refresh_benchmark_derived(benchmark, histogram)
     db.commit()
+    percentile_index.mark_stale(specialization_id)
+    benchmark_matrix.invalidate()
     return True
 
 
+def _summarize_specialization_scores(item):
+    """
+    NumPy summary for one specialization: (specialization_id, histogram).
+    Module-level so it can run in a process pool.
+    """
+    import numpy as np
+    specialization_id, readiness_scores = item
+    scores = np.asarray(readiness_scores, dtype=float)
+    buckets = np.clip(np.floor(scores), 0, 100).astype(int)
+    return specialization_id, np.bincount(buckets, minlength=101).tolist()
+
+def rebuild_all_peer_benchmarks(db: Session, workers: Optional[int] = None) -> int:
+    """
+    Rebuild the peer benchmark row of every specialization in one pass.
+    Counts and sums come from one GROUP BY preferred_specialization_id
+    aggregate. Histograms are grouped in SQL on PostgreSQL and with NumPy
+    otherwise; medians come from the histograms (_histogram_median).
+    Pass workers > 1 to compute the NumPy summaries in a process pool.
+    The existing rows are locked FOR UPDATE in id order (the order
+    sync_user_benchmark uses) before aggregating, so no submission can
+    commit a delta that the bulk write would then overwrite.
+    Rows are upserted with bulk statements, then the branch and sector
+    rollups are refreshed. Returns the number of specialization rows written.
+    """
+    from sqlalchemy import func, insert, update
+    from collections import defaultdict
+
+    is_postgres = db.get_bind().dialect.name == "postgresql"
+    readiness = func.coalesce(models.User.readiness_score, 0)
+    technical = func.coalesce(models.User.technical_score, 0)
+    soft_skills = func.coalesce(models.User.soft_skills_score, 0)
+    leadership = func.coalesce(models.User.leadership_score, 0)
+    columns = [
+        models.User.preferred_specialization_id.label("specialization_id"),
+        func.count(models.User.id).label("total_users"),
+        func.sum(readiness).label("sum_readiness"),
+        func.sum(technical).label("sum_technical"),
+        func.sum(soft_skills).label("sum_soft_skills"),
+        func.sum(leadership).label("sum_leadership"),
+        func.sum(readiness * readiness).label("sumsq_readiness"),
+        func.sum(technical * technical).label("sumsq_technical"),
+        func.sum(soft_skills * soft_skills).label("sumsq_soft_skills"),
+        func.sum(leadership * leadership).label("sumsq_leadership")
+    ]
+    existing_ids = {
+        specialization_id: benchmark_id for benchmark_id, specialization_id in db.query(
+            models.PeerBenchmark.id, models.PeerBenchmark.specialization_id
+        ).order_by(models.PeerBenchmark.id).with_for_update()
+    }
+    aggregates = db.query(*columns).filter(
+        models.User.preferred_specialization_id.isnot(None)
+    ).group_by(models.User.preferred_specialization_id).all()
+
+    histograms = {}
+    if is_postgres:
+        bucket = func.least(100, func.greatest(0, func.floor(readiness)))
+        for specialization_id, bucket_value, count in db.query(
+            models.User.preferred_specialization_id, bucket, func.count(models.User.id)
+        ).filter(
+            models.User.preferred_specialization_id.isnot(None)
+        ).group_by(models.User.preferred_specialization_id, bucket):
+            histogram = histograms.setdefault(specialization_id, [0] * 101)
+            histogram[int(bucket_value)] = count
+    else:
+        scores_by_specialization = defaultdict(list)
+        for specialization_id, score in db.query(
+            models.User.preferred_specialization_id, readiness
+        ).filter(models.User.preferred_specialization_id.isnot(None)):
+            scores_by_specialization[specialization_id].append(score)
+        
+        items = list(scores_by_specialization.items())
+        if workers and workers > 1 and len(items) > 1:
+            from concurrent.futures import ProcessPoolExecutor
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                summaries = list(pool.map(_summarize_specialization_scores, items, chunksize=max(1, len(items) // workers)))
+        else:
+            summaries = [_summarize_specialization_scores(item) for item in items]
+        histograms = dict(summaries)
+
+    now = datetime.now(timezone.utc)
+    inserts, updates = [], []
+    seen = set()
+    for row in aggregates:
+        total = row.total_users
+        histogram = histograms.get(row.specialization_id, [0] * 101)
+        avg_technical = row.sum_technical / total
+        avg_soft_skills = row.sum_soft_skills / total
+        avg_leadership = row.sum_leadership / total
+        strengths, gaps = _benchmark_insights(avg_technical, avg_soft_skills, avg_leadership)
+        values = {
+            "specialization_id": row.specialization_id,
+            "total_users": total,
+            "sum_readiness_score": float(row.sum_readiness),
+            "sum_technical_score": float(row.sum_technical),
+            "sum_soft_skills_score": float(row.sum_soft_skills),
+            "sum_leadership_score": float(row.sum_leadership),
+            "sumsq_readiness_score": float(row.sumsq_readiness),
+            "sumsq_technical_score": float(row.sumsq_technical),
+            "sumsq_soft_skills_score": float(row.sumsq_soft_skills),
+            "sumsq_leadership_score": float(row.sumsq_leadership),
+            "avg_readiness_score": row.sum_readiness / total,
+            "avg_technical_score": avg_technical,
+            "avg_soft_skills_score": avg_soft_skills,
+            "avg_leadership_score": avg_leadership,
+            "median_readiness_score": _histogram_median(histogram, total),
+            "readiness_histogram": json.dumps(histogram),
+            "common_strengths": json.dumps(strengths),
+            "common_gaps": json.dumps(gaps),
+            "last_updated": now
+        }
+        seen.add(row.specialization_id)
+        if row.specialization_id in existing_ids:
+            values["id"] = existing_ids[row.specialization_id]
+            updates.append(values)
+        else:
+            inserts.append(values)
+
+    # Specializations that lost all their users keep an empty benchmark row
+    strengths, gaps = _benchmark_insights(0.0, 0.0, 0.0)
+    for specialization_id, benchmark_id in existing_ids.items():
+        if specialization_id in seen:
+            continue
+        updates.append({
+            "id": benchmark_id,
+            "specialization_id": specialization_id,
+            "total_users": 0,
+            "sum_readiness_score": 0.0,
+            "sum_technical_score": 0.0,
+            "sum_soft_skills_score": 0.0,
+            "sum_leadership_score": 0.0,
+            "sumsq_readiness_score": 0.0,
+            "sumsq_technical_score": 0.0,
+            "sumsq_soft_skills_score": 0.0,
+            "sumsq_leadership_score": 0.0,
+            "avg_readiness_score": 0.0,
+            "avg_technical_score": 0.0,
+            "avg_soft_skills_score": 0.0,
+            "avg_leadership_score": 0.0,
+            "median_readiness_score": 0.0,
+            "readiness_histogram": json.dumps([0] * 101),
+            "common_strengths": json.dumps(strengths),
+            "common_gaps": json.dumps(gaps),
+            "last_updated": now
+        })
+
+    if inserts and is_postgres:
+        # A submission may have created one of these rows since the lock was taken
+        from sqlalchemy.dialects.postgresql import insert as pg_insert
+        statement = pg_insert(models.PeerBenchmark)
+        db.execute(statement.on_conflict_do_update(
+            constraint="unique_peer_benchmark_specialization",
+            set_={key: statement.excluded[key] for key in inserts[0] if key != "specialization_id"}
+        ), inserts)
+    elif inserts:
+        db.execute(insert(models.PeerBenchmark), inserts)
+    if updates:
+        db.execute(update(models.PeerBenchmark), updates)
+    _rollup_hierarchy_benchmarks(db)
+    db.commit()
+    percentile_index.clear()
+    benchmark_matrix.invalidate()
+    return len(inserts) + len(updates)
+
+
+# Branch and sector benchmarks, merged from the specialization statistics
+HIERARCHY_LEVELS = ("specialization", "branch", "sector")
+BENCHMARK_STAT_FIELDS = tuple(
+    f"{prefix}_{category}_score" for prefix in ("sum", "sumsq") for category in BENCHMARK_CATEGORIES
+)
+
+def _empty_benchmark_stats() -> dict:
+    stats = {field: 0.0 for field in BENCHMARK_STAT_FIELDS}
+    stats["total_users"] = 0
+    stats["histogram"] = [0] * 101
+    return stats
+
+def _merge_benchmark_stats(stats: dict, source, histogram: list):
+    """Add one benchmark's count, sums, sums of squares and histogram into stats"""
+    stats["total_users"] += source.total_users or 0
+    for field in BENCHMARK_STAT_FIELDS:
+        stats[field] += getattr(source, field) or 0
+    for bucket, count in enumerate(histogram):
+        stats["histogram"][bucket] += count
+
+def _rollup_hierarchy_benchmarks(db: Session) -> int:
+    """
+    Merge every specialization's sufficient statistics up the
+    Sector -> Branch -> Specialization tree into hierarchy_benchmarks.
+    Cost grows with the number of specializations, not users. Every active
+    branch and sector gets a row, with zero statistics when no specialization
+    beneath it has users. Does not commit. Returns the number of rows written.
+    """
+    from sqlalchemy import insert, update
+
+    rows = db.query(
+        models.PeerBenchmark.specialization_id,
+        models.PeerBenchmark.total_users,
+        models.PeerBenchmark.readiness_histogram,
+        *[getattr(models.PeerBenchmark, field) for field in BENCHMARK_STAT_FIELDS],
+        models.Specialization.branch_id,
+        models.Branch.sector_id
+    ).join(
+        models.Specialization, models.Specialization.id == models.PeerBenchmark.specialization_id
+    ).join(
+        models.Branch, models.Branch.id == models.Specialization.branch_id
+    ).all()
+
+    nodes = {("branch", branch_id): _empty_benchmark_stats() for branch_id, in db.query(models.Branch.id).filter(
+        models.Branch.is_active == True
+    )}
+    nodes.update({("sector", sector_id): _empty_benchmark_stats() for sector_id, in db.query(models.Sector.id).filter(
+        models.Sector.is_active == True
+    )})
+    for row in rows:
+        source = row
+        if row.readiness_histogram:
+            histogram = json.loads(row.readiness_histogram)
+        else:
+            # Row predates the sufficient statistics: rebuild it from users first
+            source, histogram = _load_benchmark_for_delta(db, row.specialization_id)
+            _refresh_benchmark_derived(source, histogram)
+        for key in (("branch", row.branch_id), ("sector", row.sector_id)):
+            if key not in nodes:
+                nodes[key] = _empty_benchmark_stats()
+            _merge_benchmark_stats(nodes[key], source, histogram)
+
+    existing_ids = {
+        (level, node_id): benchmark_id for benchmark_id, level, node_id in db.query(
+            models.HierarchyBenchmark.id, models.HierarchyBenchmark.level, models.HierarchyBenchmark.node_id
+        )
+    }
+    now = datetime.now(timezone.utc)
+    inserts, updates = [], []
+    # Nodes that lost all their users are reset rather than left stale
+    for key in set(nodes) | set(existing_ids):
+        stats = nodes.get(key) or _empty_benchmark_stats()
+        values = {field: stats[field] for field in BENCHMARK_STAT_FIELDS}
+        values.update({
+            "level": key[0],
+            "node_id": key[1],
+            "total_users": stats["total_users"],
+            "readiness_histogram": json.dumps(stats["histogram"]),
+            "last_updated": now
+        })
+        if key in existing_ids:
+            values["id"] = existing_ids[key]
+            updates.append(values)
+        else:
+            inserts.append(values)
+
+    if inserts:
+        db.execute(insert(models.HierarchyBenchmark), inserts)
+    if updates:
+        db.execute(update(models.HierarchyBenchmark), updates)
+    return len(inserts) + len(updates)
+
+def rollup_hierarchy_benchmarks(db: Session) -> int:
+    """Refresh the cached branch and sector benchmarks from the specialization benchmarks"""
+    count = _rollup_hierarchy_benchmarks(db)
+    db.commit()
+    return count
+
+def _hierarchy_benchmark_node(level: str, node_id: int, name: str, benchmark) -> Dict[str, Any]:
+    """Averages, spreads and median for one node from its stored statistics (benchmark may be None)"""
+    total = (benchmark.total_users or 0) if benchmark else 0
+    histogram = json.loads(benchmark.readiness_histogram) if benchmark and benchmark.readiness_histogram else None
+    categories = []
+    for category in BENCHMARK_CATEGORIES:
+        average, std_dev = 0.0, 0.0
+        if total > 0:
+            average = (getattr(benchmark, f"sum_{category}_score") or 0) / total
+            mean_square = (getattr(benchmark, f"sumsq_{category}_score") or 0) / total
+            std_dev = math.sqrt(max(0.0, mean_square - average * average))
+        categories.append({
+            "category": category,
+            "average": round(average, 1),
+            "std_dev": round(std_dev, 1)
+        })
+    return {
+        "level": level,
+        "id": node_id,
+        "name": name,
+        "total_users": total,
+        "median_readiness_score": _histogram_median(histogram, total) if histogram else 0.0,
+        "categories": categories,
+        "last_updated": benchmark.last_updated.isoformat() if benchmark and benchmark.last_updated else None
+    }
+
+def get_hierarchy_benchmark(db: Session, level: str, node_id: int) -> Optional[Dict[str, Any]]:
+    """
+    Benchmark statistics for a specialization, branch or sector, with the
+    same statistics for each of its active children so they can be compared.
+    Reads only the stored rows, so cost does not depend on the number of users,
+    and never writes: a node without a row yet (a new branch or sector before
+    the next scheduled rollup) is reported with zero statistics.
+    """
+    if level == "specialization":
+        node = db.query(models.Specialization).filter(
+            models.Specialization.id == node_id, models.Specialization.is_active == True
+        ).first()
+        if not node:
+            return None
+        benchmark = db.query(models.PeerBenchmark).filter(
+            models.PeerBenchmark.specialization_id == node_id
+        ).first()
+        result = _hierarchy_benchmark_node(level, node.id, node.name, benchmark)
+        result["children"] = []
+        return result
+
+    node_model = models.Branch if level == "branch" else models.Sector
+    node = db.query(node_model).filter(node_model.id == node_id, node_model.is_active == True).first()
+    if not node:
+        return None
+
+    benchmark = db.query(models.HierarchyBenchmark).filter(
+        models.HierarchyBenchmark.level == level,
+        models.HierarchyBenchmark.node_id == node_id
+    ).first()
+    result = _hierarchy_benchmark_node(level, node.id, node.name, benchmark)
+
+    if level == "branch":
+        children = db.query(models.Specialization, models.PeerBenchmark).outerjoin(
+            models.PeerBenchmark, models.PeerBenchmark.specialization_id == models.Specialization.id
+        ).filter(
+            models.Specialization.branch_id == node_id,
+            models.Specialization.is_active == True
+        ).order_by(models.Specialization.name).all()
+        child_level = "specialization"
+    else:
+        children = db.query(models.Branch, models.HierarchyBenchmark).outerjoin(
+            models.HierarchyBenchmark,
+            (models.HierarchyBenchmark.level == "branch") & (models.HierarchyBenchmark.node_id == models.Branch.id)
+        ).filter(
+            models.Branch.sector_id == node_id,
+            models.Branch.is_active == True
+        ).order_by(models.Branch.name).all()
+        child_level = "branch"
+    result["children"] = [
+        _hierarchy_benchmark_node(child_level, child.id, child.name, child_benchmark)
+        for child, child_benchmark in children
+    ]
+    return result
+
+
+# Peer benchmark history
+SNAPSHOT_DAILY_RETENTION_DAYS = 90  # Daily points older than this are merged into weeks
+SNAPSHOT_WEEKLY_RETENTION_DAYS = 365  # Weekly points older than this are merged into months
+SNAPSHOT_VALUE_FIELDS = (
+    "total_users",
+    "avg_readiness_score",
+    "avg_technical_score",
+    "avg_soft_skills_score",
+    "avg_leadership_score",
+    "median_readiness_score"
+)
+
+def _as_utc(value: datetime) -> datetime:
+    """SQLite returns naive datetimes; treat them as UTC"""
+    return value.replace(tzinfo=timezone.utc) if value.tzinfo is None else value
+
+def _week_start(value: datetime) -> datetime:
+    from datetime import timedelta
+    return (value - timedelta(days=value.weekday())).replace(hour=0, minute=0, second=0, microsecond=0)
+
+def _month_start(value: datetime) -> datetime:
+    return value.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+
+def snapshot_peer_benchmarks(db: Session, now: Optional[datetime] = None) -> int:
+    """
+    Append a daily snapshot of every specialization's peer benchmark.
+    Specializations already captured today are skipped. Does not commit.
+    """
+    from sqlalchemy import insert
+
+    now = now or datetime.now(timezone.utc)
+    day_start = now.replace(hour=0, minute=0, second=0, microsecond=0)
+    captured_today = {
+        specialization_id for (specialization_id,) in db.query(models.PeerBenchmarkSnapshot.specialization_id).filter(
+            models.PeerBenchmarkSnapshot.resolution == "daily",
+            models.PeerBenchmarkSnapshot.captured_at >= day_start
+        )
+    }
+    snapshots = [
+        dict(
+            specialization_id=benchmark.specialization_id,
+            captured_at=now,
+            resolution="daily",
+            **{field: getattr(benchmark, field) or 0 for field in SNAPSHOT_VALUE_FIELDS}
+        )
+        for benchmark in db.query(models.PeerBenchmark)
+        if benchmark.specialization_id not in captured_today
+    ]
+    if snapshots:
+        db.execute(insert(models.PeerBenchmarkSnapshot), snapshots)
+    return len(snapshots)
+
+def _downsample_snapshots(db: Session, source: str, target: str, cutoff: datetime, period_start) -> int:
+    """
+    Replace `source` snapshots captured before cutoff with one `target`
+    snapshot per specialization and period, averaging their values.
+    cutoff must fall on a period boundary so no period is merged twice.
+    Does not commit. Returns the number of merged rows written.
+    """
+    from sqlalchemy import insert
+    from collections import defaultdict
+
+    rows = db.query(models.PeerBenchmarkSnapshot).filter(
+        models.PeerBenchmarkSnapshot.resolution == source,
+        models.PeerBenchmarkSnapshot.captured_at < cutoff
+    ).all()
+    if not rows:
+        return 0
+
+    periods = defaultdict(list)
+    for row in rows:
+        periods[(row.specialization_id, period_start(_as_utc(row.captured_at)))].append(row)
+    merged = []
+    for (specialization_id, start), members in periods.items():
+        values = {
+            field: sum(getattr(member, field) for member in members) / len(members)
+            for field in SNAPSHOT_VALUE_FIELDS
+        }
+        values["total_users"] = round(values["total_users"])
+        merged.append(dict(specialization_id=specialization_id, captured_at=start, resolution=target, **values))
+
+    db.execute(insert(models.PeerBenchmarkSnapshot), merged)
+    db.query(models.PeerBenchmarkSnapshot).filter(
+        models.PeerBenchmarkSnapshot.id.in_([row.id for row in rows])
+    ).delete(synchronize_session=False)
+    return len(merged)
+
+def capture_peer_benchmark_history(db: Session, now: Optional[datetime] = None) -> Dict[str, int]:
+    """
+    Scheduled job: append today's benchmark snapshots, then downsample aged
+    history from daily to weekly and from weekly to monthly points
+    """
+    from datetime import timedelta
+
+    now = now or datetime.now(timezone.utc)
+    captured = snapshot_peer_benchmarks(db, now)
+    weekly = _downsample_snapshots(
+        db, "daily", "weekly", _week_start(now - timedelta(days=SNAPSHOT_DAILY_RETENTION_DAYS)), _week_start
+    )
+    monthly = _downsample_snapshots(
+        db, "weekly", "monthly", _month_start(now - timedelta(days=SNAPSHOT_WEEKLY_RETENTION_DAYS)), _month_start
+    )
+    db.commit()
+    return {"captured": captured, "weekly": weekly, "monthly": monthly}
+
+def last_peer_benchmark_snapshot_at(db: Session) -> Optional[datetime]:
+    """When the history job last captured daily snapshots (None before the first run)"""
+    from sqlalchemy import func
+    return db.query(func.max(models.PeerBenchmarkSnapshot.captured_at)).filter(
+        models.PeerBenchmarkSnapshot.resolution == "daily"
+    ).scalar()
+
+def get_peer_benchmark_trend(db: Session, specialization_id: int, days: int = 365) -> Dict[str, Any]:
+    """
+    Chart-ready benchmark history for a specialization: one label per point
+    and one parallel list per series, read with a single range scan of the
+    (specialization_id, captured_at) index
+    """
+    from datetime import timedelta
+
+    since = datetime.now(timezone.utc) - timedelta(days=days)
+    rows = db.query(
+        models.PeerBenchmarkSnapshot.captured_at,
+        models.PeerBenchmarkSnapshot.resolution,
+        *[getattr(models.PeerBenchmarkSnapshot, field) for field in SNAPSHOT_VALUE_FIELDS]
+    ).filter(
+        models.PeerBenchmarkSnapshot.specialization_id == specialization_id,
+        models.PeerBenchmarkSnapshot.captured_at >= since
+    ).order_by(models.PeerBenchmarkSnapshot.captured_at).all()
+
+    return {
+        "specialization_id": specialization_id,
+        "labels": [_as_utc(row.captured_at).date().isoformat() for row in rows],
+        "resolutions": [row.resolution for row in rows],
+        "series": {
+            "total_users": [row.total_users for row in rows],
+            "readiness": [round(row.avg_readiness_score, 1) for row in rows],
+            "technical": [round(row.avg_technical_score, 1) for row in rows],
+            "soft_skills": [round(row.avg_soft_skills_score, 1) for row in rows],
+            "leadership": [round(row.avg_leadership_score, 1) for row in rows],
+            "median_readiness": [round(row.median_readiness_score, 1) for row in rows]
+        }
+    }
+
+
+# Leaderboards
+def get_specialization_leaderboard(db: Session, specialization_id: int, limit: int = 10,
+                                   user_id: Optional[int] = None) -> Dict[str, Any]:
+    """
+    Top users by readiness in a specialization, plus the requesting user's
+    own rank when user_id is given. Served from the in-memory leaderboards.
+    """
+    top = leaderboard_index.top(db, specialization_id, limit)
+    you = leaderboard_index.rank(db, specialization_id, user_id) if user_id else None
+
+    user_ids = [entry_user_id for _, entry_user_id, _ in top]
+    if you:
+        user_ids.append(user_id)
+    names = dict(
+        db.query(models.User.id, models.User.name).filter(models.User.id.in_(user_ids)).all()
+    ) if user_ids else {}
+
+    return {
+        "specialization_id": specialization_id,
+        "total_users": leaderboard_index.size(db, specialization_id),
+        "entries": [{
+            "rank": rank,
+            "user_id": entry_user_id,
+            "name": names.get(entry_user_id, ""),
+            "readiness_score": round(score, 1)
+        } for rank, entry_user_id, score in top],
+        "you": {
+            "rank": you[0],
+            "user_id": user_id,
+            "name": names.get(user_id, ""),
+            "readiness_score": round(you[1], 1)
+        } if you else None
+    }
+
+def reconcile_leaderboards(db: Session) -> int:
+    """Scheduled job: rebuild the in-memory leaderboards from the users table"""
+    return leaderboard_index.rebuild(db)
+
+
+# Similar peers
+def get_similar_peers(db: Session, user_id: int, limit: int = 5) -> Optional[Dict[str, Any]]:
+    """
+    The learners in a user's specialization whose score vectors (four
+    scores plus best result per quiz) are closest to theirs
+    """
+    user = get_user_by_id(db, user_id)
+    if not user or not user.preferred_specialization_id:
+        return None
+
+    nearest = peer_vector_index.nearest(db, user.preferred_specialization_id, user_id, limit) or []
+    peers = {
+        peer.id: peer for peer in db.query(models.User).filter(
+            models.User.id.in_([peer_id for peer_id, _ in nearest])
+        )
+    } if nearest else {}
+    # Largest possible distance: every score and quiz result 100 points apart
+    max_distance = 100 * math.sqrt(len(BENCHMARK_CATEGORIES) + QUIZ_RESULTS_WEIGHT ** 2)
+
+    return {
+        "user_id": user_id,
+        "specialization_id": user.preferred_specialization_id,
+        "peers": [{
+            "user_id": peer_id,
+            "name": peers[peer_id].name,
+            "similarity": round(max(0.0, 100 * (1 - distance / max_distance)), 1),
+            "readiness_score": round(peers[peer_id].readiness_score or 0, 1),
+            "technical_score": round(peers[peer_id].technical_score or 0, 1),
+            "soft_skills_score": round(peers[peer_id].soft_skills_score or 0, 1),
+            "leadership_score": round(peers[peer_id].leadership_score or 0, 1)
+        } for peer_id, distance in nearest if peer_id in peers]
+    }
+
+
+# Cohort readiness distributions (admin console)
+COHORT_DIMENSIONS = ("all", "sector", "branch", "specialization", "signup_month")
+COHORT_QUANTILES = (10, 25, 50, 75, 90)
+
+def refresh_cohort_distributions(db: Session) -> int:
+    """
+    Recompute the readiness distribution of every cohort (overall, sector,
+    branch, specialization, signup month) from one pass over users, and
+    replace the stored rows. Run on a schedule so the admin console never
+    aggregates the users table itself. Returns the number of cohorts.
+    """
+    import numpy as np
+    from collections import defaultdict
+    from sqlalchemy import insert
+
+    rows = db.query(
+        models.User.readiness_score,
+        models.User.created_at,
+        models.Specialization.id,
+        models.Specialization.name,
+        models.Branch.id,
+        models.Branch.name,
+        models.Sector.id,
+        models.Sector.name
+    ).outerjoin(
+        models.Specialization, models.Specialization.id == models.User.preferred_specialization_id
+    ).outerjoin(
+        models.Branch, models.Branch.id == models.Specialization.branch_id
+    ).outerjoin(
+        models.Sector, models.Sector.id == models.Branch.sector_id
+    ).yield_per(5000)
+
+    scores = defaultdict(list)
+    labels = {("all", "all"): "All users"}
+    for readiness, created_at, spec_id, spec_name, branch_id, branch_name, sector_id, sector_name in rows:
+        readiness = readiness or 0
+        scores[("all", "all")].append(readiness)
+        for dimension, node_id, name in (
+            ("specialization", spec_id, spec_name),
+            ("branch", branch_id, branch_name),
+            ("sector", sector_id, sector_name)
+        ):
+            if node_id is not None:
+                scores[(dimension, str(node_id))].append(readiness)
+                labels[(dimension, str(node_id))] = name
+        if created_at:
+            month = created_at.strftime("%Y-%m")
+            scores[("signup_month", month)].append(readiness)
+            labels[("signup_month", month)] = month
+
+    now = datetime.now(timezone.utc)
+    distributions = []
+    for (dimension, cohort_key), values in scores.items():
+        values = np.asarray(values, dtype=float)
+        quantiles = np.percentile(values, COHORT_QUANTILES)
+        bands = np.bincount(np.clip(values // 10, 0, 9).astype(int), minlength=10)
+        distributions.append(dict(
+            dimension=dimension,
+            cohort_key=cohort_key,
+            cohort_label=labels.get((dimension, cohort_key)),
+            total_users=len(values),
+            avg_readiness_score=float(values.mean()),
+            readiness_histogram=json.dumps(bands.tolist()),
+            refreshed_at=now,
+            **{f"p{q}_readiness_score": float(value) for q, value in zip(COHORT_QUANTILES, quantiles)}
+        ))
+
+    db.query(models.CohortReadinessDistribution).delete(synchronize_session=False)
+    if distributions:
+        db.execute(insert(models.CohortReadinessDistribution), distributions)
+    db.commit()
+    return len(distributions)
+
+def get_cohort_distributions(db: Session, dimension: Optional[str] = None) -> List[Dict[str, Any]]:
+    """Stored cohort readiness distributions, optionally for one dimension"""
+    query = db.query(models.CohortReadinessDistribution)
+    if dimension:
+        query = query.filter(models.CohortReadinessDistribution.dimension == dimension)
+    rows = query.order_by(
+        models.CohortReadinessDistribution.dimension, models.CohortReadinessDistribution.cohort_key
+    ).all()
+    return [{
+        "dimension": row.dimension,
+        "cohort_key": row.cohort_key,
+        "cohort_label": row.cohort_label,
+        "total_users": row.total_users,
+        "avg_readiness_score": round(row.avg_readiness_score, 1),
+        "quantiles": {
+            f"p{q}": round(getattr(row, f"p{q}_readiness_score"), 1) for q in COHORT_QUANTILES
+        },
+        "histogram": json.loads(row.readiness_histogram) if row.readiness_histogram else [],
+        "refreshed_at": row.refreshed_at.isoformat() if row.refreshed_at else None
+    } for row in rows]
+
+
+# Next-quiz recommendations
+RECOMMENDATION_LIMIT = 5
+WEAK_TOPIC_ACCURACY = 70  # Topics below this accuracy (%) are practiced first
+SIMILAR_PEER_SAMPLE = 20
+
+def _quiz_recommendation_candidates(db: Session, user) -> List[Dict[str, Any]]:
+    """
+    Score the user's open (unlocked or attempted, not passed) quizzes:
+    the next level to clear, quizzes covering weak topics, and quizzes
+    that similar peers have passed. Best candidates first.
+    """
+    from sqlalchemy import func
+
+    specialization_id = user.preferred_specialization_id
+    progress = get_user_specialization_progress(db, user.id, specialization_id)
+    open_quizzes = [quiz for quiz in progress if quiz["status"] in ("unlocked", "attempted")]
+    if not open_quizzes:
+        return []
+    open_ids = [quiz["quiz_id"] for quiz in open_quizzes]
+    next_level = min(quiz["difficulty"] for quiz in open_quizzes)
+
+    # reason -> (score, detail) per quiz
+    components = {quiz_id: {} for quiz_id in open_ids}
+    for quiz in open_quizzes:
+        if quiz["difficulty"] == next_level:
+            components[quiz["quiz_id"]]["next_level"] = (3.0, f"Level {next_level}")
+
+    weak_topics = {
+        topic["topic"]: topic["accuracy"]
+        for topic in get_user_topic_mastery(db, user.id, specialization_id, limit=3)
+        if topic["accuracy"] < WEAK_TOPIC_ACCURACY
+    }
+    if weak_topics:
+        for quiz_id, topic in db.query(models.Question.quiz_id, models.Question.topic).filter(
+            models.Question.quiz_id.in_(open_ids),
+            models.Question.topic.in_(list(weak_topics)),
+            models.Question.is_active == True
+        ).distinct():
+            score = 2.0 + (1 - weak_topics[topic] / 100)
+            if score > components[quiz_id].get("weak_topic", (0, None))[0]:
+                components[quiz_id]["weak_topic"] = (score, topic)
+
+    peers = peer_vector_index.nearest(db, specialization_id, user.id, SIMILAR_PEER_SAMPLE) or []
+    if peers:
+        peer_ids = [peer_id for peer_id, _ in peers]
+        for quiz_id, passed_peers in db.query(
+            models.QuizAttempt.quiz_id, func.count(func.distinct(models.QuizAttempt.user_id))
+        ).filter(
+            models.QuizAttempt.user_id.in_(peer_ids),
+            models.QuizAttempt.quiz_id.in_(open_ids),
+            models.QuizAttempt.is_passed == True
+        ).group_by(models.QuizAttempt.quiz_id):
+            components[quiz_id]["popular_with_peers"] = (
+                passed_peers / len(peer_ids), f"Passed by {passed_peers} of {len(peer_ids)} similar learners"
+            )
+
+    candidates = []
+    for quiz_id, reasons in components.items():
+        if not reasons:
+            continue
+        reason, (_, detail) = max(reasons.items(), key=lambda item: item[1][0])
+        candidates.append({
+            "quiz_id": quiz_id,
+            "reason": reason,
+            "detail": detail,
+            "score": round(sum(score for score, _ in reasons.values()), 4)
+        })
+    candidates.sort(key=lambda candidate: -candidate["score"])
+    return candidates
+
+def refresh_quiz_recommendations(db: Session, user_id: int) -> int:
+    """
+    Recompute and store a user's ranked next-quiz list, replacing the
+    previous one. Run in the background after each submission and
+    specialization change. An empty list is stored as just the timestamp.
+    """
+    from sqlalchemy import insert
+
+    user = get_user_by_id(db, user_id)
+    if not user:
+        return 0
+    candidates = []
+    if user.preferred_specialization_id:
+        candidates = _quiz_recommendation_candidates(db, user)[:RECOMMENDATION_LIMIT]
+
+    db.query(models.UserQuizRecommendation).filter(
+        models.UserQuizRecommendation.user_id == user_id
+    ).delete(synchronize_session=False)
+    if candidates:
+        db.execute(insert(models.UserQuizRecommendation), [
+            dict(user_id=user_id, rank=rank, **candidate)
+            for rank, candidate in enumerate(candidates, start=1)
+        ])
+    user.recommendations_refreshed_at = datetime.now(timezone.utc)
+    db.commit()
+    return len(candidates)
+
+def reset_quiz_recommendations(db: Session, user):
+    """
+    Drop a user's stored next-quiz list after their specialization changed
+    and queue its recomputation. Does not commit.
+    """
+    db.query(models.UserQuizRecommendation).filter(
+        models.UserQuizRecommendation.user_id == user.id
+    ).delete(synchronize_session=False)
+    user.recommendations_refreshed_at = None
+    enqueue_outbox_event(db, "specialization_changed", user.id, {
+        "specialization_id": user.preferred_specialization_id
+    })
+
+def get_quiz_recommendations(db: Session, user_id: int) -> List[Dict[str, Any]]:
+    """A user's stored next-quiz list in rank order; computed now only if never stored"""
+    def load():
+        return db.query(models.UserQuizRecommendation, models.Quiz.title, models.Quiz.difficulty_level).join(
+            models.Quiz, models.Quiz.id == models.UserQuizRecommendation.quiz_id
+        ).filter(
+            models.UserQuizRecommendation.user_id == user_id
+        ).order_by(models.UserQuizRecommendation.rank).all()
+
+    rows = load()
+    if not rows:
+        refreshed_at = db.query(models.User.recommendations_refreshed_at).filter(
+            models.User.id == user_id
+        ).scalar()
+        if refreshed_at is None and refresh_quiz_recommendations(db, user_id):
+            rows = load()
+    return [{
+        "rank": recommendation.rank,
+        "quiz_id": recommendation.quiz_id,
+        "title": title,
+        "difficulty": difficulty,
+        "reason": recommendation.reason,
+        "detail": recommendation.detail
+    } for recommendation, title, difficulty in rows]
+
+
+# Badges
+def _badge_context(db: Session, user_ids: List[int]) -> Dict[int, Dict[str, Any]]:
+    """Per-user facts that badge criteria can check, for a batch of users"""
+    from sqlalchemy import func
+
+    context = {
+        user_id: {"quizzes_passed": 0, "longest_streak": 0, "specialization_id": specialization_id}
+        for user_id, specialization_id in db.query(
+            models.User.id, models.User.preferred_specialization_id
+        ).filter(models.User.id.in_(user_ids))
+    }
+    for user_id, passed in db.query(
+        models.QuizAttempt.user_id, func.count(func.distinct(models.QuizAttempt.quiz_id))
+    ).filter(
+        models.QuizAttempt.user_id.in_(user_ids),
+        models.QuizAttempt.is_passed == True
+    ).group_by(models.QuizAttempt.user_id):
+        context[user_id]["quizzes_passed"] = passed
+    for user_id, longest in db.query(models.UserStreak.user_id, models.UserStreak.longest_streak).filter(
+        models.UserStreak.user_id.in_(user_ids)
+    ):
+        context[user_id]["longest_streak"] = longest or 0
+    return context
+
+def award_badges(db: Session, changes: List[tuple]) -> int:
+    """
+    Award the badges earned by a batch of score changes, given as
+    (user_id, old_scores, new_scores) tuples in get_user_benchmark_scores
+    order. Only thresholds crossed by each change are looked at. Rows are
+    inserted in bulk and the unique_user_badge constraint makes repeats
+    (e.g. a redelivered event) no-ops. Returns the number of rows attempted.
+    """
+    awards = set()
+    conditional = {}
+    for user_id, old_scores, new_scores in changes:
+        crossed, reachable = badge_engine.candidates(db, old_scores, new_scores)
+        awards.update((user_id, badge.id) for badge in crossed)
+        if reachable:
+            conditional.setdefault(user_id, []).extend(reachable)
+
+    if conditional:
+        context = _badge_context(db, list(conditional))
+        for user_id, badges in conditional.items():
+            if user_id not in context:
+                continue
+            awards.update((user_id, badge.id) for badge in badges if badge.matches(context[user_id]))
+
+    if not awards:
+        return 0
+    rows = [{"user_id": user_id, "badge_id": badge_id} for user_id, badge_id in sorted(awards)]
+    dialect = db.get_bind().dialect.name
+    if dialect in ("postgresql", "sqlite"):
+        if dialect == "postgresql":
+            from sqlalchemy.dialects.postgresql import insert
+        else:
+            from sqlalchemy.dialects.sqlite import insert
+        db.execute(insert(models.UserBadge).values(rows).on_conflict_do_nothing(
+            index_elements=["user_id", "badge_id"]
+        ))
+    else:
+        from sqlalchemy import insert, tuple_
+        existing = set(db.query(models.UserBadge.user_id, models.UserBadge.badge_id).filter(
+            tuple_(models.UserBadge.user_id, models.UserBadge.badge_id).in_(list(awards))
+        ))
+        rows = [row for row in rows if (row["user_id"], row["badge_id"]) not in existing]
+        if rows:
+            db.execute(insert(models.UserBadge), rows)
+    db.commit()
+    return len(rows)
+
+def backfill_badges(db: Session, batch_size: int = 500) -> int:
+    """
+    Award every badge each user already qualifies for, whatever their
+    score history: for users who passed thresholds before badges were
+    tracked, and for badges added later. Users are walked in id batches,
+    each treated as a change from no score to their current scores, and
+    award_badges' unique-constraint inserts make reruns no-ops.
+    Returns the number of rows attempted.
+    """
+    badge_engine.invalidate()  # Include badges added since the index was built
+    unscored = (float("-inf"),) * len(BENCHMARK_CATEGORIES)
+    total = 0
+    last_id = 0
+    while True:
+        users = db.query(
+            models.User.id,
+            models.User.readiness_score,
+            models.User.technical_score,
+            models.User.soft_skills_score,
+            models.User.leadership_score
+        ).filter(models.User.id > last_id).order_by(models.User.id).limit(batch_size).all()
+        if not users:
+            return total
+        last_id = users[-1].id
+        total += award_badges(db, [
+            (user.id, unscored, get_user_benchmark_scores(user)) for user in users
+        ])
+
+def get_user_badges(db: Session, user_id: int) -> List[Dict[str, Any]]:
+    """Badges a user has earned, most recent first"""
+    rows = db.query(models.UserBadge, models.Badge).join(
+        models.Badge, models.Badge.id == models.UserBadge.badge_id
+    ).filter(
+        models.UserBadge.user_id == user_id
+    ).order_by(models.UserBadge.earned_date.desc(), models.Badge.required_score.desc()).all()
+    return [{
+        "id": badge.id,
+        "name": badge.name,
+        "description": badge.description,
+        "icon_url": badge.icon_url,
+        "category": badge.category,
+        "required_score": badge.required_score,
+        "earned_date": user_badge.earned_date.isoformat() if user_badge.earned_date else None,
+        "shared": bool(user_badge.shared)
+    } for user_badge, badge in rows]
+
+
+# Cross-specialization comparison
+def get_specialization_comparison(db: Session, user_id: int, specialization_ids: Optional[List[int]] = None,
+                                  limit: Optional[int] = None) -> Optional[Dict[str, Any]]:
+    """
+    Compare a user's scores with the peer benchmarks of many specializations
+    at once, e.g. for career switchers. Computed in one vectorized pass over
+    the cached benchmark matrix; specializations where the user would rank
+    highest come first.
+    """
+    import numpy as np
+
+    user = get_user_by_id(db, user_id)
+    if not user:
+        return None
+
+    comparison = benchmark_matrix.compare(db, get_user_benchmark_scores(user), specialization_ids)
+    order = np.argsort(-comparison["readiness_percentiles"], kind="stable")
+    if limit:
+        order = order[:limit]
+
+    labels = ("Overall Readiness", "Technical Skills", "Soft Skills", "Leadership")
+    results = []
+    for index in order:
+        differences = comparison["differences"][index]
+        results.append({
+            "specialization_id": int(comparison["specialization_ids"][index]),
+            "specialization_name": comparison["names"][index],
+            "total_users": int(comparison["total_users"][index]),
+            "is_current": int(comparison["specialization_ids"][index]) == user.preferred_specialization_id,
+            "readiness_percentile": int(comparison["readiness_percentiles"][index]),
+            "differences": [{
+                "category": label,
+                "difference": round(float(difference), 1),
+                "status": "above" if difference > 5 else "below" if difference < -5 else "average"
+            } for label, difference in zip(labels, differences)]
+        })
+    return {"user_id": user_id, "comparisons": results}
+
+
 def get_peer_benchmark(db: Session, user_id: int) -> Optional[Dict[str, Any]]:
     """
     Get peer benchmark comparison for a user
     """
     user = get_user_by_id(db, user_id)
-    if not user or not user.preferred_specialization_id:
+    if not user:
+        return None
+    return _peer_benchmark_for_user(db, user)
+
+def _peer_benchmark_for_user(db: Session, user) -> Optional[Dict[str, Any]]:
+    if not user.preferred_specialization_id:
         return None
     
     # Get or calculate benchmark for user's specialization
@@ -694,57 +2507,57 @@ def get_peer_benchmark(db: Session, user_id: int) -> Optional[Dict[str, Any]]:
     # Calculate comparisons
     comparisons = []
     
+    # Look up all four percentiles from the cached score arrays at once
+    percentiles = percentile_index.percentiles(db, user.preferred_specialization_id, {
+        "readiness": user.readiness_score or 0,
+        "technical": user.technical_score or 0,
+        "soft_skills": user.soft_skills_score or 0,
+        "leadership": user.leadership_score or 0
+    })
+    
     # Readiness comparison
-    readiness_diff = (user.readiness_score or 0) - benchmark.avg_readiness
-    readiness_percentile = calculate_percentile(
-        db, user.preferred_specialization_id, user.readiness_score or 0, "readiness"
-    )
+    readiness_diff = (user.readiness_score or 0) - benchmark.avg_readiness_score
+    readiness_percentile = percentiles["readiness"]
     comparisons.append({
         "category": "Overall Readiness",
         "your_score": round(user.readiness_score or 0, 1),
-        "peer_average": round(benchmark.avg_readiness, 1),
+        "peer_average": round(benchmark.avg_readiness_score, 1),
         "difference": round(readiness_diff, 1),
         "percentile": readiness_percentile,
         "status": "above" if readiness_diff > 5 else "below" if readiness_diff < -5 else "average"
     })
     
     # Technical comparison
-    technical_diff = (user.technical_score or 0) - benchmark.avg_technical
-    technical_percentile = calculate_percentile(
-        db, user.preferred_specialization_id, user.technical_score or 0, "technical"
-    )
+    technical_diff = (user.technical_score or 0) - benchmark.avg_technical_score
+    technical_percentile = percentiles["technical"]
     comparisons.append({
         "category": "Technical Skills",
         "your_score": round(user.technical_score or 0, 1),
-        "peer_average": round(benchmark.avg_technical, 1),
+        "peer_average": round(benchmark.avg_technical_score, 1),
         "difference": round(technical_diff, 1),
         "percentile": technical_percentile,
         "status": "above" if technical_diff > 5 else "below" if technical_diff < -5 else "average"
     })
     
     # Soft Skills comparison
-    soft_diff = (user.soft_skills_score or 0) - benchmark.avg_soft_skills
-    soft_percentile = calculate_percentile(
-        db, user.preferred_specialization_id, user.soft_skills_score or 0, "soft_skills"
-    )
+    soft_diff = (user.soft_skills_score or 0) - benchmark.avg_soft_skills_score
+    soft_percentile = percentiles["soft_skills"]
     comparisons.append({
         "category": "Soft Skills",
         "your_score": round(user.soft_skills_score or 0, 1),
-        "peer_average": round(benchmark.avg_soft_skills, 1),
+        "peer_average": round(benchmark.avg_soft_skills_score, 1),
         "difference": round(soft_diff, 1),
         "percentile": soft_percentile,
         "status": "above" if soft_diff > 5 else "below" if soft_diff < -5 else "average"
     })
     
     # Leadership comparison
-    leadership_diff = (user.leadership_score or 0) - benchmark.avg_leadership
-    leadership_percentile = calculate_percentile(
-        db, user.preferred_specialization_id, user.leadership_score or 0, "leadership"
-    )
+    leadership_diff = (user.leadership_score or 0) - benchmark.avg_leadership_score
+    leadership_percentile = percentiles["leadership"]
     comparisons.append({
         "category": "Leadership",
         "your_score": round(user.leadership_score or 0, 1),
-        "peer_average": round(benchmark.avg_leadership, 1),
+        "peer_average": round(benchmark.avg_leadership_score, 1),
         "difference": round(leadership_diff, 1),
         "percentile": leadership_percentile,
         "status": "above" if leadership_diff > 5 else "below" if leadership_diff < -5 else "average"
@@ -765,36 +2578,75 @@ def get_peer_benchmark(db: Session, user_id: int) -> Optional[Dict[str, Any]]:
     }
 
 
+def get_bootstrap(db: Session, user_id: int) -> Optional[Dict[str, Any]]:
+    """
+    Everything the post-login landing page needs, from one session and one
+    user lookup: profile, dashboard, first pages of goals and journal, the
+    hierarchy (cached) and the peer benchmark (precomputed row + cached percentiles)
+    """
+    user = get_user_by_id(db, user_id)
+    if not user:
+        return None
+
+    peer_benchmark = _peer_benchmark_for_user(db, user)
+    if peer_benchmark and "error" in peer_benchmark:
+        peer_benchmark = None
+    elif peer_benchmark and not peer_benchmark["last_updated"]:
+        peer_benchmark["last_updated"] = datetime.now().isoformat()
+
+    return {
+        "user": {
+            "id": user.id,
+            "email": user.email,
+            "name": user.name,
+            "specialization_id": user.preferred_specialization_id,
+            "readiness_score": user.readiness_score,
+            "technical_score": user.technical_score,
+            "soft_skills_score": user.soft_skills_score,
+            "leadership_score": user.leadership_score,
+            "created_at": user.created_at
+        },
+        "dashboard": _dashboard_summary(db, user),
+        "goals": get_user_goals_page(db, user.id),
+        "journal": get_user_journal_page(db, user.id),
+        "hierarchy": hierarchy_cache.get(db),
+        "peer_benchmark": peer_benchmark
+    }
+
+
+def get_live_benchmark_update(db: Session, user_id: int) -> Optional[Dict[str, Any]]:
+    """
+    Compact peer standing pushed to the live stream after a score change:
+    peer averages from the maintained benchmark row plus the user's percentiles
+    """
+    user = get_user_by_id(db, user_id)
+    if not user or not user.preferred_specialization_id:
+        return None
+    benchmark = db.query(models.PeerBenchmark).filter(
+        models.PeerBenchmark.specialization_id == user.preferred_specialization_id
+    ).first()
+    if not benchmark:
+        return None
+    scores = dict(zip(BENCHMARK_CATEGORIES, get_user_benchmark_scores(user)))
+    return {
+        "specialization_id": user.preferred_specialization_id,
+        "total_peers": max(benchmark.total_users - 1, 0),
+        "scores": {category: round(score, 1) for category, score in scores.items()},
+        "peer_averages": {
+            "readiness": round(benchmark.avg_readiness_score, 1),
+            "technical": round(benchmark.avg_technical_score, 1),
+            "soft_skills": round(benchmark.avg_soft_skills_score, 1),
+            "leadership": round(benchmark.avg_leadership_score, 1),
+        },
+        "percentiles": percentile_index.percentiles(db, user.preferred_specialization_id, scores),
+    }
+
+
 def calculate_percentile(db: Session, specialization_id: int, score: float, category: str) -> int:
     """
     Calculate what percentile a user's score falls into
     e.g., 75 means "better than 75% of peers"
     """
-    # Get all users in specialization
-    users = db.query(models.User).filter(
-        models.User.preferred_specialization_id == specialization_id
-    ).all()
-    
-    if not users or len(users) < 2:
-        return 50  # Default to 50th percentile if not enough data
-    
-    # Get scores based on category
-    if category == "readiness":
-        scores = [u.readiness_score or 0 for u in users]
-    elif category == "technical":
-        scores = [u.technical_score or 0 for u in users]
-    elif category == "soft_skills":
-        scores = [u.soft_skills_score or 0 for u in users]
-    elif category == "leadership":
-        scores = [u.leadership_score or 0 for u in users]
-    else:
+    if category not in BENCHMARK_CATEGORIES:
         return 50
-    
-    # Count how many scores are below this user's score
-    below_count = sum(1 for s in scores if s < score)
-    
-    # Calculate percentile
-    percentile = int((below_count / len(scores)) * 100)
-    
-    return percentile
-
+    return percentile_index.percentiles(db, specialization_id, {category: score})[category]
@@ -1,10 +1,13 @@
 """
 Database connection and session management
 """
+import logging
 import os
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import Session, sessionmaker
+
+logger = logging.getLogger(__name__)
 
 # Database URL - must be set via environment variable
 DATABASE_URL = os.getenv("DATABASE_URL")
@@ -33,3 +36,22 @@ def get_db():
         yield db
     finally:
         db.close()
+
+# Post-commit hooks, for in-memory indexes that must only see committed changes
+def after_commit(db: Session, callback):
+    """Run callback() once the session's current transaction commits; dropped on rollback"""
+    db.info.setdefault("after_commit", []).append(callback)
+
+@event.listens_for(Session, "after_commit")
+def _run_after_commit(session):
+    for callback in session.info.pop("after_commit", []):
+        try:
+            callback()
+        except Exception as e:
+            logger.error(f"After-commit hook failed: {e}")
+
+@event.listens_for(Session, "after_transaction_end")
+def _discard_after_commit(session, transaction):
+    # Runs after _run_after_commit on commit, so anything left was rolled back
+    if transaction.parent is None:
+        session.info.pop("after_commit", None)
@@ -14,7 +14,7 @@ DATA_DIR = BASE_DIR / "data"
 
 from sqlalchemy.orm import Session
 from .database import SessionLocal
-from .models_hierarchical import Sector, Branch, Specialization, Quiz, Question, QuestionOption
+from .models_hierarchical import Sector, Branch, Specialization, Quiz, Question, QuestionOption, Badge
 
 def load_sectors_from_json():
     """Load sectors data from JSON file"""
@@ -38,6 +38,45 @@ def load_quizzes_from_json():
         data = json.load(f)
         return data.get("quizzes", [])
 
+def load_badges_from_json():
+    """Load badge definitions from JSON file"""
+    badges_file = DATA_DIR / "badges.json"
+    if not badges_file.exists():
+        print(f"⚠️  Badges JSON file not found at {badges_file}")
+        return None
+    
+    with open(badges_file, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+        return data.get("badges", [])
+
+def add_missing_badges(db: Session):
+    """Create any badge from badges.json that does not exist yet (matched by name)"""
+    badges_data = load_badges_from_json()
+    if not badges_data:
+        return
+    
+    existing = {name for (name,) in db.query(Badge.name)}
+    added = 0
+    for badge_data in badges_data:
+        if badge_data["name"] in existing:
+            continue
+        db.add(Badge(
+            name=badge_data["name"],
+            description=badge_data.get("description"),
+            criteria=json.dumps(badge_data.get("criteria", {})),
+            icon_url=badge_data.get("icon_url"),
+            category=badge_data["category"],
+            required_score=badge_data["required_score"]
+        ))
+        added += 1
+    db.commit()
+    if added > 0:
+        print(f"🏅 Added {added} badge(s) from JSON")
+        # Award the new badges to users who already qualify
+        from . import crud
+        awarded = crud.backfill_badges(db)
+        print(f"🏅 Backfilled badges: {awarded} award(s) checked")
+
 def auto_populate_if_empty():
     """
     Automatically populate database with required data if tables are empty
@@ -145,7 +184,8 @@ def auto_populate_if_empty():
                                 question_type=q_data["question_type"],
                                 points=q_data.get("points", 1),
                                 order_index=idx + 1,
-                                explanation=q_data.get("explanation")
+                                explanation=q_data.get("explanation"),
+                                topic=q_data.get("topic")
                             )
                             db.add(question)
                             db.flush()
@@ -253,7 +293,8 @@ def auto_populate_if_empty():
                                 question_type=q_data["question_type"],
                                 points=q_data.get("points", 1),
                                 order_index=idx + 1,
-                                explanation=q_data.get("explanation")
+                                explanation=q_data.get("explanation"),
+                                topic=q_data.get("topic")
                             )
                             db.add(question)
                             db.flush()
@@ -276,6 +317,8 @@ def auto_populate_if_empty():
                     print(f"✅ Database already populated: {sector_count} sectors, {quiz_count} quizzes")
             else:
                 print(f"✅ Database already populated: {sector_count} sectors, {quiz_count} quizzes")
+        
+        add_missing_badges(db)
                     
     except Exception as e:
         print(f"⚠️  Auto-population error: {e}")
@@ -0,0 +1,183 @@
+"""
+Live update stream
+Per-user pub/sub behind the Server-Sent Events endpoint
+(GET /api/users/users/{id}/events). On PostgreSQL events are published with
+NOTIFY and every API process LISTENs, so an event raised by any worker (or by
+process_outbox.py) reaches subscribers connected to any other worker; on other
+databases delivery is in-process only
+"""
+import asyncio
+import json
+import logging
+import os
+import select
+import threading
+from collections import defaultdict
+from typing import Any, Dict, Set, Tuple
+
+from .database import engine
+
+logger = logging.getLogger(__name__)
+
+CHANNEL = "user_events"
+KEEPALIVE_SECONDS = 15  # Comment line sent when idle so proxies keep the stream open
+QUEUE_SIZE = 100  # Per-connection backlog; the oldest events are dropped for slow clients
+RECONNECT_SECONDS = 5
+
+
+def format_event(event_type: str, data: Dict[str, Any]) -> str:
+    """Encode one SSE message"""
+    return f"event: {event_type}\ndata: {json.dumps(data, default=str)}\n\n"
+
+
+class EventBroker:
+    """Fans published events out to the asyncio queues of connected streams"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscribers: Dict[int, Set[Tuple[asyncio.AbstractEventLoop, asyncio.Queue]]] = defaultdict(set)
+
+    def subscribe(self, user_id: int) -> asyncio.Queue:
+        """Register a queue for the calling event loop"""
+        queue = asyncio.Queue(maxsize=QUEUE_SIZE)
+        with self._lock:
+            self._subscribers[user_id].add((asyncio.get_running_loop(), queue))
+        return queue
+
+    def unsubscribe(self, user_id: int, queue: asyncio.Queue):
+        with self._lock:
+            subscribers = self._subscribers.get(user_id)
+            if not subscribers:
+                return
+            subscribers.difference_update({entry for entry in subscribers if entry[1] is queue})
+            if not subscribers:
+                del self._subscribers[user_id]
+
+    def subscriber_count(self, user_id: int) -> int:
+        with self._lock:
+            return len(self._subscribers.get(user_id, ()))
+
+    @staticmethod
+    def _put(queue: asyncio.Queue, message: str):
+        if queue.full():
+            queue.get_nowait()
+        queue.put_nowait(message)
+
+    def dispatch(self, user_id: int, event_type: str, data: Dict[str, Any]):
+        """Deliver to this process's subscribers; safe to call from any thread"""
+        with self._lock:
+            subscribers = list(self._subscribers.get(user_id, ()))
+        if not subscribers:
+            return
+        message = format_event(event_type, data)
+        for loop, queue in subscribers:
+            try:
+                loop.call_soon_threadsafe(self._put, queue, message)
+            except RuntimeError:
+                # Loop already closed; the stream's cleanup removes the entry
+                pass
+
+    def publish(self, user_id: int, event_type: str, data: Dict[str, Any]):
+        """
+        Publish an event for a user. Call after the change is committed;
+        publishing never raises, a lost update only means a client refreshes later
+        """
+        try:
+            if engine.dialect.name == "postgresql":
+                payload = json.dumps({"user_id": user_id, "type": event_type, "data": data}, default=str)
+                with engine.connect() as connection:
+                    connection.exec_driver_sql("SELECT pg_notify(%s, %s)", (CHANNEL, payload))
+                    connection.commit()
+            else:
+                self.dispatch(user_id, event_type, data)
+        except Exception as e:
+            logger.error(f"Could not publish '{event_type}' event for user {user_id}: {e}")
+
+
+class PostgresListener:
+    """LISTENs on the events channel in a daemon thread and dispatches locally"""
+
+    def __init__(self, broker: EventBroker):
+        self.broker = broker
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _handle(self, payload: str):
+        try:
+            event = json.loads(payload)
+            self.broker.dispatch(int(event["user_id"]), event["type"], event.get("data") or {})
+        except (ValueError, KeyError, TypeError) as e:
+            logger.warning(f"Ignoring malformed event notification: {e}")
+
+    @staticmethod
+    def _connect():
+        """
+        A dedicated driver connection opened outside the engine's pool:
+        LISTEN needs autocommit and holds the connection for the process
+        lifetime, neither of which may leak into pooled sessions
+        """
+        cargs, cparams = engine.dialect.create_connect_args(engine.url)
+        driver_connection = engine.dialect.loaded_dbapi.connect(*cargs, **cparams)
+        driver_connection.autocommit = True
+        return driver_connection
+
+    def _listen(self):
+        driver_connection = self._connect()
+        try:
+            with driver_connection.cursor() as cursor:
+                cursor.execute(f"LISTEN {CHANNEL}")
+            while not self._stop.is_set():
+                if select.select([driver_connection], [], [], 1.0) == ([], [], []):
+                    continue
+                driver_connection.poll()
+                while driver_connection.notifies:
+                    self._handle(driver_connection.notifies.pop(0).payload)
+        finally:
+            driver_connection.close()
+
+    def _loop(self):
+        while not self._stop.is_set():
+            try:
+                self._listen()
+            except Exception as e:
+                logger.error(f"Event listener error, reconnecting in {RECONNECT_SECONDS}s: {e}")
+                self._stop.wait(RECONNECT_SECONDS)
+
+    def start(self):
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._loop, name="event-listener", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+
+async def event_stream(user_id: int, request):
+    """SSE body for one client: queued events, with keepalives while idle"""
+    queue = broker.subscribe(user_id)
+    try:
+        # Ask EventSource to reconnect after 5s if the connection drops
+        yield f"retry: {RECONNECT_SECONDS * 1000}\n\n"
+        while True:
+            if await request.is_disconnected():
+                break
+            try:
+                message = await asyncio.wait_for(queue.get(), KEEPALIVE_SECONDS)
+            except asyncio.TimeoutError:
+                yield ": keepalive\n\n"
+                continue
+            yield message
+    finally:
+        broker.unsubscribe(user_id, queue)
+
+
+def listener_enabled() -> bool:
+    """The listener is only needed on PostgreSQL; LIVE_EVENTS_LISTENER=off disables it"""
+    return engine.dialect.name == "postgresql" and os.getenv("LIVE_EVENTS_LISTENER", "on") != "off"
+
+
+# Shared instances for the application process
+broker = EventBroker()
+listener = PostgresListener(broker)
@@ -0,0 +1,64 @@
+"""
+Sparse fieldsets (?fields=)
+A comma-separated selector such as `id,title,questions.id,questions.options.text`
+is parsed into a tree, validated against the fields an endpoint offers, used by
+crud to load only the needed columns, and applied to the serialized response
+"""
+from typing import Any, Dict, Optional
+
+# A field tree maps each field to None (the whole value) or to a nested tree
+FieldTree = Dict[str, Optional[dict]]
+
+
+def parse_fields(selector: Optional[str], available: FieldTree) -> Optional[FieldTree]:
+    """
+    Parse a ?fields= value; None means every field.
+    Raises ValueError naming any field the endpoint does not offer.
+    """
+    if selector is None or not selector.strip():
+        return None
+    tree: FieldTree = {}
+    unknown = []
+    for path in (part.strip() for part in selector.split(",")):
+        if not path:
+            continue
+        node, offered = tree, available
+        names = path.split(".")
+        for depth, name in enumerate(names):
+            if not isinstance(offered, dict) or name not in offered:
+                unknown.append(path)
+                break
+            last = depth == len(names) - 1
+            if last:
+                node[name] = None  # Whole value, overriding any narrower selection
+            elif name not in node or node[name] is not None:
+                node = node.setdefault(name, {})
+            else:
+                break  # The whole value was already requested
+            offered = offered[name]
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(unknown)}")
+    return tree or None
+
+
+def wants(tree: Optional[FieldTree], *path: str) -> bool:
+    """Whether any part of the field at `path` is selected"""
+    node = tree
+    for name in path:
+        if node is None:
+            return True
+        if name not in node:
+            return False
+        node = node[name]
+    return True
+
+
+def project(data: Any, tree: Optional[FieldTree]) -> Any:
+    """Keep only the selected fields of a dict, or of each dict in a list"""
+    if tree is None:
+        return data
+    if isinstance(data, list):
+        return [project(item, tree) for item in data]
+    if isinstance(data, dict):
+        return {name: project(data[name], sub) for name, sub in tree.items() if name in data}
+    return data
@@ -120,7 +120,8 @@ def insert_questions(db: Session, quiz_id: int, questions: list):
             points=1,
             order_index=idx,
             is_active=True,
-            explanation=q_data.get('explanation', '')
+            explanation=q_data.get('explanation', ''),
+            topic=q_data.get('topic')
         )
         db.add(question)
         db.flush()
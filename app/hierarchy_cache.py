@@ -0,0 +1,113 @@
+"""
+Cached sector -> branch -> specialization tree
+The tree changes only through the admin console, so it is built with three
+queries and served from memory until an admin edit invalidates it or it expires
+"""
+import threading
+import time
+from collections import defaultdict
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy.orm import Session
+
+from . import models_hierarchical as models
+from .responses import encode
+
+# Reload at least this often so edits made by other worker processes are picked up
+MAX_AGE_SECONDS = 300
+
+
+def build_hierarchy(db: Session) -> List[Dict[str, Any]]:
+    """Active sectors with their active branches and specializations"""
+    specializations = defaultdict(list)
+    for spec in db.query(models.Specialization).filter(
+        models.Specialization.is_active == True
+    ).order_by(models.Specialization.id):
+        specializations[spec.branch_id].append({
+            "id": spec.id,
+            "name": spec.name,
+            "description": spec.description
+        })
+
+    branches = defaultdict(list)
+    for branch in db.query(models.Branch).filter(
+        models.Branch.is_active == True
+    ).order_by(models.Branch.id):
+        branches[branch.sector_id].append({
+            "id": branch.id,
+            "name": branch.name,
+            "description": branch.description,
+            "specializations": specializations.get(branch.id, [])
+        })
+
+    return [
+        {
+            "id": sector.id,
+            "name": sector.name,
+            "description": sector.description,
+            "branches": branches.get(sector.id, [])
+        }
+        for sector in db.query(models.Sector).filter(
+            models.Sector.is_active == True
+        ).order_by(models.Sector.id)
+    ]
+
+
+class HierarchyCache:
+    """
+    The hierarchy tree, rebuilt when invalidated or expired, plus its encoded
+    response bodies (JSON and MessagePack) so /hierarchy skips serialization
+    """
+
+    def __init__(self, max_age_seconds: float = MAX_AGE_SECONDS):
+        self.max_age_seconds = max_age_seconds
+        self._lock = threading.Lock()
+        self._tree: Optional[List[Dict[str, Any]]] = None
+        self._bodies: Dict[str, bytes] = {}
+        self._loaded_at = 0.0
+        # Bumped by invalidate(), so a build or encoding that started before
+        # an admin edit is returned to its caller but never cached
+        self._generation = 0
+
+    def invalidate(self):
+        with self._lock:
+            self._generation += 1
+            self._tree = None
+            self._bodies = {}
+
+    def _get(self, db: Session) -> Tuple[List[Dict[str, Any]], int]:
+        """The tree and the generation it belongs to"""
+        with self._lock:
+            tree, generation = self._tree, self._generation
+            fresh = tree is not None and time.monotonic() - self._loaded_at < self.max_age_seconds
+        if fresh:
+            return tree, generation
+        tree = build_hierarchy(db)
+        with self._lock:
+            if self._generation == generation:
+                self._tree = tree
+                self._bodies = {}
+                self._loaded_at = time.monotonic()
+        return tree, generation
+
+    def get(self, db: Session) -> List[Dict[str, Any]]:
+        """The cached tree; callers must not mutate it"""
+        return self._get(db)[0]
+
+    def body(self, db: Session, media_type: str) -> bytes:
+        """The tree encoded as a response body in `media_type`, cached per format"""
+        tree, generation = self._get(db)
+        with self._lock:
+            current = self._generation == generation and self._tree is tree
+            body = self._bodies.get(media_type) if current else None
+        if body is not None:
+            return body
+        body = encode(tree, media_type)
+        with self._lock:
+            if self._generation == generation and self._tree is tree:
+                self._bodies[media_type] = body
+        return body
+
+
+# Shared instance for the application process
+hierarchy_cache = HierarchyCache()
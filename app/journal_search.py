@@ -0,0 +1,170 @@
+"""
+Journal full-text search
+PostgreSQL: a generated, weighted tsvector column (prompt B, content A) with a
+GIN index; the database keeps it current on every insert and update.
+SQLite: an external-content FTS5 table (journal_entries_fts) that
+crud.create/update/delete_journal_entry keep in sync through this module.
+Results are ranked (ts_rank_cd / bm25) and come with highlighted snippets:
+HTML-escaped entry text with matches wrapped in <mark></mark>
+"""
+import html
+import re
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import inspect, text
+from sqlalchemy.orm import Session
+
+HIGHLIGHT_START = "<mark>"
+HIGHLIGHT_END = "</mark>"
+# The database marks matches with these private-use characters; the text is
+# then HTML-escaped and only the markers become tags
+_START_SENTINEL = "\ue000"
+_END_SENTINEL = "\ue001"
+SNIPPET_WORDS = 24
+
+# Idempotent DDL, the same as migration 8b3e5f7a1c26 runs
+POSTGRES_DDL = [
+    """
+    ALTER TABLE journal_entries ADD COLUMN IF NOT EXISTS search_vector tsvector
+    GENERATED ALWAYS AS (
+        setweight(to_tsvector('english', coalesce(prompt, '')), 'B') ||
+        setweight(to_tsvector('english', coalesce(content, '')), 'A')
+    ) STORED
+    """,
+    "CREATE INDEX IF NOT EXISTS ix_journal_entries_search ON journal_entries USING GIN (search_vector)",
+]
+SQLITE_DDL = [
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS journal_entries_fts USING fts5(
+        prompt, content, content='journal_entries', content_rowid='id', tokenize='porter unicode61'
+    )
+    """,
+]
+
+
+def _dialect(db: Session) -> str:
+    return db.get_bind().dialect.name
+
+
+def ensure_search_index(engine):
+    """Create the search column/table when missing (deployments using create_all instead of alembic)"""
+    with engine.begin() as connection:
+        if engine.dialect.name == "postgresql":
+            # Check first: ALTER TABLE locks journal_entries even when the column exists
+            columns = [column["name"] for column in inspect(connection).get_columns("journal_entries")]
+            indexes = [index["name"] for index in inspect(connection).get_indexes("journal_entries")]
+            if "search_vector" not in columns or "ix_journal_entries_search" not in indexes:
+                for statement in POSTGRES_DDL:
+                    connection.execute(text(statement))
+        elif engine.dialect.name == "sqlite":
+            exists = connection.execute(text(
+                "SELECT 1 FROM sqlite_master WHERE name = 'journal_entries_fts'"
+            )).first()
+            for statement in SQLITE_DDL:
+                connection.execute(text(statement))
+            if not exists:
+                # Index the entries written before the FTS table existed
+                connection.execute(text("INSERT INTO journal_entries_fts(journal_entries_fts) VALUES ('rebuild')"))
+
+
+def index_entry(db: Session, entry):
+    """Add a new (flushed) entry to the FTS table; PostgreSQL needs nothing"""
+    if _dialect(db) != "sqlite":
+        return
+    db.execute(
+        text("INSERT INTO journal_entries_fts(rowid, prompt, content) VALUES (:id, :prompt, :content)"),
+        {"id": entry.id, "prompt": entry.prompt or "", "content": entry.content}
+    )
+
+
+def unindex_entry(db: Session, entry_id: int, prompt: Optional[str], content: str):
+    """Remove an entry's previously indexed text (external-content tables need the old values)"""
+    if _dialect(db) != "sqlite":
+        return
+    db.execute(
+        text("INSERT INTO journal_entries_fts(journal_entries_fts, rowid, prompt, content) "
+             "VALUES ('delete', :id, :prompt, :content)"),
+        {"id": entry_id, "prompt": prompt or "", "content": content}
+    )
+
+
+def _fts5_query(query: str) -> str:
+    """User input as an FTS5 expression: every word must match, the last as a prefix"""
+    terms = re.findall(r"\w+", query)
+    if not terms:
+        return ""
+    quoted = [f'"{term}"' for term in terms]
+    quoted[-1] += "*"
+    return " ".join(quoted)
+
+
+def _highlight(snippet: Optional[str]) -> str:
+    """Escape user-written snippet text, then turn the match markers into <mark> tags"""
+    escaped = html.escape(snippet or "")
+    return escaped.replace(_START_SENTINEL, HIGHLIGHT_START).replace(_END_SENTINEL, HIGHLIGHT_END)
+
+
+def search(db: Session, user_id: int, query: str, limit: int = 20) -> List[Dict[str, Any]]:
+    """The user's entries matching `query`, best first, with highlighted snippets"""
+    if _dialect(db) == "postgresql":
+        # Rank on the index first; ts_headline re-parses its text, so only run it for the returned page.
+        # Entries can match on the prompt alone, so that is headlined too and used when content has no hit
+        rows = db.execute(text("""
+            SELECT e.id, e.entry_date, e.prompt, ranked.rank,
+                   ts_headline('english', e.content, ranked.query, :headline_options) AS content_snippet,
+                   ts_headline('english', coalesce(e.prompt, ''), ranked.query, :headline_options) AS prompt_snippet
+            FROM (
+                SELECT j.id, ts_rank_cd(j.search_vector, q.query) AS rank, q.query
+                FROM journal_entries j, websearch_to_tsquery('english', :query) AS q(query)
+                WHERE j.user_id = :user_id AND j.search_vector @@ q.query
+                ORDER BY rank DESC, j.id DESC
+                LIMIT :limit
+            ) ranked
+            JOIN journal_entries e ON e.id = ranked.id
+            ORDER BY ranked.rank DESC, e.id DESC
+        """), {
+            "query": query,
+            "user_id": user_id,
+            "limit": limit,
+            "headline_options": f"StartSel={_START_SENTINEL}, StopSel={_END_SENTINEL}, "
+                                f"MaxWords={SNIPPET_WORDS}, MinWords={SNIPPET_WORDS // 2}, MaxFragments=2",
+        }).all()
+        snippets = {
+            row.id: row.prompt_snippet
+            if _START_SENTINEL not in row.content_snippet and _START_SENTINEL in row.prompt_snippet
+            else row.content_snippet
+            for row in rows
+        }
+    else:
+        match = _fts5_query(query)
+        if not match:
+            return []
+        # bm25 is lower for better matches; negate it so rank is "higher is better" on both databases.
+        # Column -1 lets FTS5 take the snippet from whichever of prompt/content matched best
+        rows = db.execute(text("""
+            SELECT e.id, e.entry_date, e.prompt, -bm25(journal_entries_fts) AS rank,
+                   snippet(journal_entries_fts, -1, :start, :end, '…', :words) AS snippet
+            FROM journal_entries_fts
+            JOIN journal_entries e ON e.id = journal_entries_fts.rowid
+            WHERE journal_entries_fts MATCH :match AND e.user_id = :user_id
+            ORDER BY rank DESC, e.id DESC
+            LIMIT :limit
+        """), {
+            "match": match,
+            "user_id": user_id,
+            "limit": limit,
+            "start": _START_SENTINEL,
+            "end": _END_SENTINEL,
+            "words": SNIPPET_WORDS,
+        }).all()
+        snippets = {row.id: row.snippet for row in rows}
+    return [
+        {
+            "id": row.id,
+            "entry_date": row.entry_date,
+            "prompt": row.prompt,
+            "snippet": _highlight(snippets[row.id]),
+            "rank": round(float(row.rank), 4),
+        }
+        for row in rows
+    ]
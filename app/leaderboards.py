@@ -0,0 +1,142 @@
+"""
+In-process readiness leaderboards per specialization
+Each specialization keeps its users in a sorted list, so top-N and rank
+lookups are O(log n) instead of an ORDER BY over the users table
+"""
+import threading
+from typing import Dict, List, Optional, Tuple
+
+from sortedcontainers import SortedList
+from sqlalchemy.orm import Session
+
+from . import models_hierarchical as models
+
+
+class LeaderboardIndex:
+    """
+    Sorted (-readiness, user_id) keys per specialization.
+    Committed score changes are applied as they happen; rebuild() reconciles
+    with the database at startup and periodically, which also picks up
+    writes made by other worker processes.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._boards: Dict[int, SortedList] = {}
+        self._entries: Dict[int, Tuple[int, tuple]] = {}  # user_id -> (specialization_id, key)
+        self._loaded = False
+        # One log per rebuild in progress: updates made while its query runs,
+        # replayed onto the new boards so they are not lost in the swap
+        self._rebuild_logs: List[list] = []
+
+    def _drop_log(self, log: list):
+        # By identity: two empty logs compare equal
+        self._rebuild_logs = [entry for entry in self._rebuild_logs if entry is not log]
+
+    def rebuild(self, db: Session) -> int:
+        """Reload every leaderboard with one query; returns the number of ranked users"""
+        log = []
+        with self._lock:
+            self._rebuild_logs.append(log)
+        try:
+            rows = db.query(
+                models.User.id,
+                models.User.preferred_specialization_id,
+                models.User.readiness_score
+            ).filter(models.User.preferred_specialization_id.isnot(None)).all()
+        except Exception:
+            with self._lock:
+                self._drop_log(log)
+            raise
+
+        keys_by_specialization: Dict[int, list] = {}
+        entries = {}
+        for user_id, specialization_id, readiness in rows:
+            key = (-(readiness or 0), user_id)
+            keys_by_specialization.setdefault(specialization_id, []).append(key)
+            entries[user_id] = (specialization_id, key)
+        boards = {
+            specialization_id: SortedList(keys)
+            for specialization_id, keys in keys_by_specialization.items()
+        }
+        with self._lock:
+            self._drop_log(log)
+            self._boards = boards
+            self._entries = entries
+            self._loaded = True
+            for update in log:
+                self._apply(*update)
+            return len(self._entries)
+
+    def invalidate(self):
+        """Drop everything; the next read rebuilds from the database"""
+        with self._lock:
+            self._boards = {}
+            self._entries = {}
+            self._loaded = False
+
+    def _ensure_loaded(self, db: Session):
+        if not self._loaded:
+            self.rebuild(db)
+
+    def _apply(self, user_id: int, specialization_id: Optional[int], readiness_score: float):
+        """Move a user's key; caller holds the lock"""
+        previous = self._entries.pop(user_id, None)
+        if previous:
+            old_specialization_id, old_key = previous
+            self._boards[old_specialization_id].discard(old_key)
+        if specialization_id:
+            key = (-(readiness_score or 0), user_id)
+            self._boards.setdefault(specialization_id, SortedList()).add(key)
+            self._entries[user_id] = (specialization_id, key)
+
+    def update(self, user_id: int, specialization_id: Optional[int], readiness_score: float):
+        """
+        Move a user to their current specialization and score. Call after
+        the change is committed. Before the first load only rebuilds in
+        progress record it.
+        """
+        with self._lock:
+            for log in self._rebuild_logs:
+                log.append((user_id, specialization_id, readiness_score))
+            if self._loaded:
+                self._apply(user_id, specialization_id, readiness_score)
+
+    def top(self, db: Session, specialization_id: int, limit: int = 10) -> List[Tuple[int, int, float]]:
+        """(rank, user_id, readiness) for the best `limit` users; tied scores share a rank"""
+        self._ensure_loaded(db)
+        with self._lock:
+            board = self._boards.get(specialization_id)
+            if not board:
+                return []
+            keys = list(board.islice(0, limit))
+        result = []
+        for position, (negative_score, user_id) in enumerate(keys):
+            if result and result[-1][2] == -negative_score:
+                rank = result[-1][0]
+            else:
+                rank = position + 1
+            result.append((rank, user_id, -negative_score))
+        return result
+
+    def rank(self, db: Session, specialization_id: int, user_id: int) -> Optional[Tuple[int, float]]:
+        """(rank, readiness) of a user in a specialization, or None if not ranked there"""
+        self._ensure_loaded(db)
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if not entry or entry[0] != specialization_id:
+                return None
+            negative_score = entry[1][0]
+            # Users with a strictly higher score sort before (negative_score,)
+            above = self._boards[specialization_id].bisect_left((negative_score,))
+        return above + 1, -negative_score
+
+    def size(self, db: Session, specialization_id: int) -> int:
+        self._ensure_loaded(db)
+        with self._lock:
+            board = self._boards.get(specialization_id)
+            return len(board) if board else 0
+
+
+# Shared instance for the application process
+leaderboard_index = LeaderboardIndex()
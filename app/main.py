@@ -1,10 +1,13 @@
 import logging
+import os
 from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
 from .api import users, quizzes, sectors, admin, goals
 from .models_hierarchical import Base
-from .database import engine
+from .database import engine, SessionLocal
 from .db_init import auto_populate_if_empty
+from .responses import NegotiatedResponse, NegotiationMiddleware
+from . import crud, scheduler, outbox, events, journal_search
 
 # Configure logging
 logging.basicConfig(
@@ -15,6 +18,8 @@ logger = logging.getLogger(__name__)
 
 # Create all tables using hierarchical models
 Base.metadata.create_all(bind=engine)
+# The journal search column/FTS table is created with DDL that create_all cannot express
+journal_search.ensure_search_index(engine)
 
 # Note: Auto-population now runs in entrypoint.sh after DB is ready
 # This allows proper sequencing: DB ready → populate → start server
@@ -24,8 +29,11 @@ Base.metadata.create_all(bind=engine)
 app = FastAPI(
     title="Future Work Readiness API",
     description="API for the Future of Work Readiness Platform",
-    version="1.0.0"
+    version="1.0.0",
+    # JSON by default, MessagePack for clients sending Accept: application/msgpack
+    default_response_class=NegotiatedResponse
 )
+app.add_middleware(NegotiationMiddleware)
 
 # CORS - Allow frontend to talk to backend
 app.add_middleware(
@@ -43,6 +51,65 @@ app.include_router(sectors.router, prefix="/api", tags=["Sectors"])
 app.include_router(admin.router, prefix="/api", tags=["Admin"])
 app.include_router(goals.router, prefix="/api", tags=["Goals"])
 
+# Periodic maintenance jobs (set the *_HOURS variable to 0 to disable).
+# Jobs writing shared tables are exclusive: one worker runs each of them at a time;
+# reconcile_leaderboards refreshes per-process memory, so every worker runs it
+scheduler.schedule(
+    "rebuild_peer_benchmarks",
+    scheduler.interval_from_env("PEER_BENCHMARK_REBUILD_HOURS", 24),
+    crud.rebuild_all_peer_benchmarks,
+    exclusive=True
+)
+scheduler.schedule(
+    "rollup_hierarchy_benchmarks",
+    scheduler.interval_from_env("HIERARCHY_BENCHMARK_ROLLUP_HOURS", 1),
+    crud.rollup_hierarchy_benchmarks,
+    exclusive=True
+)
+scheduler.schedule(
+    "capture_peer_benchmark_history",
+    scheduler.interval_from_env("PEER_BENCHMARK_SNAPSHOT_HOURS", 24),
+    crud.capture_peer_benchmark_history,
+    exclusive=True,
+    # Due a day after the last snapshot, not a day after each (re)start
+    last_run=crud.last_peer_benchmark_snapshot_at
+)
+scheduler.schedule(
+    "reconcile_leaderboards",
+    scheduler.interval_from_env("LEADERBOARD_RECONCILE_HOURS", 0.25),
+    crud.reconcile_leaderboards
+)
+scheduler.schedule(
+    "refresh_cohort_distributions",
+    scheduler.interval_from_env("COHORT_DISTRIBUTION_REFRESH_HOURS", 6),
+    crud.refresh_cohort_distributions,
+    exclusive=True
+)
+
+@app.on_event("startup")
+def start_background_jobs():
+    # Warm the in-memory leaderboards; reads rebuild them lazily if this fails
+    db = SessionLocal()
+    try:
+        crud.reconcile_leaderboards(db)
+    except Exception as e:
+        logger.error(f"Could not build leaderboards at startup: {e}")
+    finally:
+        db.close()
+    scheduler.start_all()
+    # Set OUTBOX_CONSUMER=off when a separate process_outbox.py worker handles events
+    if os.getenv("OUTBOX_CONSUMER", "inline") != "off":
+        outbox.consumer.start()
+    # Relays live events published by other workers to this process's streams
+    if events.listener_enabled():
+        events.listener.start()
+
+@app.on_event("shutdown")
+def stop_background_jobs():
+    scheduler.stop_all()
+    outbox.consumer.stop()
+    events.listener.stop()
+
 @app.get("/")
 def root():
     return {
@@ -90,6 +90,7 @@ class Question(Base):
     order_index = Column(Integer, nullable=False)
     is_active = Column(Boolean, default=True)
     explanation = Column(Text, nullable=True)
+    topic = Column(String(150), nullable=True, index=True)  # e.g., 'React Hooks', set by the AI generators
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
     
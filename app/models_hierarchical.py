@@ -2,7 +2,7 @@
 Extended models for hierarchical data and peer benchmarking
 Complete model definitions including all entities from models.py plus extensions
 """
-from sqlalchemy import Column, Integer, String, DateTime, Boolean, Text, ForeignKey, Float, UniqueConstraint
+from sqlalchemy import Column, Integer, String, DateTime, Date, Boolean, Text, ForeignKey, Float, UniqueConstraint, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from datetime import datetime
@@ -91,6 +91,7 @@ class Question(Base):
     order_index = Column(Integer, nullable=False)
     is_active = Column(Boolean, default=True)
     explanation = Column(Text, nullable=True)
+    topic = Column(String(150), nullable=True, index=True)  # e.g., 'React Hooks', set by the AI generators
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
     
@@ -138,6 +139,8 @@ class User(Base):
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
     last_login = Column(DateTime(timezone=True), nullable=True)
+    # When user_quiz_recommendations was last computed, so an empty list is cached too
+    recommendations_refreshed_at = Column(DateTime(timezone=True), nullable=True)
     
     # Relationships
     preferred_specialization = relationship("Specialization")
@@ -159,11 +162,120 @@ class QuizAttempt(Base):
     is_passed = Column(Boolean, nullable=False)
     started_at = Column(DateTime(timezone=True), nullable=False)
     completed_at = Column(DateTime(timezone=True), nullable=False)
+    submitted_at = Column(DateTime(timezone=True), nullable=True)  # NULL until graded
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     
     # Relationships
     user = relationship("User", back_populates="quiz_attempts")
     quiz = relationship("Quiz", back_populates="attempts")
+    
+    # Covers per-user, per-quiz aggregates (progression map, best scores)
+    # and keyset pagination of a user's history on (completed_at, id)
+    __table_args__ = (
+        Index('ix_quiz_attempts_user_quiz', 'user_id', 'quiz_id'),
+        Index('ix_quiz_attempts_user_completed', 'user_id', 'completed_at', 'id'),
+    )
+
+
+class UserSpecializationScore(Base):
+    """Sparse user x specialization skill matrix, maintained incrementally on quiz submission"""
+    __tablename__ = "user_specialization_scores"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    specialization_id = Column(Integer, ForeignKey("specializations.id"), nullable=False, index=True)
+    technical_score = Column(Float, nullable=False, default=0.0)
+    attempt_count = Column(Integer, nullable=False, default=0)
+    passed_count = Column(Integer, nullable=False, default=0)
+    total_percentage = Column(Float, nullable=False, default=0.0)  # Running sum, average = total / attempts
+    best_percentage = Column(Float, nullable=False, default=0.0)
+    last_attempt_at = Column(DateTime(timezone=True), nullable=True)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+    
+    # Relationships
+    user = relationship("User")
+    specialization = relationship("Specialization")
+    
+    # One row per (user, specialization); also serves per-user reads
+    __table_args__ = (
+        UniqueConstraint('user_id', 'specialization_id', name='unique_user_specialization_score'),
+    )
+
+
+class UserTopicMastery(Base):
+    """Per-user, per-topic correct/total counters, updated in bulk on quiz submission"""
+    __tablename__ = "user_topic_mastery"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    specialization_id = Column(Integer, ForeignKey("specializations.id"), nullable=False)
+    topic = Column(String(150), nullable=False)
+    correct_count = Column(Integer, nullable=False, default=0)
+    total_count = Column(Integer, nullable=False, default=0)
+    last_seen_at = Column(DateTime(timezone=True), nullable=True)
+    
+    # Relationships
+    user = relationship("User")
+    specialization = relationship("Specialization")
+    
+    # One row per (user, specialization, topic); the prefix serves per-user reads
+    __table_args__ = (
+        UniqueConstraint('user_id', 'specialization_id', 'topic', name='unique_user_topic_mastery'),
+    )
+
+
+class UserDailyActivity(Base):
+    """Per-user daily activity counters backing the dashboard heatmap"""
+    __tablename__ = "user_daily_activity"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    activity_date = Column(Date, nullable=False)
+    quiz_count = Column(Integer, nullable=False, default=0)
+    journal_count = Column(Integer, nullable=False, default=0)
+    
+    # Relationships
+    user = relationship("User")
+    
+    # One row per (user, day); also serves the per-user date range scan
+    __table_args__ = (
+        UniqueConstraint('user_id', 'activity_date', name='unique_user_daily_activity'),
+    )
+
+
+class UserStreak(Base):
+    """Learning streak summary, updated in the same write as the daily activity row"""
+    __tablename__ = "user_streaks"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False, unique=True)
+    current_streak = Column(Integer, nullable=False, default=0)
+    longest_streak = Column(Integer, nullable=False, default=0)
+    last_active_date = Column(Date, nullable=True)
+    
+    # Relationships
+    user = relationship("User")
+
+
+class UserQuizRecommendation(Base):
+    """Precomputed, ranked next-quiz candidates for each user"""
+    __tablename__ = "user_quiz_recommendations"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    quiz_id = Column(Integer, ForeignKey("quizzes.id"), nullable=False)
+    rank = Column(Integer, nullable=False)  # 1 = best candidate
+    reason = Column(String(30), nullable=False)  # 'next_level', 'weak_topic' or 'popular_with_peers'
+    detail = Column(String(200), nullable=True)  # e.g., the weak topic the quiz practices
+    score = Column(Float, nullable=False, default=0.0)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    
+    # Relationships
+    quiz = relationship("Quiz")
+    
+    __table_args__ = (
+        Index('ix_user_quiz_recommendations_user_rank', 'user_id', 'rank'),
+    )
 
 
 class PeerBenchmark(Base):
@@ -178,12 +290,112 @@ class PeerBenchmark(Base):
     avg_leadership_score = Column(Float, nullable=False, default=0.0)
     total_users = Column(Integer, nullable=False, default=0)
     median_readiness_score = Column(Float, nullable=False, default=0.0)
+    # Sufficient statistics, updated with deltas as users' scores change
+    sum_readiness_score = Column(Float, nullable=False, default=0.0)
+    sum_technical_score = Column(Float, nullable=False, default=0.0)
+    sum_soft_skills_score = Column(Float, nullable=False, default=0.0)
+    sum_leadership_score = Column(Float, nullable=False, default=0.0)
+    sumsq_readiness_score = Column(Float, nullable=False, default=0.0)
+    sumsq_technical_score = Column(Float, nullable=False, default=0.0)
+    sumsq_soft_skills_score = Column(Float, nullable=False, default=0.0)
+    sumsq_leadership_score = Column(Float, nullable=False, default=0.0)
+    readiness_histogram = Column(Text, nullable=True)  # JSON list, user count per whole readiness point 0-100
     common_strengths = Column(Text, nullable=True)  # JSON string
     common_gaps = Column(Text, nullable=True)  # JSON string
     last_updated = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
     
     # Relationships
     specialization = relationship("Specialization")
+    
+    __table_args__ = (
+        UniqueConstraint('specialization_id', name='unique_peer_benchmark_specialization'),
+    )
+
+
+class PeerBenchmarkSnapshot(Base):
+    """Append-only history of each specialization's peer benchmark, downsampled as it ages"""
+    __tablename__ = "peer_benchmark_snapshots"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    specialization_id = Column(Integer, ForeignKey("specializations.id"), nullable=False)
+    captured_at = Column(DateTime(timezone=True), nullable=False)  # Start of the period for weekly/monthly rows
+    resolution = Column(String(10), nullable=False, default="daily")  # 'daily', 'weekly' or 'monthly'
+    total_users = Column(Integer, nullable=False, default=0)
+    avg_readiness_score = Column(Float, nullable=False, default=0.0)
+    avg_technical_score = Column(Float, nullable=False, default=0.0)
+    avg_soft_skills_score = Column(Float, nullable=False, default=0.0)
+    avg_leadership_score = Column(Float, nullable=False, default=0.0)
+    median_readiness_score = Column(Float, nullable=False, default=0.0)
+    
+    __table_args__ = (
+        Index('ix_peer_benchmark_snapshots_spec_time', 'specialization_id', 'captured_at'),
+    )
+
+
+class HierarchyBenchmark(Base):
+    """Branch and sector benchmark statistics, merged from the specialization benchmarks below them"""
+    __tablename__ = "hierarchy_benchmarks"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    level = Column(String(20), nullable=False)  # 'branch' or 'sector'
+    node_id = Column(Integer, nullable=False)  # branches.id or sectors.id
+    total_users = Column(Integer, nullable=False, default=0)
+    sum_readiness_score = Column(Float, nullable=False, default=0.0)
+    sum_technical_score = Column(Float, nullable=False, default=0.0)
+    sum_soft_skills_score = Column(Float, nullable=False, default=0.0)
+    sum_leadership_score = Column(Float, nullable=False, default=0.0)
+    sumsq_readiness_score = Column(Float, nullable=False, default=0.0)
+    sumsq_technical_score = Column(Float, nullable=False, default=0.0)
+    sumsq_soft_skills_score = Column(Float, nullable=False, default=0.0)
+    sumsq_leadership_score = Column(Float, nullable=False, default=0.0)
+    readiness_histogram = Column(Text, nullable=True)  # JSON list, user count per whole readiness point 0-100
+    last_updated = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+    
+    __table_args__ = (
+        UniqueConstraint('level', 'node_id', name='unique_hierarchy_benchmark_node'),
+    )
+
+
+class CohortReadinessDistribution(Base):
+    """Precomputed readiness distribution per cohort, for the admin console"""
+    __tablename__ = "cohort_readiness_distributions"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    dimension = Column(String(30), nullable=False)  # 'all', 'sector', 'branch', 'specialization' or 'signup_month'
+    cohort_key = Column(String(50), nullable=False)  # Node id, 'YYYY-MM' or 'all'
+    cohort_label = Column(String(200), nullable=True)
+    total_users = Column(Integer, nullable=False, default=0)
+    avg_readiness_score = Column(Float, nullable=False, default=0.0)
+    p10_readiness_score = Column(Float, nullable=False, default=0.0)
+    p25_readiness_score = Column(Float, nullable=False, default=0.0)
+    p50_readiness_score = Column(Float, nullable=False, default=0.0)
+    p75_readiness_score = Column(Float, nullable=False, default=0.0)
+    p90_readiness_score = Column(Float, nullable=False, default=0.0)
+    readiness_histogram = Column(Text, nullable=True)  # JSON list, user count per 10-point band (0-9, ..., 90-100)
+    refreshed_at = Column(DateTime(timezone=True), server_default=func.now())
+    
+    __table_args__ = (
+        UniqueConstraint('dimension', 'cohort_key', name='unique_cohort_distribution'),
+    )
+
+
+class OutboxEvent(Base):
+    """Domain events written in the same transaction as the change, handled by background consumers"""
+    __tablename__ = "outbox_events"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    event_type = Column(String(50), nullable=False)  # e.g., 'quiz_completed'
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=True)
+    payload = Column(Text, nullable=True)  # JSON string
+    attempts = Column(Integer, nullable=False, default=0)
+    available_at = Column(DateTime(timezone=True), nullable=False)  # Claimed events are leased until this time
+    processed_at = Column(DateTime(timezone=True), nullable=True)
+    last_error = Column(Text, nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    
+    __table_args__ = (
+        Index('ix_outbox_events_pending', 'processed_at', 'available_at'),
+    )
 
 
 class Badge(Base):
@@ -246,6 +458,11 @@ class Goal(Base):
     
     # Relationships
     user = relationship("User", back_populates="goals")
+    
+    # Keyset pagination on (created_at, id)
+    __table_args__ = (
+        Index('ix_goals_user_created', 'user_id', 'created_at', 'id'),
+    )
 
 
 class JournalEntry(Base):
@@ -262,6 +479,11 @@ class JournalEntry(Base):
     
     # Relationships
     user = relationship("User", back_populates="journal_entries")
+    
+    # Keyset pagination on (entry_date, id)
+    __table_args__ = (
+        Index('ix_journal_entries_user_date', 'user_id', 'entry_date', 'id'),
+    )
 
 
 # Add relationships to User model
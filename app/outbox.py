@@ -0,0 +1,187 @@
+"""
+Transactional outbox consumer
+Events are written by crud.enqueue_outbox_event in the same transaction as
+the change that caused them; this module delivers them to handlers in
+batches with at-least-once semantics, so handlers must be idempotent
+"""
+import json
+import logging
+import os
+import threading
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Dict, List
+
+from sqlalchemy.orm import Session
+
+from . import crud
+from . import models_hierarchical as models
+from .database import SessionLocal
+from .events import broker
+
+logger = logging.getLogger(__name__)
+
+BATCH_SIZE = 100
+POLL_SECONDS = float(os.getenv("OUTBOX_POLL_SECONDS", 1))
+LEASE_SECONDS = 60  # A claimed batch is retried after this long if its worker dies
+MAX_ATTEMPTS = 5  # Events failing this often are left for inspection
+
+Handler = Callable[[Session, List[models.OutboxEvent]], None]
+HANDLERS: Dict[str, List[Handler]] = defaultdict(list)
+
+
+def handles(event_type: str):
+    """Register a batch handler for an event type"""
+    def register(handler: Handler) -> Handler:
+        HANDLERS[event_type].append(handler)
+        return handler
+    return register
+
+
+def _event_user_ids(events: List[models.OutboxEvent]) -> List[int]:
+    """Distinct users in a batch, so per-user work runs once per batch"""
+    return sorted({event.user_id for event in events if event.user_id})
+
+
+@handles("quiz_completed")
+def sync_goals(db: Session, events: List[models.OutboxEvent]):
+    for user_id in _event_user_ids(events):
+        # The raising variant, so a failure is retried instead of marked processed
+        updated_goals = crud.sync_user_goals(db, user_id)
+        if updated_goals:
+            broker.publish(user_id, "goals", {"goals": updated_goals})
+
+
+@handles("quiz_completed")
+@handles("specialization_changed")
+def refresh_recommendations(db: Session, events: List[models.OutboxEvent]):
+    for user_id in _event_user_ids(events):
+        crud.refresh_quiz_recommendations(db, user_id)
+
+
+@handles("quiz_completed")
+@handles("scores_changed")
+def award_badges(db: Session, events: List[models.OutboxEvent]):
+    changes = []
+    for event in events:
+        payload = json.loads(event.payload) if event.payload else {}
+        if event.user_id and "old_scores" in payload and "new_scores" in payload:
+            changes.append((event.user_id, payload["old_scores"], payload["new_scores"]))
+    crud.award_badges(db, changes)
+
+
+@handles("quiz_completed")
+@handles("scores_changed")
+def push_live_updates(db: Session, events: List[models.OutboxEvent]):
+    """Push the committed readiness and peer standing to the user's live stream"""
+    for user_id in _event_user_ids(events):
+        user = crud.get_user_by_id(db, user_id)
+        if not user:
+            continue
+        broker.publish(user_id, "readiness", {
+            "overall": user.readiness_score or 0.0,
+            "technical": user.technical_score or 0.0,
+            "soft": user.soft_skills_score or 0.0,
+            "leadership": user.leadership_score or 0.0,
+        })
+        benchmark = crud.get_live_benchmark_update(db, user_id)
+        if benchmark:
+            broker.publish(user_id, "benchmark", benchmark)
+
+
+def _claim_batch(db: Session, batch_size: int) -> List[models.OutboxEvent]:
+    """Lease the oldest pending events; concurrent workers skip each other's rows on PostgreSQL"""
+    now = datetime.now(timezone.utc)
+    query = db.query(models.OutboxEvent).filter(
+        models.OutboxEvent.processed_at.is_(None),
+        models.OutboxEvent.available_at <= now,
+        models.OutboxEvent.attempts < MAX_ATTEMPTS
+    ).order_by(models.OutboxEvent.id).limit(batch_size)
+    if db.get_bind().dialect.name == "postgresql":
+        query = query.with_for_update(skip_locked=True)
+    events = query.all()
+    for event in events:
+        event.attempts += 1
+        event.available_at = now + timedelta(seconds=LEASE_SECONDS)
+    db.commit()
+    return events
+
+
+def process_batch(db: Session, batch_size: int = BATCH_SIZE) -> int:
+    """Claim and handle one batch of events; returns the number of events claimed"""
+    events = _claim_batch(db, batch_size)
+    if not events:
+        return 0
+
+    by_type = defaultdict(list)
+    for event in events:
+        by_type[event.event_type].append(event)
+
+    failed = {}
+    for event_type, group in by_type.items():
+        for handler in HANDLERS.get(event_type, []):
+            try:
+                handler(db, group)
+            except Exception as e:
+                db.rollback()
+                logger.error(f"Outbox handler {handler.__name__} failed for {len(group)} '{event_type}' events: {e}")
+                for event in group:
+                    failed[event.id] = f"{handler.__name__}: {e}"
+
+    # Failed events keep their lease and are retried once it expires
+    now = datetime.now(timezone.utc)
+    for event in events:
+        if event.id in failed:
+            event.last_error = failed[event.id]
+        else:
+            event.processed_at = now
+            event.last_error = None
+    db.commit()
+    return len(events)
+
+
+def drain(db: Session, batch_size: int = BATCH_SIZE) -> int:
+    """Process batches until no events are available; returns the number of events claimed"""
+    total = 0
+    while True:
+        claimed = process_batch(db, batch_size)
+        if not claimed:
+            return total
+        total += claimed
+
+
+class OutboxConsumer:
+    """Polls the outbox in a daemon thread with its own database session"""
+
+    def __init__(self, poll_seconds: float = POLL_SECONDS):
+        self.poll_seconds = poll_seconds
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _loop(self):
+        while not self._stop.is_set():
+            db = SessionLocal()
+            try:
+                claimed = process_batch(db)
+            except Exception as e:
+                logger.error(f"Outbox consumer error: {e}")
+                db.rollback()
+                claimed = 0
+            finally:
+                db.close()
+            if not claimed:
+                self._stop.wait(self.poll_seconds)
+
+    def start(self):
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._loop, name="outbox-consumer", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+
+# Shared consumer for the application process
+consumer = OutboxConsumer()
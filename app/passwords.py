@@ -0,0 +1,125 @@
+"""
+Password hashing
+Argon2id hashes computed in a dedicated, size-limited thread pool so slow
+hashes never occupy the request threadpool (argon2 releases the GIL while
+hashing). Submissions beyond the queue limit are rejected with PoolBusy
+instead of piling up. Hashes made with older work factors, and legacy
+plaintext rows, are replaced on the user's next successful login
+"""
+import asyncio
+import hmac
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Optional, Tuple
+
+from argon2 import PasswordHasher
+from argon2.exceptions import InvalidHash, VerificationError
+
+# Work factors; raising them upgrades existing hashes as users log in
+TIME_COST = int(os.getenv("PASSWORD_HASH_TIME_COST", 3))
+MEMORY_COST_KIB = int(os.getenv("PASSWORD_HASH_MEMORY_KIB", 64 * 1024))
+PARALLELISM = int(os.getenv("PASSWORD_HASH_PARALLELISM", 1))
+
+WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", min(4, os.cpu_count() or 1)))
+MAX_QUEUE = int(os.getenv("PASSWORD_HASH_MAX_QUEUE", 64))  # Waiting jobs before new ones are rejected
+
+_hasher = PasswordHasher(time_cost=TIME_COST, memory_cost=MEMORY_COST_KIB, parallelism=PARALLELISM)
+
+HASH_PREFIX = "$argon2"
+
+
+class PoolBusy(Exception):
+    """Raised when the hashing queue is full; callers should answer 503"""
+
+
+def hash_password_sync(password: str) -> str:
+    """Hash on the calling thread (CLI scripts); request handlers use hash_password"""
+    return _hasher.hash(password)
+
+
+def _verify(password: str, stored: Optional[str]) -> Tuple[bool, Optional[str]]:
+    """(matches, replacement hash or None) for a stored hash or legacy plaintext"""
+    if stored is None:
+        # Unknown user: spend the same time as a real check
+        _hasher.hash(password)
+        return False, None
+    if not stored.startswith(HASH_PREFIX):
+        if hmac.compare_digest(stored.encode(), password.encode()):
+            return True, _hasher.hash(password)
+        return False, None
+    try:
+        _hasher.verify(stored, password)
+    except (VerificationError, InvalidHash):
+        return False, None
+    return True, _hasher.hash(password) if _hasher.check_needs_rehash(stored) else None
+
+
+class HashingPool:
+    """Bounded executor with queue-depth and latency counters"""
+
+    def __init__(self, workers: int = WORKERS, max_queue: int = MAX_QUEUE):
+        self.workers = workers
+        self.max_queue = max_queue
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="password-hash")
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._completed = 0
+        self._rejected = 0
+        self._busy_seconds = 0.0
+
+    def _run(self, fn, args):
+        started = time.perf_counter()
+        try:
+            return fn(*args)
+        finally:
+            with self._lock:
+                self._pending -= 1
+                self._completed += 1
+                self._busy_seconds += time.perf_counter() - started
+
+    async def run(self, fn, *args):
+        with self._lock:
+            if self._pending >= self.workers + self.max_queue:
+                self._rejected += 1
+                raise PoolBusy()
+            self._pending += 1
+        try:
+            future = self._executor.submit(self._run, fn, args)
+        except RuntimeError:
+            with self._lock:
+                self._pending -= 1
+            raise
+        return await asyncio.wrap_future(future)
+
+    def metrics(self) -> Dict[str, float]:
+        with self._lock:
+            return {
+                "workers": self.workers,
+                "max_queue": self.max_queue,
+                "in_flight": min(self._pending, self.workers),
+                "queue_depth": max(self._pending - self.workers, 0),
+                "completed": self._completed,
+                "rejected": self._rejected,
+                "avg_hash_ms": round(self._busy_seconds / self._completed * 1000, 1) if self._completed else 0.0,
+                "time_cost": TIME_COST,
+                "memory_cost_kib": MEMORY_COST_KIB,
+            }
+
+
+# Shared pool for the application process
+pool = HashingPool()
+
+
+async def hash_password(password: str) -> str:
+    return await pool.run(_hasher.hash, password)
+
+
+async def verify_password(password: str, stored: Optional[str]) -> Tuple[bool, Optional[str]]:
+    """
+    Check a password against the stored value (None for an unknown user).
+    Returns (matches, new_hash); new_hash is set when the stored value should
+    be replaced because it is plaintext or uses outdated work factors
+    """
+    return await pool.run(_verify, password, stored)
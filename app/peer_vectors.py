@@ -0,0 +1,225 @@
+"""
+In-process nearest-peer index
+Keeps one NumPy matrix of user score vectors per specialization so
+"learners like you" is a single vectorized distance computation
+"""
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from . import models_hierarchical as models
+
+SCORE_COLUMNS = (
+    models.User.readiness_score,
+    models.User.technical_score,
+    models.User.soft_skills_score,
+    models.User.leadership_score,
+)
+
+# The per-quiz best results together weigh as much as one score dimension,
+# so specializations with many quizzes do not drown out the four scores
+QUIZ_RESULTS_WEIGHT = 1.0
+
+# Matrices are reloaded at least this often so writes from other worker
+# processes are picked up
+MAX_AGE_SECONDS = 60
+
+
+class SpecializationVectors:
+    """User ids and their weighted feature rows for one specialization"""
+
+    def __init__(self, user_ids: np.ndarray, matrix: np.ndarray, quiz_ids: List[int]):
+        self.user_ids = user_ids
+        self.matrix = matrix
+        self.row_by_user = {int(user_id): row for row, user_id in enumerate(user_ids)}
+        self.quiz_ids = quiz_ids
+        self.column_by_quiz = {quiz_id: len(SCORE_COLUMNS) + column for column, quiz_id in enumerate(quiz_ids)}
+        self.quiz_scale = QUIZ_RESULTS_WEIGHT / np.sqrt(len(quiz_ids)) if quiz_ids else 0.0
+
+    def feature_row(self, scores: tuple, quiz_results: Dict[int, float]) -> np.ndarray:
+        """A weighted row from the four scores and the user's best percentage per quiz"""
+        row = np.zeros(self.matrix.shape[1])
+        row[:len(SCORE_COLUMNS)] = [score or 0 for score in scores]
+        for quiz_id, percentage in quiz_results.items():
+            column = self.column_by_quiz.get(quiz_id)
+            if column is not None:
+                row[column] = (percentage or 0) * self.quiz_scale
+        return row
+
+    def with_row(self, user_id: int, row: Optional[np.ndarray]) -> "SpecializationVectors":
+        """A copy with the user's row replaced, added or (row=None) removed"""
+        user_ids, matrix = self.user_ids, self.matrix
+        existing = self.row_by_user.get(user_id)
+        if existing is not None:
+            user_ids = np.delete(user_ids, existing)
+            matrix = np.delete(matrix, existing, axis=0)
+        if row is not None:
+            user_ids = np.append(user_ids, user_id)
+            matrix = np.vstack([matrix, row])
+        return SpecializationVectors(user_ids, matrix, self.quiz_ids)
+
+
+class PeerVectorIndex:
+    """
+    Score vectors per specialization. Committed changes update the affected
+    user's row in place; a specialization is rebuilt from the database only
+    on first use and when its matrix expires (which picks up other workers'
+    writes) or falls out of step
+    """
+
+    def __init__(self, max_age_seconds: float = MAX_AGE_SECONDS):
+        self.max_age_seconds = max_age_seconds
+        self._lock = threading.Lock()
+        self._vectors: Dict[int, SpecializationVectors] = {}
+        self._loaded_at: Dict[int, float] = {}
+        self._stale = set()
+        # Bumped on every change, so a load that raced with one is not cached
+        self._generation: Dict[int, int] = {}
+
+    def _changed(self, specialization_id: int) -> Optional[SpecializationVectors]:
+        """Record a change; the cached vectors to patch, if any. Caller holds the lock"""
+        self._generation[specialization_id] = self._generation.get(specialization_id, 0) + 1
+        if specialization_id in self._stale:
+            return None
+        return self._vectors.get(specialization_id)
+
+    def mark_stale(self, specialization_id: int):
+        """Rebuild this specialization on its next lookup"""
+        with self._lock:
+            self._changed(specialization_id)
+            self._stale.add(specialization_id)
+
+    def clear(self):
+        with self._lock:
+            self._vectors.clear()
+            self._loaded_at.clear()
+            self._stale.clear()
+            for specialization_id in self._generation:
+                self._generation[specialization_id] += 1
+
+    def update_user(self, user_id: int, old_specialization_id: Optional[int],
+                    new_specialization_id: Optional[int], scores: tuple,
+                    quiz_results: Optional[Dict[int, float]] = None):
+        """
+        Committed score change: set the user's four scores, moving their row
+        when the specialization changed. quiz_results (best percentage per
+        quiz of the new specialization) is needed only for a move.
+        """
+        with self._lock:
+            if old_specialization_id and old_specialization_id != new_specialization_id:
+                vectors = self._changed(old_specialization_id)
+                if vectors is not None:
+                    self._vectors[old_specialization_id] = vectors.with_row(user_id, None)
+            if not new_specialization_id:
+                return
+            vectors = self._changed(new_specialization_id)
+            if vectors is None:
+                return
+            row = vectors.row_by_user.get(user_id)
+            if old_specialization_id != new_specialization_id:
+                self._vectors[new_specialization_id] = vectors.with_row(
+                    user_id, vectors.feature_row(scores, quiz_results or {})
+                )
+            elif row is None:
+                self._stale.add(new_specialization_id)  # Out of step with the database
+            else:
+                vectors.matrix[row, :len(SCORE_COLUMNS)] = [score or 0 for score in scores]
+
+    def record_result(self, specialization_id: int, user_id: int, quiz_id: int, percentage: float):
+        """Committed quiz attempt: raise the user's best result for the quiz if it improved"""
+        with self._lock:
+            vectors = self._changed(specialization_id)
+            if vectors is None:
+                return
+            row = vectors.row_by_user.get(user_id)
+            if row is None:
+                return  # Not a member of the quiz's specialization
+            column = vectors.column_by_quiz.get(quiz_id)
+            if column is None:
+                self._stale.add(specialization_id)  # Quiz added since the matrix was built
+                return
+            vectors.matrix[row, column] = max(vectors.matrix[row, column], (percentage or 0) * vectors.quiz_scale)
+
+    def _load(self, db: Session, specialization_id: int) -> SpecializationVectors:
+        """Build the matrix with one query for scores and one for per-quiz best results"""
+        with self._lock:
+            generation = self._generation.get(specialization_id, 0)
+        users = db.query(models.User.id, *SCORE_COLUMNS).filter(
+            models.User.preferred_specialization_id == specialization_id
+        ).order_by(models.User.id).all()
+        user_ids = np.array([row[0] for row in users], dtype=np.int64)
+        scores = np.nan_to_num(
+            np.array([row[1:] for row in users], dtype=float).reshape(len(users), len(SCORE_COLUMNS)),
+            nan=0.0
+        )
+
+        quiz_ids = [quiz_id for (quiz_id,) in db.query(models.Quiz.id).filter(
+            models.Quiz.specialization_id == specialization_id,
+            models.Quiz.is_active == True
+        ).order_by(models.Quiz.id)]
+        quiz_results = np.zeros((len(users), len(quiz_ids)))
+        if quiz_ids and len(users):
+            column_by_quiz = {quiz_id: column for column, quiz_id in enumerate(quiz_ids)}
+            row_by_user = {int(user_id): row for row, user_id in enumerate(user_ids)}
+            best_results = db.query(
+                models.QuizAttempt.user_id,
+                models.QuizAttempt.quiz_id,
+                func.max(models.QuizAttempt.percentage)
+            ).join(
+                models.User, models.User.id == models.QuizAttempt.user_id
+            ).filter(
+                models.User.preferred_specialization_id == specialization_id,
+                models.QuizAttempt.quiz_id.in_(quiz_ids)
+            ).group_by(models.QuizAttempt.user_id, models.QuizAttempt.quiz_id)
+            for user_id, quiz_id, percentage in best_results:
+                quiz_results[row_by_user[user_id], column_by_quiz[quiz_id]] = percentage or 0
+            quiz_results *= QUIZ_RESULTS_WEIGHT / np.sqrt(len(quiz_ids))
+
+        vectors = SpecializationVectors(user_ids, np.hstack([scores, quiz_results]), quiz_ids)
+        with self._lock:
+            # A change committed during the queries may be missing from them; serve but do not cache
+            if self._generation.get(specialization_id, 0) == generation:
+                self._vectors[specialization_id] = vectors
+                self._loaded_at[specialization_id] = time.monotonic()
+                self._stale.discard(specialization_id)
+        return vectors
+
+    def get_vectors(self, db: Session, specialization_id: int) -> SpecializationVectors:
+        """Vectors for a specialization, reloading if stale or expired"""
+        with self._lock:
+            vectors = self._vectors.get(specialization_id)
+            loaded_at = self._loaded_at.get(specialization_id, 0.0)
+            fresh = (
+                vectors is not None
+                and specialization_id not in self._stale
+                and time.monotonic() - loaded_at < self.max_age_seconds
+            )
+        if fresh:
+            return vectors
+        return self._load(db, specialization_id)
+
+    def nearest(self, db: Session, specialization_id: int, user_id: int, limit: int = 5) -> Optional[List[Tuple[int, float]]]:
+        """
+        (user_id, distance) of the `limit` peers closest to a user, nearest first.
+        None if the user is not in the specialization.
+        """
+        vectors = self.get_vectors(db, specialization_id)
+        row = vectors.row_by_user.get(user_id)
+        if row is None:
+            return None
+        distances = np.sqrt(((vectors.matrix - vectors.matrix[row]) ** 2).sum(axis=1))
+        distances[row] = np.inf  # Exclude the user themselves
+        count = min(limit, len(distances) - 1)
+        if count <= 0:
+            return []
+        candidates = np.argpartition(distances, count - 1)[:count]
+        candidates = candidates[np.argsort(distances[candidates], kind="stable")]
+        return [(int(vectors.user_ids[index]), float(distances[index])) for index in candidates]
+
+
+# Shared instance for the application process
+peer_vector_index = PeerVectorIndex()
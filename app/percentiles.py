@@ -0,0 +1,156 @@
+"""
+In-process percentile engine for peer benchmarks
+Keeps a sorted score array per (specialization, category) so percentile
+lookups are a binary search instead of a scan over every user
+"""
+import threading
+import time
+from typing import Dict, Optional
+
+import numpy as np
+from sqlalchemy.orm import Session
+
+from . import models_hierarchical as models
+
+# Score column behind each benchmark category
+CATEGORY_COLUMNS = {
+    "readiness": models.User.readiness_score,
+    "technical": models.User.technical_score,
+    "soft_skills": models.User.soft_skills_score,
+    "leadership": models.User.leadership_score,
+}
+
+# Cached arrays are reloaded at least this often, even without change events,
+# so writes from other worker processes are picked up
+MAX_AGE_SECONDS = 60
+
+
+class PercentileIndex:
+    """
+    Sorted score arrays per specialization. Committed score changes move the
+    single affected score in place; whole specializations are reloaded only
+    when marked stale (full rebuilds) or expired
+    """
+
+    def __init__(self, max_age_seconds: float = MAX_AGE_SECONDS):
+        self.max_age_seconds = max_age_seconds
+        self._lock = threading.Lock()
+        self._arrays: Dict[int, Dict[str, np.ndarray]] = {}
+        self._loaded_at: Dict[int, float] = {}
+        self._stale = set()
+        # Bumped on every change, so a load that raced with one is not cached
+        self._generation: Dict[int, int] = {}
+
+    def mark_stale(self, specialization_id: int):
+        """Reload this specialization on its next lookup"""
+        with self._lock:
+            self._stale.add(specialization_id)
+            self._generation[specialization_id] = self._generation.get(specialization_id, 0) + 1
+
+    def clear(self):
+        with self._lock:
+            self._arrays.clear()
+            self._loaded_at.clear()
+            self._stale.clear()
+            for specialization_id in self._generation:
+                self._generation[specialization_id] += 1
+
+    @staticmethod
+    def _move(values: np.ndarray, old: Optional[float], new: Optional[float]) -> Optional[np.ndarray]:
+        """A copy of a sorted array with one `old` score replaced by `new`; None if `old` is missing"""
+        if old is not None:
+            index = int(np.searchsorted(values, old, side="left"))
+            if index == len(values) or values[index] != old:
+                return None
+            values = np.delete(values, index)
+        if new is not None:
+            values = np.insert(values, int(np.searchsorted(values, new, side="left")), new)
+        return values
+
+    def update_user(self, old_specialization_id: Optional[int], old_scores: tuple,
+                    new_specialization_id: Optional[int], new_scores: tuple):
+        """
+        Committed score change: move one user's (readiness, technical,
+        soft_skills, leadership) scores between or within specializations.
+        Call after commit so readers never see uncommitted scores.
+        """
+        changes = {}
+        if old_specialization_id:
+            changes[old_specialization_id] = [old_scores, None]
+        if new_specialization_id:
+            changes.setdefault(new_specialization_id, [None, None])[1] = new_scores
+        with self._lock:
+            for specialization_id, (old, new) in changes.items():
+                self._generation[specialization_id] = self._generation.get(specialization_id, 0) + 1
+                arrays = self._arrays.get(specialization_id)
+                if arrays is None or specialization_id in self._stale:
+                    continue
+                moved = {}
+                for idx, category in enumerate(CATEGORY_COLUMNS):
+                    values = self._move(
+                        arrays[category],
+                        float(old[idx]) if old else None,
+                        float(new[idx]) if new else None
+                    )
+                    if values is None:
+                        # Out of step with the database (e.g. another worker's write): reload
+                        self._stale.add(specialization_id)
+                        break
+                    moved[category] = values
+                else:
+                    self._arrays[specialization_id] = moved
+
+    def _load(self, db: Session, specialization_id: int) -> Dict[str, np.ndarray]:
+        """Load all four categories for a specialization with one query"""
+        with self._lock:
+            generation = self._generation.get(specialization_id, 0)
+        rows = db.query(*CATEGORY_COLUMNS.values()).filter(
+            models.User.preferred_specialization_id == specialization_id
+        ).all()
+        matrix = np.array(rows, dtype=float).reshape(len(rows), len(CATEGORY_COLUMNS))
+        matrix = np.nan_to_num(matrix, nan=0.0)  # NULL scores count as 0, as elsewhere
+        arrays = {
+            category: np.sort(matrix[:, idx])
+            for idx, category in enumerate(CATEGORY_COLUMNS)
+        }
+        with self._lock:
+            # A change committed during the query may be missing from it; serve but do not cache
+            if self._generation.get(specialization_id, 0) == generation:
+                self._arrays[specialization_id] = arrays
+                self._loaded_at[specialization_id] = time.monotonic()
+                self._stale.discard(specialization_id)
+        return arrays
+
+    def get_arrays(self, db: Session, specialization_id: int) -> Dict[str, np.ndarray]:
+        """Sorted score arrays for a specialization, reloading if stale or expired"""
+        with self._lock:
+            arrays = self._arrays.get(specialization_id)
+            loaded_at = self._loaded_at.get(specialization_id, 0.0)
+            fresh = (
+                arrays is not None
+                and specialization_id not in self._stale
+                and time.monotonic() - loaded_at < self.max_age_seconds
+            )
+        if fresh:
+            return arrays
+        return self._load(db, specialization_id)
+
+    def percentiles(self, db: Session, specialization_id: int, scores: Dict[str, float]) -> Dict[str, int]:
+        """
+        Percentile for each category in `scores`, e.g. 75 means "better than 75% of peers".
+        Answers every category from the same cached arrays in one call.
+        """
+        arrays = self.get_arrays(db, specialization_id)
+        result = {}
+        for category, score in scores.items():
+            values = arrays.get(category)
+            if values is None or len(values) < 2:
+                result[category] = 50  # Default to 50th percentile if not enough data
+                continue
+            below_count = int(np.searchsorted(values, score or 0, side="left"))
+            result[category] = int((below_count / len(values)) * 100)
+        return result
+
+
+# Shared instance for the application process
+percentile_index = PercentileIndex()
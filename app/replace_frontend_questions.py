@@ -91,7 +91,8 @@ def insert_ai_questions(db: Session, quiz_id: int, ai_questions: list):
             points=1,
             order_index=idx,
             is_active=True,
-            explanation=q_data.get('explanation', '')
+            explanation=q_data.get('explanation', ''),
+            topic=q_data.get('topic')
         )
         db.add(question)
         db.flush()  # Get the question ID
@@ -0,0 +1,85 @@
+"""
+Content negotiation between JSON and MessagePack
+NegotiationMiddleware reads the Accept header once per request; NegotiatedResponse
+(the app's default response class) then encodes the same schema-shaped content
+as JSON or as MessagePack. Clients opt in with `Accept: application/msgpack`
+"""
+import json
+from contextvars import ContextVar
+from typing import Any
+
+import msgpack
+from fastapi.responses import JSONResponse
+
+JSON = "application/json"
+MSGPACK = "application/msgpack"
+MSGPACK_TYPES = (MSGPACK, "application/x-msgpack")
+
+_negotiated: ContextVar[str] = ContextVar("negotiated_media_type", default=JSON)
+
+
+def choose_media_type(accept: str) -> str:
+    """MessagePack when the Accept header ranks it at least as high as JSON"""
+    if not accept or "msgpack" not in accept:
+        return JSON
+    msgpack_q = json_q = 0.0
+    for part in accept.split(","):
+        media_type, *params = [piece.strip() for piece in part.split(";")]
+        q = 1.0
+        for param in params:
+            if param.startswith("q="):
+                try:
+                    q = float(param[2:])
+                except ValueError:
+                    q = 0.0
+        if media_type.lower() in MSGPACK_TYPES:
+            msgpack_q = max(msgpack_q, q)
+        elif media_type.lower() == JSON:
+            json_q = max(json_q, q)
+    return MSGPACK if msgpack_q > 0 and msgpack_q >= json_q else JSON
+
+
+def negotiated_media_type() -> str:
+    """Media type chosen for the current request"""
+    return _negotiated.get()
+
+
+def encode(content: Any, media_type: str) -> bytes:
+    """Encode JSON-compatible content the way NegotiatedResponse does"""
+    if media_type == MSGPACK:
+        return msgpack.packb(content, use_bin_type=True)
+    return json.dumps(content, ensure_ascii=False, allow_nan=False, indent=None, separators=(",", ":")).encode("utf-8")
+
+
+class NegotiatedResponse(JSONResponse):
+    """JSONResponse that switches to MessagePack when the request asked for it"""
+
+    def __init__(self, content: Any, *args, **kwargs):
+        self.media_type = negotiated_media_type()
+        super().__init__(content, *args, **kwargs)
+        self.headers.setdefault("vary", "Accept")
+
+    def render(self, content: Any) -> bytes:
+        return encode(content, self.media_type)
+
+
+class NegotiationMiddleware:
+    """Pure ASGI middleware so the choice is visible to the endpoint and its response"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        accept = ""
+        for name, value in scope["headers"]:
+            if name == b"accept":
+                accept = value.decode("latin-1")
+                break
+        token = _negotiated.set(choose_media_type(accept))
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            _negotiated.reset(token)
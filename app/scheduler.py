@@ -0,0 +1,154 @@
+"""
+Minimal in-process scheduler for periodic maintenance jobs
+Each job runs in its own daemon thread with a fresh database session.
+Every uvicorn worker schedules the same jobs, so jobs that write shared
+tables are marked exclusive: on PostgreSQL they take an advisory lock and
+a worker that finds it held skips that run
+"""
+import logging
+import os
+import threading
+import zlib
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from typing import Callable, List, Optional
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from .database import SessionLocal, engine
+
+logger = logging.getLogger(__name__)
+
+
+@contextmanager
+def advisory_lock(name: str):
+    """
+    Try to take a PostgreSQL session-level advisory lock keyed on `name` for
+    the duration of the block; yields whether it was acquired. Other
+    databases have no cross-process lock, so it is always granted there.
+    """
+    if engine.dialect.name != "postgresql":
+        yield True
+        return
+    key = zlib.crc32(f"scheduler:{name}".encode())
+    with engine.connect() as connection:
+        acquired = connection.execute(text("SELECT pg_try_advisory_lock(:key)"), {"key": key}).scalar()
+        try:
+            yield acquired
+        finally:
+            if acquired:
+                connection.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": key})
+
+
+class PeriodicJob:
+    """
+    Runs func(db) every interval_seconds until stopped.
+    With last_run (returning when the job's work was last done, read from
+    its own output), the first run is due interval_seconds after that
+    rather than after startup, so frequent restarts cannot starve it.
+    """
+
+    def __init__(self, name: str, interval_seconds: float, func: Callable[[Session], object],
+                 exclusive: bool = False, last_run: Optional[Callable[[Session], Optional[datetime]]] = None):
+        self.name = name
+        self.interval_seconds = interval_seconds
+        self.func = func
+        self.exclusive = exclusive
+        self.last_run = last_run
+        self._stop = threading.Event()
+        self._thread = None
+
+    def seconds_until_due(self) -> float:
+        """Time left before the next run is due according to last_run (0 if it never ran)"""
+        db = SessionLocal()
+        try:
+            last = self.last_run(db)
+        except Exception as e:
+            logger.error(f"Scheduled job '{self.name}' could not read its last run: {e}")
+            return self.interval_seconds
+        finally:
+            db.close()
+        if last is None:
+            return 0.0
+        if last.tzinfo is None:
+            last = last.replace(tzinfo=timezone.utc)  # SQLite returns naive UTC datetimes
+        elapsed = (datetime.now(timezone.utc) - last).total_seconds()
+        return max(0.0, self.interval_seconds - elapsed)
+
+    def _run(self):
+        db = SessionLocal()
+        try:
+            result = self.func(db)
+            logger.info(f"Scheduled job '{self.name}' finished: {result}")
+        except Exception as e:
+            logger.error(f"Scheduled job '{self.name}' failed: {e}")
+            db.rollback()
+        finally:
+            db.close()
+
+    def run_once(self):
+        if not self.exclusive:
+            self._run()
+            return
+        try:
+            with advisory_lock(self.name) as acquired:
+                if not acquired:
+                    logger.info(f"Scheduled job '{self.name}' skipped: running in another process")
+                elif self.last_run and self.seconds_until_due() > 0:
+                    # Another process ran it while this one was waiting for its turn
+                    logger.info(f"Scheduled job '{self.name}' skipped: not due yet")
+                else:
+                    self._run()
+        except Exception as e:
+            logger.error(f"Scheduled job '{self.name}' could not take its lock: {e}")
+
+    def _loop(self):
+        # Without last_run, wait first: data is already consistent at startup
+        delay = self.seconds_until_due() if self.last_run else self.interval_seconds
+        while not self._stop.wait(delay):
+            self.run_once()
+            delay = self.interval_seconds
+
+    def start(self):
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._loop, name=f"job-{self.name}", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+
+_jobs: List[PeriodicJob] = []
+
+
+def interval_from_env(name: str, default_hours: float) -> float:
+    """Job interval in seconds from an *_HOURS environment variable; 0 disables the job"""
+    return float(os.getenv(name, default_hours)) * 3600
+
+
+def schedule(name: str, interval_seconds: float, func: Callable[[Session], object],
+             exclusive: bool = False, last_run: Optional[Callable[[Session], Optional[datetime]]] = None):
+    """
+    Register a periodic job; jobs with a non-positive interval are skipped.
+    exclusive jobs run in one process at a time (see advisory_lock);
+    last_run makes the schedule due-based (see PeriodicJob).
+    """
+    if interval_seconds <= 0:
+        logger.info(f"Scheduled job '{name}' disabled")
+        return None
+    job = PeriodicJob(name, interval_seconds, func, exclusive, last_run)
+    _jobs.append(job)
+    return job
+
+
+def start_all():
+    for job in _jobs:
+        job.start()
+
+
+def stop_all():
+    for job in _jobs:
+        job.stop()
@@ -60,6 +60,34 @@ class User(UserBase):
 class UserUpdate(BaseModel):
     specialization_id: Optional[int] = None
 
+class SpecializationScore(BaseModel):
+    specialization_id: int
+    specialization_name: str
+    technical_score: float
+    average_percentage: float
+    best_percentage: float
+    attempt_count: int
+    passed_count: int
+    last_attempt_at: Optional[str] = None
+
+class TopicMastery(BaseModel):
+    specialization_id: int
+    topic: str
+    correct: int
+    total: int
+    accuracy: float  # Percentage of correct answers
+    last_seen_at: Optional[str] = None
+
+class TopicMasteryResponse(BaseModel):
+    topics: List[TopicMastery]
+
+class UserSpecializationScores(BaseModel):
+    readiness_score: Optional[float] = None
+    technical_score: Optional[float] = None
+    soft_skills_score: Optional[float] = None
+    leadership_score: Optional[float] = None
+    specializations: List[SpecializationScore] = []
+
 # Quiz schemas
 class AnswerOptionBase(BaseModel):
     option_text: str
@@ -169,6 +197,7 @@ class QuestionResult(BaseModel):
     points: int
     earned_points: int
     explanation: Optional[str]
+    topic: Optional[str] = None
     options: dict
 
 class QuizResultExtended(QuizResult):
@@ -192,6 +221,36 @@ class DashboardResponse(BaseModel):
     readiness: ReadinessSnapshot
     recent_attempts: list[RecentAttempt]
 
+class ActivityDay(BaseModel):
+    date: str
+    quizzes: int
+    journal_entries: int
+    total: int
+
+class ActivityCalendarResponse(BaseModel):
+    start_date: str
+    end_date: str
+    days: List[ActivityDay]
+    current_streak: int
+    longest_streak: int
+    last_active_date: Optional[str] = None
+
+class QuizProgress(BaseModel):
+    quiz_id: int
+    title: str
+    difficulty: int
+    passing_score: Optional[float] = None
+    best_percentage: Optional[float] = None
+    passed: bool
+    attempt_count: int
+    last_attempt_at: Optional[str] = None
+    status: str  # "passed", "attempted", "unlocked", "locked"
+
+class SpecializationProgressResponse(BaseModel):
+    specialization_id: int
+    specialization_name: Optional[str] = None
+    levels: List[QuizProgress]
+
 # Goal schemas
 class GoalBase(BaseModel):
     title: str
@@ -235,6 +294,55 @@ class JournalEntry(JournalEntryBase):
 class JournalEntryUpdate(BaseModel):
     content: str
 
+# Keyset-paged list views: lean rows plus the cursor for the next page (None on the last page)
+class AttemptSummary(BaseModel):
+    id: int
+    quiz_id: int
+    quiz_title: str
+    percentage: float
+    is_passed: bool
+    completed_at: datetime
+
+class AttemptHistoryPage(BaseModel):
+    items: List[AttemptSummary]
+    next_cursor: Optional[str] = None
+
+class GoalSummary(BaseModel):
+    id: int
+    title: str
+    category: str
+    target_value: float
+    current_value: Optional[float] = None
+    is_completed: Optional[bool] = None
+    target_date: Optional[datetime] = None
+    created_at: datetime
+
+class GoalPage(BaseModel):
+    items: List[GoalSummary]
+    next_cursor: Optional[str] = None
+
+class JournalEntrySummary(BaseModel):
+    id: int
+    prompt: Optional[str] = None
+    excerpt: str
+    truncated: bool
+    entry_date: datetime
+
+class JournalPage(BaseModel):
+    items: List[JournalEntrySummary]
+    next_cursor: Optional[str] = None
+
+class JournalSearchHit(BaseModel):
+    id: int
+    entry_date: datetime
+    prompt: Optional[str] = None
+    snippet: str  # HTML: escaped entry text, matched words wrapped in <mark></mark>
+    rank: float
+
+class JournalSearchResponse(BaseModel):
+    query: str
+    results: List[JournalSearchHit]
+
 # Response schemas
 class UserResponse(BaseModel):
     success: bool
@@ -285,3 +393,125 @@ class PeerBenchmarkData(BaseModel):
 class PeerBenchmarkResponse(BaseModel):
     success: bool
     data: PeerBenchmarkData
+
+
+# Branch and sector benchmark rollups
+class BenchmarkCategoryStats(BaseModel):
+    category: str  # "readiness", "technical", "soft_skills", "leadership"
+    average: float
+    std_dev: float
+
+class HierarchyBenchmarkNode(BaseModel):
+    level: str  # "specialization", "branch" or "sector"
+    id: int
+    name: str
+    total_users: int
+    median_readiness_score: float
+    categories: List[BenchmarkCategoryStats]
+    last_updated: Optional[str] = None
+
+class HierarchyBenchmarkResponse(HierarchyBenchmarkNode):
+    children: List[HierarchyBenchmarkNode] = []
+
+
+# Peer benchmark history
+class BenchmarkTrendSeries(BaseModel):
+    total_users: List[int]
+    readiness: List[float]
+    technical: List[float]
+    soft_skills: List[float]
+    leadership: List[float]
+    median_readiness: List[float]
+
+class PeerBenchmarkTrendResponse(BaseModel):
+    specialization_id: int
+    labels: List[str]  # ISO dates, oldest first
+    resolutions: List[str]  # "daily", "weekly" or "monthly" for each point
+    series: BenchmarkTrendSeries
+
+
+# Leaderboards
+class LeaderboardEntry(BaseModel):
+    rank: int  # Tied scores share a rank
+    user_id: int
+    name: str
+    readiness_score: float
+
+class LeaderboardResponse(BaseModel):
+    specialization_id: int
+    total_users: int
+    entries: List[LeaderboardEntry]
+    you: Optional[LeaderboardEntry] = None
+
+
+# Similar peers
+class SimilarPeer(BaseModel):
+    user_id: int
+    name: str
+    similarity: float  # 0-100, 100 means an identical score vector
+    readiness_score: float
+    technical_score: float
+    soft_skills_score: float
+    leadership_score: float
+
+class SimilarPeersResponse(BaseModel):
+    user_id: int
+    specialization_id: int
+    peers: List[SimilarPeer]
+
+
+# Cross-specialization comparison
+class CategoryDifference(BaseModel):
+    category: str
+    difference: float  # User's score minus the specialization's peer average
+    status: str  # "above", "average", "below"
+
+class SpecializationComparison(BaseModel):
+    specialization_id: int
+    specialization_name: str
+    total_users: int
+    is_current: bool
+    readiness_percentile: int
+    differences: List[CategoryDifference]
+
+class SpecializationComparisonResponse(BaseModel):
+    user_id: int
+    comparisons: List[SpecializationComparison]
+
+
+# Next-quiz recommendations
+class QuizRecommendation(BaseModel):
+    rank: int
+    quiz_id: int
+    title: str
+    difficulty: int
+    reason: str  # "next_level", "weak_topic" or "popular_with_peers"
+    detail: Optional[str] = None
+
+class QuizRecommendationsResponse(BaseModel):
+    recommendations: List[QuizRecommendation]
+
+
+# Badges
+class EarnedBadge(BaseModel):
+    id: int
+    name: str
+    description: Optional[str] = None
+    icon_url: Optional[str] = None
+    category: str
+    required_score: float
+    earned_date: Optional[str] = None
+    shared: bool = False
+
+class UserBadgesResponse(BaseModel):
+    badges: List[EarnedBadge]
+
+
+# Post-login landing page in one response
+class BootstrapResponse(BaseModel):
+    user: User
+    dashboard: DashboardResponse
+    goals: GoalPage  # First page; continue with /api/goals/page?cursor=
+    journal: JournalPage  # First page; continue with /api/journal/page?cursor=
+    hierarchy: List[dict]
+    peer_benchmark: Optional[PeerBenchmarkData] = None  # None until a specialization has enough peers
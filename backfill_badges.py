@@ -0,0 +1,41 @@
+#!/usr/bin/env python3
+"""
+Award every badge that users already qualify for
+Run this once after enabling badge awards, or after adding badges by hand
+(badges added through data/badges.json are backfilled at startup)
+Safe to rerun: badges a user already has are left alone
+Usage: python backfill_badges.py [--batch-size N]
+"""
+import argparse
+import sys
+import os
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app.database import SessionLocal
+from app import crud
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Award the badges existing users already qualify for")
+    parser.add_argument("--batch-size", type=int, default=500, help="Users per batch")
+    args = parser.parse_args()
+    
+    db = SessionLocal()
+    try:
+        awarded = crud.backfill_badges(db, batch_size=args.batch_size)
+        
+        print(f"\n{'='*60}")
+        print(f"{awarded} qualifying award(s) checked; existing badges were kept")
+        print(f"{'='*60}")
+    except Exception as e:
+        print(f"\nERROR: {e}")
+        db.rollback()
+        sys.exit(1)
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
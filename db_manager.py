@@ -6,6 +6,7 @@ Usage: python db_manager.py
 
 import sys
 from app.database import SessionLocal, engine
+from app.passwords import hash_password_sync
 from app.models_hierarchical import (
     Sector, Branch, Specialization, Quiz, Question, QuestionOption, User, QuizAttempt
 )
@@ -236,7 +237,7 @@ def create_user(db):
         print(f"❌ User with email '{email}' already exists (ID: {existing.id})")
         return
     
-    user = User(name=name, email=email, password_hash=password)  # In production, hash this!
+    user = User(name=name, email=email, password_hash=hash_password_sync(password))
     db.add(user)
     db.commit()
     db.refresh(user)
@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+"""
+Outbox worker: delivers queued events (e.g. quiz_completed) to their handlers
+Run as a separate process and start the API with OUTBOX_CONSUMER=off,
+or use --once to drain the queue a single time (e.g. from cron)
+Usage: python process_outbox.py [--once] [--batch-size N]
+"""
+import argparse
+import sys
+import os
+import time
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app.database import SessionLocal
+from app import outbox
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Deliver outbox events to their handlers")
+    parser.add_argument("--once", action="store_true",
+                        help="Drain the pending events and exit instead of polling")
+    parser.add_argument("--batch-size", type=int, default=outbox.BATCH_SIZE,
+                        help="Events claimed per batch")
+    args = parser.parse_args()
+
+    if args.once:
+        db = SessionLocal()
+        try:
+            processed = outbox.drain(db, args.batch_size)
+            print(f"{processed} outbox event(s) processed")
+        except Exception as e:
+            print(f"\nERROR: {e}")
+            db.rollback()
+            sys.exit(1)
+        finally:
+            db.close()
+        return
+
+    print(f"Polling the outbox every {outbox.POLL_SECONDS}s (Ctrl+C to stop)")
+    try:
+        while True:
+            db = SessionLocal()
+            try:
+                processed = outbox.drain(db, args.batch_size)
+                if processed:
+                    print(f"{processed} outbox event(s) processed")
+            except Exception as e:
+                print(f"ERROR: {e}")
+                db.rollback()
+            finally:
+                db.close()
+            time.sleep(outbox.POLL_SECONDS)
+    except KeyboardInterrupt:
+        print("\nStopped")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,40 @@
+#!/usr/bin/env python3
+"""
+Rebuild peer benchmark statistics for ALL specializations in one pass
+Suitable for a daily cron job; the API also runs this in-process
+(see PEER_BENCHMARK_REBUILD_HOURS)
+Usage: python rebuild_peer_benchmarks.py [--workers N]
+"""
+import argparse
+import sys
+import os
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app.database import SessionLocal
+from app import crud
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Set-based rebuild of every specialization's peer benchmark")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="Process pool size for the NumPy summaries (non-PostgreSQL databases)")
+    args = parser.parse_args()
+    
+    db = SessionLocal()
+    try:
+        written = crud.rebuild_all_peer_benchmarks(db, workers=args.workers)
+        print(f"\n{'='*60}")
+        print(f"{written} peer benchmark row(s) rebuilt")
+        print(f"{'='*60}")
+    except Exception as e:
+        print(f"\nERROR: {e}")
+        db.rollback()
+        sys.exit(1)
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+#!/usr/bin/env python3
+"""
+Rebuild readiness, technical and soft-skill scores for ALL users
+Run this after changing the readiness formula in app/crud.py
+Usage: python rebuild_readiness.py [--dry-run]
+"""
+import argparse
+import sys
+import os
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app.database import SessionLocal
+from app import crud
+
+
+def format_scores(scores):
+    """Format a readiness snapshot for one diff line"""
+    return ", ".join(
+        f"{key}={value if value is not None else '-'}" for key, value in scores.items()
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Set-based rebuild of every user's readiness scores")
+    parser.add_argument("--dry-run", action="store_true", help="Print the changes without writing them")
+    args = parser.parse_args()
+    
+    db = SessionLocal()
+    try:
+        changes = crud.rebuild_all_user_readiness(db, dry_run=args.dry_run)
+        
+        for change in changes:
+            print(f"User {change['user_id']}: {format_scores(change['old'])} -> {format_scores(change['new'])}")
+        
+        action = "would be updated" if args.dry_run else "updated"
+        print(f"\n{'='*60}")
+        print(f"{len(changes)} user(s) {action}")
+        print(f"{'='*60}")
+    except Exception as e:
+        print(f"\nERROR: {e}")
+        db.rollback()
+        sys.exit(1)
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()